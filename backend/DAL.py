@@ -1,6 +1,8 @@
 import os
+import time
 
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
 
 # see if we are in testing mode
 TESTING = os.environ.get("TESTING") == "1"
@@ -14,13 +16,18 @@ if TESTING:
         movies_dal,
         messages_dal,
         conversations_dal,
+        precomputed_dal,
+        rate_limits_dal,
+        idempotency_dal,
     )
 else:
     from dotenv import load_dotenv
-    from pymongo import MongoClient
-    from pymongo.errors import PyMongoError
+    from pymongo import MongoClient, ReturnDocument, UpdateOne
+    from pymongo.errors import BulkWriteError, DuplicateKeyError, PyMongoError
     from pymongo.server_api import ServerApi
 
+    from utils.message_buckets import bucket_spans, page_window
+
     # Load environment variables from .env
     load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "../.env"))
 
@@ -139,6 +146,57 @@ else:
                 print(f"Error deleting movie: {e}")
                 return False
 
+    def _bucket_updates(
+        convo_id: Any, start_index: int, messages: List[Dict[str, Any]]
+    ) -> List[Tuple[Dict[str, Any], Dict[str, Any], int]]:
+        """(filter, update, first message index) for each bucket an append touches"""
+        updates = []
+        for seq, lo, hi in bucket_spans(start_index, start_index + len(messages)):
+            batch = [
+                {**message, "n": n}
+                for n, message in zip(range(lo, hi), messages[lo - start_index:])
+            ]
+            # The "messages.n" guard makes a repeated write a no-op, so failed
+            # writes can be retried; $sort keeps the bucket ordered if
+            # concurrent appends land out of order
+            updates.append((
+                {"convo_id": convo_id, "seq": seq, "messages.n": {"$ne": lo}},
+                {
+                    "$push": {"messages": {"$each": batch, "$sort": {"n": 1}}},
+                    "$inc": {"count": len(batch)},
+                },
+                lo,
+            ))
+        return updates
+
+    def _retry_bucket_update(filter: Dict[str, Any], update: Dict[str, Any], lo: int) -> None:
+        """
+        Resolve a bucket upsert that hit a duplicate key
+
+        With the non-equality guard Mongo does not retry such upserts itself.
+        The bucket exists by now, either because this append is already in
+        it or because a concurrent append created it first; update it
+        without upserting, and only accept a miss if it really holds `lo`.
+        """
+        if db_app.message_buckets.update_one(filter, update).matched_count:
+            return
+        stored = db_app.message_buckets.find_one(
+            {"convo_id": filter["convo_id"], "seq": filter["seq"], "messages.n": lo},
+            {"_id": 1},
+        )
+        if stored is None:
+            raise PyMongoError(
+                f"bucket {filter['seq']} of conversation {filter['convo_id']} lost message {lo}"
+            )
+
+    def _ignore_duplicates(error: BulkWriteError) -> None:
+        """Re-raise a bulk write error unless every failure is a duplicate key"""
+        details = error.details or {}
+        if details.get("writeConcernErrors") or any(
+            e.get("code") != 11000 for e in details.get("writeErrors", [])
+        ):
+            raise error
+
     # Messages: one document per message in a conversation
     class messages_dal:
         @staticmethod
@@ -195,38 +253,235 @@ else:
                 print(f"Error deleting message: {e}")
                 return False
 
-    # Conversations: one document per conversation
+        @staticmethod
+        def append_conversation_messages(
+            convo_id: Any, start_index: int, messages: List[Dict[str, Any]]
+        ) -> bool:
+            """Store messages at indices start_index.. of a conversation, one bulk write"""
+            return messages_dal.append_many_conversation_messages(
+                [(convo_id, start_index, messages)]
+            )
+
+        @staticmethod
+        def append_many_conversation_messages(
+            appends: List[Tuple[Any, int, List[Dict[str, Any]]]]
+        ) -> bool:
+            """
+            Store (convo_id, start_index, messages) appends for any number of
+            conversations in one bulk write. Safe to repeat after a failure.
+            """
+            updates = [
+                update
+                for convo_id, start_index, messages in appends
+                for update in _bucket_updates(convo_id, start_index, messages)
+            ]
+            if not updates:
+                return True
+            try:
+                try:
+                    db_app.message_buckets.bulk_write(
+                        [UpdateOne(filter, update, upsert=True) for filter, update, _ in updates],
+                        ordered=False,
+                    )
+                except BulkWriteError as e:
+                    _ignore_duplicates(e)
+                    for err in (e.details or {}).get("writeErrors", []):
+                        _retry_bucket_update(*updates[err["index"]])
+                return True
+            except PyMongoError as e:
+                print(f"Error appending conversation messages: {e}")
+                return False
+
+        @staticmethod
+        def find_conversation_messages(
+            convo_id: Any, start: int, end: int
+        ) -> List[Dict[str, Any]]:
+            """Messages with indices [start, end) of a conversation, reading only their buckets"""
+            spans = bucket_spans(start, end)
+            if not spans:
+                return []
+            try:
+                cursor = db_app.message_buckets.find(
+                    {"convo_id": convo_id, "seq": {"$gte": spans[0][0], "$lte": spans[-1][0]}},
+                    {"_id": 0, "messages": 1},
+                ).sort("seq", 1)
+                return [
+                    {k: v for k, v in message.items() if k != "n"}
+                    for bucket in cursor
+                    for message in bucket.get("messages", [])
+                    if start <= message["n"] < end
+                ]
+            except PyMongoError as e:
+                print(f"Error finding conversation messages: {e}")
+                return []
+
+        @staticmethod
+        def find_first_messages(convo_ids: List[Any]) -> Dict[Any, Dict[str, Any]]:
+            """First message of each conversation, keyed by conversation id"""
+            try:
+                cursor = db_app.message_buckets.find(
+                    {"convo_id": {"$in": convo_ids}, "seq": 0},
+                    {"_id": 0, "convo_id": 1, "messages": {"$slice": 1}},
+                )
+                return {
+                    bucket["convo_id"]: {k: v for k, v in bucket["messages"][0].items() if k != "n"}
+                    for bucket in cursor if bucket.get("messages")
+                }
+            except PyMongoError as e:
+                print(f"Error finding first messages: {e}")
+                return {}
+
+        @staticmethod
+        def delete_conversation_messages(convo_id: Any) -> bool:
+            try:
+                db_app.message_buckets.delete_many({"convo_id": convo_id})
+                return True
+            except PyMongoError as e:
+                print(f"Error deleting conversation messages: {e}")
+                return False
+
+    # Conversations: a header document per conversation; its messages live
+    # in fixed-size buckets behind messages_dal
     class conversations_dal:
         @staticmethod
         def insert_one_conversation(conversation_data: Dict[str, Any]) -> str:
             try:
-                result = db_app.conversations.insert_one(conversation_data)
+                messages = conversation_data.get("messages", [])
+                header = {k: v for k, v in conversation_data.items() if k != "messages"}
+                header["message_count"] = len(messages)
+                result = db_app.conversations.insert_one(header)
+                if messages:
+                    messages_dal.append_conversation_messages(result.inserted_id, 0, messages)
                 return str(result.inserted_id)
             except PyMongoError as e:
                 print(f"Error inserting conversation: {e}")
                 return ""
 
         @staticmethod
-        def find_one_conversation(filter: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        def find_one_conversation(
+            filter: Dict[str, Any],
+            limit: Optional[int] = None,
+            before: Optional[int] = None,
+            after: Optional[int] = None,
+        ) -> Optional[Dict[str, Any]]:
+            """
+            Find a conversation, optionally with only a window of its messages
+
+            With a limit, returns up to `limit` messages: the latest ones, those
+            with index < `before`, or those with index > `after`, plus
+            message_offset (index of the first returned message). Only the
+            buckets covering the window are read.
+            """
             try:
-                return db_app.conversations.find_one(filter)
+                convo = db_app.conversations.find_one(filter)
             except PyMongoError as e:
                 print(f"Error finding conversation: {e}")
                 return None
+            if convo is None:
+                return None
+            start, end = page_window(convo.get("message_count", 0), limit, before, after)
+            convo["messages"] = messages_dal.find_conversation_messages(convo["_id"], start, end)
+            if limit is not None:
+                convo["message_offset"] = start
+            return convo
+
+        @staticmethod
+        def find_conversation_memory(
+            filter: Dict[str, Any], keep_last: int, max_messages: Optional[int] = None
+        ) -> Optional[Dict[str, Any]]:
+            """
+            Fetch the rolling summary, message count and every message the
+            summary does not cover yet (at least the last `keep_last`, at
+            most the last `max_messages`)
+            """
+            try:
+                memory = db_app.conversations.find_one(
+                    filter, {"summary": 1, "summarized_count": 1, "message_count": 1}
+                )
+            except PyMongoError as e:
+                print(f"Error finding conversation memory: {e}")
+                return None
+            if memory is None:
+                return None
+            convo_id = memory.pop("_id")
+            count = memory.setdefault("message_count", 0)
+            start = min(memory.get("summarized_count", 0), max(0, count - keep_last))
+            if max_messages is not None:
+                start = max(start, count - max_messages)
+            memory["messages"] = messages_dal.find_conversation_messages(convo_id, start, count)
+            return memory
+
+        @staticmethod
+        def find_message_range(
+            filter: Dict[str, Any], skip: int, limit: int
+        ) -> List[Dict[str, Any]]:
+            """Fetch `limit` messages of a conversation starting at index `skip`"""
+            try:
+                convo = db_app.conversations.find_one(filter, {"message_count": 1})
+            except PyMongoError as e:
+                print(f"Error finding message range: {e}")
+                return []
+            if not convo:
+                return []
+            end = min(skip + limit, convo.get("message_count", 0))
+            return messages_dal.find_conversation_messages(convo["_id"], skip, end)
+
+        @staticmethod
+        def find_opening_messages(limit: int = 0) -> List[Dict[str, Any]]:
+            """First message of each conversation, newest conversations first"""
+            try:
+                headers = list(db_app.conversations.find(
+                    {"message_count": {"$gt": 0}}, {"_id": 1}
+                ).sort("_id", -1).limit(limit))
+            except PyMongoError as e:
+                print(f"Error finding opening messages: {e}")
+                return []
+            ids = [header["_id"] for header in headers]
+            first = messages_dal.find_first_messages(ids)
+            return [first[convo_id] for convo_id in ids if convo_id in first]
 
         @staticmethod
         def find_all_conversations() -> List[Dict[str, Any]]:
             try:
-                return list(db_app.conversations.find({}))
+                convos = list(db_app.conversations.find({}))
             except PyMongoError as e:
                 print(f"Error finding conversations: {e}")
                 return []
+            for convo in convos:
+                convo["messages"] = messages_dal.find_conversation_messages(
+                    convo["_id"], 0, convo.get("message_count", 0)
+                )
+            return convos
 
         @staticmethod
-        def find_conversations_by_user(user_email: str) -> List[Dict[str, Any]]:
-            """Find all conversations for a specific user"""
+        def find_conversations_by_user(
+            user_email: str,
+            projection: Optional[Dict[str, Any]] = None,
+            limit: int = 0,
+            before: Optional[Tuple[Optional[datetime], Any]] = None,
+        ) -> List[Dict[str, Any]]:
+            """
+            Find a user's conversation headers (no messages), most recently
+            updated first
+
+            `before` is the (updated_at, _id) of the last conversation on the
+            previous page; results continue strictly after it in sort order.
+            Served by the (user_email, updated_at, _id) index.
+            """
             try:
-                return list(db_app.conversations.find({"user_email": user_email}))
+                filter: Dict[str, Any] = {"user_email": user_email}
+                if before is not None:
+                    updated_at, convo_id = before
+                    older = [{"updated_at": updated_at, "_id": {"$lt": convo_id}}]
+                    if updated_at is not None:
+                        older.append({"updated_at": {"$lt": updated_at}})
+                        # Conversations without updated_at sort after every dated one
+                        older.append({"updated_at": None})
+                    filter["$or"] = older
+                cursor = db_app.conversations.find(filter, projection).sort(
+                    [("updated_at", -1), ("_id", -1)]
+                ).limit(limit)
+                return list(cursor)
             except PyMongoError as e:
                 print(f"Error finding conversations by user: {e}")
                 return []
@@ -243,24 +498,249 @@ else:
                 return False
 
         @staticmethod
-        def add_message_to_conversation(
-            convo_id: int, message_data: Dict[str, Any]
+        def append_messages(
+            filter: Dict[str, Any],
+            messages: List[Dict[str, Any]],
+            updated_at: Optional[datetime] = None,
         ) -> bool:
-            """Add a message to a conversation's messages array"""
+            """
+            Append messages to a conversation
+
+            Reserving the message indices is one atomic update on the header;
+            the messages then go to their bucket(s) in a single bulk write.
+            """
+            reserved = conversations_dal.reserve_messages(filter, len(messages), updated_at)
+            if reserved is None:
+                return False
+            convo_id, start_index = reserved
+            return messages_dal.append_conversation_messages(convo_id, start_index, messages)
+
+        @staticmethod
+        def reserve_messages(
+            filter: Dict[str, Any], count: int, updated_at: Optional[datetime] = None
+        ) -> Optional[Tuple[Any, int]]:
+            """
+            Reserve `count` message indices ($inc message_count, plus
+            updated_at) on a conversation header
+
+            Returns (conversation _id, first reserved index), or None if no
+            conversation matches or Mongo is unreachable.
+            """
+            update: Dict[str, Any] = {"$inc": {"message_count": count}}
+            if updated_at is not None:
+                update["$set"] = {"updated_at": updated_at}
             try:
-                result = db_app.conversations.update_one(
-                    {"convo_id": convo_id}, {"$push": {"messages": message_data}}
+                header = db_app.conversations.find_one_and_update(
+                    filter, update, projection={"message_count": 1},
+                    return_document=ReturnDocument.BEFORE,
                 )
-                return result.modified_count > 0
             except PyMongoError as e:
-                print(f"Error adding message to conversation: {e}")
+                print(f"Error reserving conversation messages: {e}")
+                return None
+            if header is None:
+                return None
+            return header["_id"], header.get("message_count", 0)
+
+        @staticmethod
+        def insert_conversation_headers(headers: List[Dict[str, Any]]) -> bool:
+            """
+            Insert conversation headers that carry their own _id, in one
+            write; headers already stored are skipped, so this is safe to repeat
+            """
+            if not headers:
+                return True
+            try:
+                try:
+                    db_app.conversations.insert_many(headers, ordered=False)
+                except BulkWriteError as e:
+                    _ignore_duplicates(e)
+                return True
+            except PyMongoError as e:
+                print(f"Error inserting conversations: {e}")
+                return False
+
+        @staticmethod
+        def conversation_exists(filter: Dict[str, Any]) -> bool:
+            try:
+                return db_app.conversations.find_one(filter, {"_id": 1}) is not None
+            except PyMongoError as e:
+                print(f"Error finding conversation: {e}")
                 return False
 
         @staticmethod
         def delete_one_conversation(filter: Dict[str, Any]) -> bool:
             try:
-                result = db_app.conversations.delete_one(filter)
-                return result.deleted_count > 0
+                header = db_app.conversations.find_one_and_delete(filter, projection={"_id": 1})
             except PyMongoError as e:
                 print(f"Error deleting conversation: {e}")
                 return False
+            if header is None:
+                return False
+            messages_dal.delete_conversation_messages(header["_id"])
+            return True
+
+    # Message buckets: one document per (conversation, bucket seq)
+    try:
+        db_app.message_buckets.create_index([("convo_id", 1), ("seq", 1)], unique=True)
+    except PyMongoError as e:
+        print(f"Error creating message_buckets index: {e}")
+
+    # Rate limits: one token bucket per key, dropped once it would be full again
+    class rate_limits_dal:
+        @staticmethod
+        def take_token(
+            key: str, capacity: float, rate: float, cost: float = 1
+        ) -> Tuple[bool, float]:
+            """
+            Refill a token bucket and take `cost` tokens in one atomic update
+
+            Returns (allowed, tokens left). Fails open if Mongo is unreachable.
+            """
+            now = time.time()
+            elapsed = {"$max": [0, {"$subtract": [now, {"$ifNull": ["$updated", now]}]}]}
+            refilled = {"$min": [
+                capacity,
+                {"$add": [{"$ifNull": ["$tokens", capacity]}, {"$multiply": [elapsed, rate]}]},
+            ]}
+            try:
+                bucket = db_app.rate_limits.find_one_and_update(
+                    {"_id": key},
+                    [
+                        {"$set": {"tokens": refilled, "updated": now}},
+                        {"$set": {"allowed": {"$gte": ["$tokens", cost]}}},
+                        {"$set": {
+                            "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", cost]}, "$tokens"]},
+                            "expires_at": datetime.utcnow() + timedelta(seconds=capacity / rate),
+                        }},
+                    ],
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+                return bucket["allowed"], bucket["tokens"]
+            except PyMongoError as e:
+                print(f"Error taking rate limit token: {e}")
+                return True, capacity
+
+    try:
+        db_app.rate_limits.create_index("expires_at", expireAfterSeconds=0)
+    except PyMongoError as e:
+        print(f"Error creating rate_limits index: {e}")
+
+    # Idempotency keys: the first response for each client-supplied key
+    class idempotency_dal:
+        @staticmethod
+        def claim_key(key: str, fingerprint: str, lock_seconds: float) -> Optional[Dict[str, Any]]:
+            """
+            Claim an idempotency key for a request that is about to run
+
+            Returns None when the caller now owns the key (or Mongo is
+            unreachable), otherwise the existing record.
+            """
+            now = datetime.utcnow()
+            claim = {
+                "key": key,
+                "fingerprint": fingerprint,
+                "status": None,
+                "body": None,
+                "headers": {},
+                "created_at": now,
+                "expires_at": now + timedelta(seconds=lock_seconds),
+            }
+            try:
+                db_app.idempotency_keys.insert_one(dict(claim))
+                return None
+            except DuplicateKeyError:
+                pass
+            except PyMongoError as e:
+                print(f"Error claiming idempotency key: {e}")
+                return None
+
+            try:
+                # An expired record the TTL monitor has not removed yet is up for grabs
+                result = db_app.idempotency_keys.update_one(
+                    {"key": key, "expires_at": {"$lte": now}}, {"$set": claim}
+                )
+                if result.modified_count:
+                    return None
+                return db_app.idempotency_keys.find_one({"key": key}, {"_id": 0})
+            except PyMongoError as e:
+                print(f"Error finding idempotency key: {e}")
+                return None
+
+        @staticmethod
+        def save_response(
+            key: str, status: int, body: str, headers: Dict[str, str], ttl_seconds: float
+        ) -> bool:
+            try:
+                result = db_app.idempotency_keys.update_one(
+                    {"key": key},
+                    {"$set": {
+                        "status": status,
+                        "body": body,
+                        "headers": headers,
+                        "expires_at": datetime.utcnow() + timedelta(seconds=ttl_seconds),
+                    }},
+                )
+                return result.matched_count > 0
+            except PyMongoError as e:
+                print(f"Error saving idempotent response: {e}")
+                return False
+
+        @staticmethod
+        def release_key(key: str) -> bool:
+            """Drop a claim whose request produced no storable response"""
+            try:
+                result = db_app.idempotency_keys.delete_one({"key": key, "status": None})
+                return result.deleted_count > 0
+            except PyMongoError as e:
+                print(f"Error releasing idempotency key: {e}")
+                return False
+
+    try:
+        db_app.idempotency_keys.create_index("key", unique=True)
+        db_app.idempotency_keys.create_index("expires_at", expireAfterSeconds=0)
+    except PyMongoError as e:
+        print(f"Error creating idempotency_keys indexes: {e}")
+
+    # Conversation list: a user's conversations by recency
+    try:
+        db_app.conversations.create_index(
+            [("user_email", 1), ("updated_at", -1), ("_id", -1)]
+        )
+    except PyMongoError as e:
+        print(f"Error creating conversations index: {e}")
+
+    # Precomputed recommendations: one document per normalized query
+    try:
+        db_app.precomputed.create_index("query_key", unique=True)
+    except PyMongoError as e:
+        print(f"Error creating precomputed index: {e}")
+
+    class precomputed_dal:
+        @staticmethod
+        def upsert_one_precomputed(query_key: str, data: Dict[str, Any]) -> bool:
+            try:
+                result = db_app.precomputed.update_one(
+                    {"query_key": query_key}, {"$set": data}, upsert=True
+                )
+                return result.upserted_id is not None or result.matched_count > 0
+            except PyMongoError as e:
+                print(f"Error upserting precomputed recommendation: {e}")
+                return False
+
+        @staticmethod
+        def find_one_precomputed(query_key: str) -> Optional[Dict[str, Any]]:
+            try:
+                return db_app.precomputed.find_one({"query_key": query_key}, {"_id": 0})
+            except PyMongoError as e:
+                print(f"Error finding precomputed recommendation: {e}")
+                return None
+
+        @staticmethod
+        def delete_one_precomputed(query_key: str) -> bool:
+            try:
+                result = db_app.precomputed.delete_one({"query_key": query_key})
+                return result.deleted_count > 0
+            except PyMongoError as e:
+                print(f"Error deleting precomputed recommendation: {e}")
+                return False
@@ -8,6 +8,9 @@ from config import Config, config
 from routes.auth import auth_bp
 from routes.movies import movies_bp
 from routes.chat import chat_bp
+from ml_client import get_breaker_stats
+from DAL import rate_limits_dal
+from utils.rate_limit import MemoryBucketBackend, RateLimit, RateLimiter, StoreBucketBackend
 import logging
 import os
 
@@ -39,7 +42,7 @@ def create_app(config_name='development'):
         r"/api/*": {
             "origins": app.config['CORS_ORIGINS'],
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"]
+            "allow_headers": ["Content-Type", "Authorization", "Idempotency-Key"]
         }
     })
     
@@ -51,15 +54,35 @@ def create_app(config_name='development'):
     app.register_blueprint(chat_bp)
     
     logger.info("All routes registered successfully")
+
+    # Rate limiting
+    if app.config['RATE_LIMIT_ENABLED']:
+        if app.config['RATE_LIMIT_BACKEND'] == 'mongo':
+            backend = StoreBucketBackend(rate_limits_dal)
+        else:
+            backend = MemoryBucketBackend()
+        limiter = RateLimiter(
+            backend,
+            {name: RateLimit(*limit) for name, limit in app.config['RATE_LIMITS'].items()},
+            ip_factor=app.config['RATE_LIMIT_IP_FACTOR'],
+            trust_proxy=app.config['RATE_LIMIT_TRUST_PROXY'],
+            trusted_proxies=app.config['RATE_LIMIT_TRUSTED_PROXIES'],
+        )
+        limiter.init_app(app)
+        app.extensions['rate_limiter'] = limiter
+        logger.info(f"Rate limiting enabled ({app.config['RATE_LIMIT_BACKEND']} backend)")
     
     # Health check endpoint
     @app.route('/health', methods=['GET'])
     def health_check():
         """Health check endpoint"""
+        dependencies = get_breaker_stats()
+        degraded = any(dep['state'] != 'closed' for dep in dependencies.values())
         return jsonify({
-            'status': 'healthy',
+            'status': 'degraded' if degraded else 'healthy',
             'service': 'movie-backend-api',
-            'version': '1.0.0'
+            'version': '1.0.0',
+            'dependencies': dependencies
         }), 200
     
     # Root endpoint
@@ -85,8 +108,13 @@ def create_app(config_name='development'):
                 },
                 'chat': {
                     'message': 'POST /api/chat/message',
+                    'message_stream': 'POST /api/chat/message/stream',
+                    'job': 'GET /api/chat/jobs/<job_id>?user_email=<email>&wait=<seconds>',
                     'conversations': 'GET /api/chat/conversations?user_email=<email>',
-                    'conversation': 'GET /api/chat/conversation/<convo_id>?user_email=<email>'
+                    'conversation': 'GET /api/chat/conversation/<convo_id>?user_email=<email>',
+                    'cache_stats': 'GET /api/chat/cache/stats',
+                    'models': 'GET /api/chat/models',
+                    'metrics': 'GET /api/chat/metrics'
                 }
             }
         }), 200
@@ -25,6 +25,162 @@ class Config:
     
     # Weaviate
     WEAVIATE_URL = os.getenv('WEAVIATE_URL', 'http://weaviate:8080')
+    WEAVIATE_GRPC_PORT = int(os.getenv('WEAVIATE_GRPC_PORT', 50051))
+
+    # Override the Gemini API endpoint, e.g. to point at loadtest/fake_gemini.py
+    GEMINI_BASE_URL = os.getenv('GEMINI_BASE_URL', '')
+
+    # Upstream timeouts and circuit breakers
+    GEMINI_TIMEOUT_SECONDS = float(os.getenv('GEMINI_TIMEOUT_SECONDS', 30))
+    WEAVIATE_INIT_TIMEOUT_SECONDS = int(os.getenv('WEAVIATE_INIT_TIMEOUT_SECONDS', 2))
+    WEAVIATE_QUERY_TIMEOUT_SECONDS = int(os.getenv('WEAVIATE_QUERY_TIMEOUT_SECONDS', 5))
+    WEAVIATE_INSERT_TIMEOUT_SECONDS = int(os.getenv('WEAVIATE_INSERT_TIMEOUT_SECONDS', 30))
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', 5))
+    BREAKER_RESET_SECONDS = float(os.getenv('BREAKER_RESET_SECONDS', 30))
+
+    # Gemini model registry (tier -> model name) and routing thresholds.
+    # Queries at or above either threshold go to the complex tier.
+    GEMINI_MODELS = {
+        'flash': os.getenv('GEMINI_FLASH_MODEL', 'gemini-2.5-flash'),
+        'pro': os.getenv('GEMINI_PRO_MODEL', 'gemini-3-pro-preview'),
+    }
+    GEMINI_DEFAULT_TIER = os.getenv('GEMINI_DEFAULT_TIER', 'flash')
+    GEMINI_COMPLEX_TIER = os.getenv('GEMINI_COMPLEX_TIER', 'pro')
+    MODEL_ROUTER_COMPLEX_MIN_WORDS = int(os.getenv('MODEL_ROUTER_COMPLEX_MIN_WORDS', 25))
+    MODEL_ROUTER_COMPLEX_MIN_CONSTRAINTS = int(os.getenv('MODEL_ROUTER_COMPLEX_MIN_CONSTRAINTS', 3))
+
+    # Conversation memory: the last HISTORY_MAX_MESSAGES messages are kept
+    # verbatim, older ones are folded into a rolling summary every
+    # MEMORY_SUMMARY_INTERVAL messages, all within MEMORY_TOKEN_BUDGET
+    HISTORY_MAX_MESSAGES = int(os.getenv('HISTORY_MAX_MESSAGES', 10))
+    MEMORY_TOKEN_BUDGET = int(os.getenv('MEMORY_TOKEN_BUDGET', 800))
+    MEMORY_SUMMARY_INTERVAL = int(os.getenv('MEMORY_SUMMARY_INTERVAL', 10))
+    MEMORY_SUMMARY_MODEL = os.getenv('MEMORY_SUMMARY_MODEL', GEMINI_MODELS['flash'])
+
+    # Message pages returned by GET /api/chat/conversation/<convo_id>
+    CONVERSATION_PAGE_SIZE = int(os.getenv('CONVERSATION_PAGE_SIZE', 50))
+    CONVERSATION_MAX_PAGE_SIZE = int(os.getenv('CONVERSATION_MAX_PAGE_SIZE', 200))
+    # Conversations returned per page by GET /api/chat/conversations
+    CONVERSATION_LIST_PAGE_SIZE = int(os.getenv('CONVERSATION_LIST_PAGE_SIZE', 50))
+
+    # Gemini admission control: at most LLM_MAX_CONCURRENCY calls in flight,
+    # LLM_MAX_QUEUE more may wait up to LLM_QUEUE_TIMEOUT_SECONDS, the rest
+    # get 503 + Retry-After (0 concurrency = unlimited)
+    LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', 8))
+    LLM_MAX_QUEUE = int(os.getenv('LLM_MAX_QUEUE', 32))
+    LLM_QUEUE_TIMEOUT_SECONDS = float(os.getenv('LLM_QUEUE_TIMEOUT_SECONDS', 10))
+    LLM_RETRY_AFTER_SECONDS = int(os.getenv('LLM_RETRY_AFTER_SECONDS', 5))
+
+    # Per-user token buckets on write requests (POST/PUT/PATCH/DELETE), per
+    # blueprint: sustained requests per minute and burst size. Each client IP
+    # gets RATE_LIMIT_IP_FACTOR times the user limits. Backend 'memory' is
+    # per process; 'mongo' shares buckets across workers
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', '1') == '1'
+    RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'memory')
+    RATE_LIMITS = {
+        'chat': (float(os.getenv('RATE_LIMIT_CHAT_PER_MINUTE', 20)),
+                 int(os.getenv('RATE_LIMIT_CHAT_BURST', 5))),
+        'movies': (float(os.getenv('RATE_LIMIT_MOVIES_PER_MINUTE', 60)),
+                   int(os.getenv('RATE_LIMIT_MOVIES_BURST', 20))),
+        'auth': (float(os.getenv('RATE_LIMIT_AUTH_PER_MINUTE', 10)),
+                 int(os.getenv('RATE_LIMIT_AUTH_BURST', 5))),
+    }
+    RATE_LIMIT_IP_FACTOR = float(os.getenv('RATE_LIMIT_IP_FACTOR', 4))
+    # Take the client IP from X-Forwarded-For (only behind a trusted proxy)
+    RATE_LIMIT_TRUST_PROXY = os.getenv('RATE_LIMIT_TRUST_PROXY', '0') == '1'
+    # Addresses or CIDR networks of our own proxies (the frontend server);
+    # their requests are limited by the client IP they forward, never as
+    # one shared IP
+    RATE_LIMIT_TRUSTED_PROXIES = [
+        ip.strip() for ip in os.getenv('RATE_LIMIT_TRUSTED_PROXIES', '').split(',') if ip.strip()
+    ]
+
+    # Idempotency-Key support on POST /api/chat/message, its /stream variant
+    # and /api/movies/add: responses are replayed for IDEMPOTENCY_TTL_SECONDS;
+    # a claim whose request never finished is released after
+    # IDEMPOTENCY_LOCK_SECONDS
+    IDEMPOTENCY_TTL_SECONDS = int(os.getenv('IDEMPOTENCY_TTL_SECONDS', 86400))
+    IDEMPOTENCY_LOCK_SECONDS = int(os.getenv('IDEMPOTENCY_LOCK_SECONDS', 120))
+
+    # Write-behind chat persistence: replies return before their messages
+    # are saved; a background writer batches queued exchanges (up to
+    # BATCH_SIZE, waiting at most INTERVAL_SECONDS for more), retries failed
+    # writes and flushes the backlog on shutdown. Reads of a conversation wait
+    # up to WAIT_SECONDS for its queued writes. A full backlog saves directly
+    CHAT_WRITE_BEHIND_ENABLED = os.getenv('CHAT_WRITE_BEHIND_ENABLED', '0') == '1'
+    CHAT_WRITE_BEHIND_BATCH_SIZE = int(os.getenv('CHAT_WRITE_BEHIND_BATCH_SIZE', 100))
+    CHAT_WRITE_BEHIND_INTERVAL_SECONDS = float(os.getenv('CHAT_WRITE_BEHIND_INTERVAL_SECONDS', 0.05))
+    CHAT_WRITE_BEHIND_MAX_RETRIES = int(os.getenv('CHAT_WRITE_BEHIND_MAX_RETRIES', 5))
+    CHAT_WRITE_BEHIND_MAX_BACKLOG = int(os.getenv('CHAT_WRITE_BEHIND_MAX_BACKLOG', 10000))
+    CHAT_WRITE_BEHIND_WAIT_SECONDS = float(os.getenv('CHAT_WRITE_BEHIND_WAIT_SECONDS', 2))
+    CHAT_WRITE_BEHIND_SHUTDOWN_SECONDS = float(os.getenv('CHAT_WRITE_BEHIND_SHUTDOWN_SECONDS', 10))
+
+    # Async chat jobs (POST /api/chat/message with "async": true)
+    CHAT_JOB_WORKERS = int(os.getenv('CHAT_JOB_WORKERS', 4))
+    CHAT_JOB_QUEUE_SIZE = int(os.getenv('CHAT_JOB_QUEUE_SIZE', 64))
+    CHAT_JOB_TTL_SECONDS = int(os.getenv('CHAT_JOB_TTL_SECONDS', 600))
+    CHAT_JOB_MAX_WAIT_SECONDS = float(os.getenv('CHAT_JOB_MAX_WAIT_SECONDS', 25))
+
+    # Retrieval fan-out (vector search + history run concurrently)
+    RETRIEVAL_POOL_WORKERS = int(os.getenv('RETRIEVAL_POOL_WORKERS', 16))
+    VECTOR_STAGE_TIMEOUT_SECONDS = float(os.getenv('VECTOR_STAGE_TIMEOUT_SECONDS', 2.0))
+    HISTORY_STAGE_TIMEOUT_SECONDS = float(os.getenv('HISTORY_STAGE_TIMEOUT_SECONDS', 1.0))
+
+    # Optional in-process vector index mirroring the Weaviate Movies
+    # collection (build with scripts/build_vector_index.py)
+    VECTOR_INDEX_ENABLED = os.getenv('VECTOR_INDEX_ENABLED', '0') == '1'
+    VECTOR_INDEX_PATH = os.getenv('VECTOR_INDEX_PATH', 'data/movies_index')
+    VECTOR_INDEX_QUANTIZE = os.getenv('VECTOR_INDEX_QUANTIZE', '0') == '1'
+    VECTOR_INDEX_REFRESH_SECONDS = int(os.getenv('VECTOR_INDEX_REFRESH_SECONDS', 300))
+
+    # Weaviate retrieval: 'hybrid' (BM25 + vector) or 'near_text'.
+    # HYBRID_ALPHA weights the vector side (1.0 = pure vector, 0.0 = pure BM25)
+    RETRIEVAL_MODE = os.getenv('RETRIEVAL_MODE', 'hybrid')
+    HYBRID_ALPHA = float(os.getenv('HYBRID_ALPHA', 0.6))
+
+    # Exact-title fast path: queries naming a catalog title use near_object
+    TITLE_INDEX_ENABLED = os.getenv('TITLE_INDEX_ENABLED', '1') == '1'
+    TITLE_MIN_CHARS = int(os.getenv('TITLE_MIN_CHARS', 4))
+
+    # Max description characters per retrieved movie in the prompt context
+    CONTEXT_MAX_CHARS_PER_HIT = int(os.getenv('CONTEXT_MAX_CHARS_PER_HIT', 300))
+
+    # Ask Gemini for JSON matching a response schema instead of free text.
+    # MAX_OUTPUT_TOKENS caps every generation; on 2.5 models thinking tokens
+    # count against it, so keep headroom above the ~100 tokens of an answer.
+    # GEMINI_THINKING_BUDGET (unset = model default) limits thinking tokens;
+    # 0 turns thinking off on Flash. An answer cut off at the cap counts as
+    # a failed generation
+    STRUCTURED_OUTPUT_ENABLED = os.getenv('STRUCTURED_OUTPUT_ENABLED', '1') == '1'
+    MAX_OUTPUT_TOKENS = int(os.getenv('MAX_OUTPUT_TOKENS', 4096))
+    GEMINI_THINKING_BUDGET = (
+        int(os.getenv('GEMINI_THINKING_BUDGET')) if os.getenv('GEMINI_THINKING_BUDGET') else None
+    )
+
+    # Gemini context caching for the static recommendation instructions.
+    # Handles are recreated REFRESH_MARGIN seconds before they expire; a
+    # model that rejects the cache is retried after RETRY_SECONDS
+    PROMPT_CACHE_ENABLED = os.getenv('PROMPT_CACHE_ENABLED', '0') == '1'
+    PROMPT_CACHE_TTL_SECONDS = int(os.getenv('PROMPT_CACHE_TTL_SECONDS', 3600))
+    PROMPT_CACHE_REFRESH_MARGIN_SECONDS = int(os.getenv('PROMPT_CACHE_REFRESH_MARGIN_SECONDS', 60))
+    PROMPT_CACHE_RETRY_SECONDS = int(os.getenv('PROMPT_CACHE_RETRY_SECONDS', 600))
+
+    # Offline-precomputed answers for popular opening queries
+    # (scripts/precompute_recommendations.py); older answers are ignored
+    PRECOMPUTED_ENABLED = os.getenv('PRECOMPUTED_ENABLED', '1') == '1'
+    PRECOMPUTED_MAX_AGE_HOURS = int(os.getenv('PRECOMPUTED_MAX_AGE_HOURS', 168))
+    PRECOMPUTE_TOP_N = int(os.getenv('PRECOMPUTE_TOP_N', 300))
+    PRECOMPUTE_MIN_COUNT = int(os.getenv('PRECOMPUTE_MIN_COUNT', 3))
+    PRECOMPUTE_WORKERS = int(os.getenv('PRECOMPUTE_WORKERS', 4))
+    PRECOMPUTE_RATE_PER_SECOND = float(os.getenv('PRECOMPUTE_RATE_PER_SECOND', 1.0))
+
+    # Recommendation cache
+    REC_CACHE_ENABLED = os.getenv('REC_CACHE_ENABLED', '1') == '1'
+    REC_CACHE_MAX_ENTRIES = int(os.getenv('REC_CACHE_MAX_ENTRIES', 1024))
+    REC_CACHE_TTL_SECONDS = int(os.getenv('REC_CACHE_TTL_SECONDS', 3600))
+    # 0 disables embedding-similarity matching (exact normalized match only)
+    REC_CACHE_SIMILARITY_THRESHOLD = float(os.getenv('REC_CACHE_SIMILARITY_THRESHOLD', 0))
+    REC_CACHE_EMBED_MODEL = os.getenv('REC_CACHE_EMBED_MODEL', 'gemini-embedding-001')
 
 
 class DevelopmentConfig(Config):
@@ -3,4 +3,8 @@ set -e
 
 python scripts/seed_db.py || echo "Seed script failed, continuing..."
 
+if [ "${VECTOR_INDEX_ENABLED:-0}" = "1" ]; then
+    python scripts/build_vector_index.py || echo "Vector index export failed, continuing..."
+fi
+
 exec python app.py
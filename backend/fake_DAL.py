@@ -1,8 +1,12 @@
 """
 Fake DAL for testing purposes - uses in-memory data structures
 """
-from typing import Any, Dict, List, Optional
-from datetime import datetime
+import itertools
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+
+from backend.utils.message_buckets import bucket_spans, page_window
 
 
 # In-memory database simulation
@@ -12,11 +16,17 @@ class FakeDB:
         self.movies = []
         self.messages = []
         self.conversations = []
+        self.message_buckets = []
+        self.precomputed = []
+        self.rate_limits = {}
+        self.idempotency_keys = {}
 
 
 # Global fake database instances
 db_app = FakeDB()
 db_vector = FakeDB()
+# Never reuse a conversation id, so a new conversation can't inherit buckets
+_convo_ids = itertools.count()
 
 
 # Users: one document per user
@@ -147,34 +157,187 @@ class messages_dal:
                 return True
         return False
 
+    @staticmethod
+    def append_conversation_messages(
+        convo_id: Any, start_index: int, messages: List[Dict[str, Any]]
+    ) -> bool:
+        for seq, lo, hi in bucket_spans(start_index, start_index + len(messages)):
+            bucket = _find_bucket(convo_id, seq)
+            if bucket is None:
+                bucket = {"convo_id": convo_id, "seq": seq, "messages": [], "count": 0}
+                db_app.message_buckets.append(bucket)
+            if any(m["n"] == lo for m in bucket["messages"]):
+                # Already stored by an earlier attempt
+                continue
+            batch = [
+                {**message, "n": n}
+                for n, message in zip(range(lo, hi), messages[lo - start_index:])
+            ]
+            bucket["messages"] = sorted(bucket["messages"] + batch, key=lambda m: m["n"])
+            bucket["count"] += len(batch)
+        return True
+
+    @staticmethod
+    def append_many_conversation_messages(
+        appends: List[Tuple[Any, int, List[Dict[str, Any]]]]
+    ) -> bool:
+        for convo_id, start_index, messages in appends:
+            messages_dal.append_conversation_messages(convo_id, start_index, messages)
+        return True
+
+    @staticmethod
+    def find_conversation_messages(
+        convo_id: Any, start: int, end: int
+    ) -> List[Dict[str, Any]]:
+        buckets = sorted(
+            (b for b in db_app.message_buckets if b["convo_id"] == convo_id),
+            key=lambda b: b["seq"],
+        )
+        return [
+            _strip_index(message)
+            for bucket in buckets
+            for message in bucket["messages"]
+            if start <= message["n"] < end
+        ]
+
+    @staticmethod
+    def find_first_messages(convo_ids: List[Any]) -> Dict[Any, Dict[str, Any]]:
+        first = {}
+        for convo_id in convo_ids:
+            bucket = _find_bucket(convo_id, 0)
+            if bucket and bucket["messages"]:
+                first[convo_id] = _strip_index(bucket["messages"][0])
+        return first
+
+    @staticmethod
+    def delete_conversation_messages(convo_id: Any) -> bool:
+        db_app.message_buckets[:] = [
+            b for b in db_app.message_buckets if b["convo_id"] != convo_id
+        ]
+        return True
+
 
-# Conversations: one document per conversation
+def _find_bucket(convo_id: Any, seq: int) -> Optional[Dict[str, Any]]:
+    for bucket in db_app.message_buckets:
+        if bucket["convo_id"] == convo_id and bucket["seq"] == seq:
+            return bucket
+    return None
+
+
+def _strip_index(message: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in message.items() if k != "n"}
+
+
+# Conversations: a header document per conversation; messages live in
+# fixed-size buckets behind messages_dal
 class conversations_dal:
     @staticmethod
     def insert_one_conversation(conversation_data: Dict[str, Any]) -> str:
-        conversation_data["_id"] = f"convo_{len(db_app.conversations)}"
-        if "messages" not in conversation_data:
-            conversation_data["messages"] = []
-        db_app.conversations.append(conversation_data.copy())
+        conversation_data["_id"] = f"convo_{next(_convo_ids)}"
+        messages = conversation_data.setdefault("messages", [])
+        header = {k: v for k, v in conversation_data.items() if k != "messages"}
+        header["message_count"] = len(messages)
+        db_app.conversations.append(header)
+        if messages:
+            messages_dal.append_conversation_messages(header["_id"], 0, messages)
         return conversation_data["_id"]
 
     @staticmethod
-    def find_one_conversation(filter: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        for conversation in db_app.conversations:
-            if all(conversation.get(k) == v for k, v in filter.items()):
-                return conversation.copy()
-        return None
+    def find_one_conversation(
+        filter: Dict[str, Any],
+        limit: Optional[int] = None,
+        before: Optional[int] = None,
+        after: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        header = _find_header(filter)
+        if header is None:
+            return None
+        convo = header.copy()
+        start, end = page_window(convo["message_count"], limit, before, after)
+        convo["messages"] = messages_dal.find_conversation_messages(convo["_id"], start, end)
+        if limit is not None:
+            convo["message_offset"] = start
+        return convo
+
+    @staticmethod
+    def find_conversation_memory(
+        filter: Dict[str, Any], keep_last: int, max_messages: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        header = _find_header(filter)
+        if header is None:
+            return None
+        count = header["message_count"]
+        start = min(header.get("summarized_count", 0), max(0, count - keep_last))
+        if max_messages is not None:
+            start = max(start, count - max_messages)
+        memory = {
+            "message_count": count,
+            "messages": messages_dal.find_conversation_messages(header["_id"], start, count),
+        }
+        for field in ("summary", "summarized_count"):
+            if field in header:
+                memory[field] = header[field]
+        return memory
+
+    @staticmethod
+    def find_message_range(
+        filter: Dict[str, Any], skip: int, limit: int
+    ) -> List[Dict[str, Any]]:
+        header = _find_header(filter)
+        if header is None:
+            return []
+        end = min(skip + limit, header["message_count"])
+        return messages_dal.find_conversation_messages(header["_id"], skip, end)
+
+    @staticmethod
+    def find_opening_messages(limit: int = 0) -> List[Dict[str, Any]]:
+        headers = [c for c in reversed(db_app.conversations) if c["message_count"]]
+        if limit:
+            headers = headers[:limit]
+        ids = [header["_id"] for header in headers]
+        first = messages_dal.find_first_messages(ids)
+        return [first[convo_id] for convo_id in ids if convo_id in first]
 
     @staticmethod
     def find_all_conversations() -> List[Dict[str, Any]]:
-        return [conversation.copy() for conversation in db_app.conversations]
+        return [
+            {
+                **header,
+                "messages": messages_dal.find_conversation_messages(
+                    header["_id"], 0, header["message_count"]
+                ),
+            }
+            for header in db_app.conversations
+        ]
 
     @staticmethod
-    def find_conversations_by_user(user_email: str) -> List[Dict[str, Any]]:
+    def find_conversations_by_user(
+        user_email: str,
+        projection: Optional[Dict[str, Any]] = None,
+        limit: int = 0,
+        before: Optional[Tuple[Optional[datetime], Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        # Newest first; undated conversations last, later inserts first on ties
+        ordered = sorted(
+            (
+                (i, c) for i, c in enumerate(db_app.conversations)
+                if c.get("user_email") == user_email
+            ),
+            key=lambda item: (item[1].get("updated_at") is not None,
+                              item[1].get("updated_at") or datetime.min, item[0]),
+            reverse=True,
+        )
+        conversations = [c for _, c in ordered]
+        if before is not None:
+            ids = [c.get("_id") for c in conversations]
+            start = ids.index(before[1]) + 1 if before[1] in ids else len(ids)
+            conversations = conversations[start:]
+        if limit:
+            conversations = conversations[:limit]
+        excluded = {k for k, v in (projection or {}).items() if not v}
         return [
-            conversation.copy()
-            for conversation in db_app.conversations
-            if conversation.get("user_email") == user_email
+            {k: v for k, v in conversation.items() if k not in excluded}
+            for conversation in conversations
         ]
 
     @staticmethod
@@ -188,21 +351,139 @@ class conversations_dal:
         return False
 
     @staticmethod
-    def add_message_to_conversation(
-        convo_id: int, message_data: Dict[str, Any]
+    def append_messages(
+        filter: Dict[str, Any],
+        messages: List[Dict[str, Any]],
+        updated_at: Optional[datetime] = None,
     ) -> bool:
-        for conversation in db_app.conversations:
-            if conversation.get("convo_id") == convo_id:
-                if "messages" not in conversation:
-                    conversation["messages"] = []
-                conversation["messages"].append(message_data.copy())
-                return True
-        return False
+        reserved = conversations_dal.reserve_messages(filter, len(messages), updated_at)
+        if reserved is None:
+            return False
+        convo_id, start = reserved
+        return messages_dal.append_conversation_messages(convo_id, start, messages)
+
+    @staticmethod
+    def reserve_messages(
+        filter: Dict[str, Any], count: int, updated_at: Optional[datetime] = None
+    ) -> Optional[Tuple[Any, int]]:
+        header = _find_header(filter)
+        if header is None:
+            return None
+        start = header["message_count"]
+        header["message_count"] += count
+        if updated_at is not None:
+            header["updated_at"] = updated_at
+        return header["_id"], start
+
+    @staticmethod
+    def insert_conversation_headers(headers: List[Dict[str, Any]]) -> bool:
+        for header in headers:
+            if _find_header({"_id": header["_id"]}) is None:
+                db_app.conversations.append(header.copy())
+        return True
+
+    @staticmethod
+    def conversation_exists(filter: Dict[str, Any]) -> bool:
+        return _find_header(filter) is not None
 
     @staticmethod
     def delete_one_conversation(filter: Dict[str, Any]) -> bool:
         for i, conversation in enumerate(db_app.conversations):
             if all(conversation.get(k) == v for k, v in filter.items()):
                 db_app.conversations.pop(i)
+                messages_dal.delete_conversation_messages(conversation["_id"])
                 return True
         return False
+
+
+def _find_header(filter: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    for conversation in db_app.conversations:
+        if all(conversation.get(k) == v for k, v in filter.items()):
+            return conversation
+    return None
+
+
+# Precomputed recommendations: one document per normalized query
+class precomputed_dal:
+    @staticmethod
+    def upsert_one_precomputed(query_key: str, data: Dict[str, Any]) -> bool:
+        for doc in db_app.precomputed:
+            if doc.get("query_key") == query_key:
+                doc.update(data)
+                return True
+        db_app.precomputed.append({**data, "query_key": query_key})
+        return True
+
+    @staticmethod
+    def find_one_precomputed(query_key: str) -> Optional[Dict[str, Any]]:
+        for doc in db_app.precomputed:
+            if doc.get("query_key") == query_key:
+                return doc.copy()
+        return None
+
+    @staticmethod
+    def delete_one_precomputed(query_key: str) -> bool:
+        for i, doc in enumerate(db_app.precomputed):
+            if doc.get("query_key") == query_key:
+                db_app.precomputed.pop(i)
+                return True
+        return False
+
+
+# Rate limits: one token bucket per key
+class rate_limits_dal:
+    @staticmethod
+    def take_token(
+        key: str, capacity: float, rate: float, cost: float = 1
+    ) -> Tuple[bool, float]:
+        now = time.time()
+        tokens, updated = db_app.rate_limits.get(key, (capacity, now))
+        tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        db_app.rate_limits[key] = (tokens, now)
+        return allowed, tokens
+
+
+# Idempotency keys: the first response for each client-supplied key
+class idempotency_dal:
+    @staticmethod
+    def claim_key(key: str, fingerprint: str, lock_seconds: float) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        existing = db_app.idempotency_keys.get(key)
+        if existing is not None and existing["expires_at"] > now:
+            return existing.copy()
+        db_app.idempotency_keys[key] = {
+            "key": key,
+            "fingerprint": fingerprint,
+            "status": None,
+            "body": None,
+            "headers": {},
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=lock_seconds),
+        }
+        return None
+
+    @staticmethod
+    def save_response(
+        key: str, status: int, body: str, headers: Dict[str, str], ttl_seconds: float
+    ) -> bool:
+        record = db_app.idempotency_keys.get(key)
+        if record is None:
+            return False
+        record.update(
+            status=status,
+            body=body,
+            headers=headers,
+            expires_at=datetime.utcnow() + timedelta(seconds=ttl_seconds),
+        )
+        return True
+
+    @staticmethod
+    def release_key(key: str) -> bool:
+        record = db_app.idempotency_keys.get(key)
+        if record is None or record["status"] is not None:
+            return False
+        del db_app.idempotency_keys[key]
+        return True
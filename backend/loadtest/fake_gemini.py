@@ -0,0 +1,189 @@
+"""
+Stand-in for the Gemini REST API, for load testing without network
+
+Implements the endpoints ml_client uses: generateContent,
+streamGenerateContent (SSE) and cachedContents. Latency is drawn from a
+configurable distribution (time to first token), then output is produced
+at --tokens-per-second. Point the backend at it with
+GEMINI_BASE_URL=http://localhost:8090 and any GEMINI_API_KEY.
+
+    python -m loadtest.fake_gemini --port 8090 --latency-ms 600 \
+        --latency-stddev-ms 300 --tokens-per-second 80 --error-rate 0.01
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from flask import Flask, Response, jsonify, request
+
+from loadtest.latency import LatencyModel
+
+SAMPLE_MOVIES = [
+    ("Inception", 148, "A thief who steals secrets through dream-sharing is given one last job."),
+    ("Alien", 117, "The crew of a commercial spaceship encounters a deadly lifeform."),
+    ("Heat", 170, "A group of professional bank robbers is pursued by a driven detective."),
+    ("Paddington 2", 103, "Paddington takes odd jobs to buy a gift and is framed for theft."),
+    ("The Thing", 109, "Researchers in Antarctica are hunted by a shape-shifting alien."),
+]
+
+
+def estimate_tokens(text):
+    return max(1, len(text or "") // 4)
+
+
+def _request_text(body):
+    parts = []
+    for content in body.get("contents", []):
+        parts.extend(part.get("text", "") for part in content.get("parts", []))
+    return "".join(parts)
+
+
+def _instruction_text(body):
+    instruction = body.get("systemInstruction") or {}
+    return "".join(part.get("text", "") for part in instruction.get("parts", []))
+
+
+def _error(status, message):
+    names = {429: "RESOURCE_EXHAUSTED", 500: "INTERNAL", 503: "UNAVAILABLE"}
+    return jsonify({"error": {"code": status, "message": message, "status": names.get(status, "UNKNOWN")}}), status
+
+
+def create_fake_gemini(latency=None, tokens_per_second=0.0, output_tokens=60, seed=None):
+    """
+    Build the stand-in app
+
+    Args:
+        latency (LatencyModel): time to first token and error rate
+        tokens_per_second (float): output throughput; 0 returns instantly
+        output_tokens (int): tokens per answer, capped by maxOutputTokens
+    """
+    app = Flask(__name__)
+    latency = latency or LatencyModel()
+    rng = random.Random(seed)
+    lock = threading.Lock()
+    caches = {}
+    counters = {"requests": 0, "errors": 0, "streams": 0, "cache_creates": 0}
+
+    def count(name):
+        with lock:
+            counters[name] += 1
+
+    def answer(body):
+        config = body.get("generationConfig") or {}
+        title, runtime, description = rng.choice(SAMPLE_MOVIES)
+        if config.get("responseMimeType") == "application/json":
+            text = json.dumps({"title": title, "runtime_minutes": runtime, "description": description})
+        else:
+            text = f"Movie Name: {title}\nRuntime: {runtime} minutes\nDescription: {description}"
+        tokens = min(output_tokens, config.get("maxOutputTokens") or output_tokens)
+        return text, tokens
+
+    def usage(body, tokens):
+        prompt_tokens = estimate_tokens(_request_text(body) + _instruction_text(body))
+        cached_tokens = 0
+        cache = caches.get(body.get("cachedContent"))
+        if cache:
+            cached_tokens = cache["tokens"]
+            prompt_tokens += cached_tokens
+        metadata = {
+            "promptTokenCount": prompt_tokens,
+            "candidatesTokenCount": tokens,
+            "totalTokenCount": prompt_tokens + tokens,
+        }
+        if cached_tokens:
+            metadata["cachedContentTokenCount"] = cached_tokens
+        return metadata
+
+    def candidate(text, finished):
+        result = {"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}
+        if finished:
+            result["finishReason"] = "STOP"
+        return result
+
+    def generation_seconds(tokens):
+        return tokens / tokens_per_second if tokens_per_second > 0 else 0.0
+
+    @app.route("/<version>/models/<path:target>", methods=["POST"])
+    def models(version, target):
+        model, _, action = target.partition(":")
+        body = request.get_json(silent=True) or {}
+        count("requests")
+        latency.sleep()
+        if latency.should_fail():
+            count("errors")
+            return _error(503, "The model is overloaded. Please try again later.")
+
+        text, tokens = answer(body)
+        if action == "generateContent":
+            time.sleep(generation_seconds(tokens))
+            return jsonify({
+                "candidates": [candidate(text, True)],
+                "usageMetadata": usage(body, tokens),
+                "modelVersion": model,
+            })
+
+        if action == "streamGenerateContent":
+            count("streams")
+
+            def events():
+                pieces = max(1, min(8, tokens // 8))
+                size = -(-len(text) // pieces)
+                for i in range(pieces):
+                    time.sleep(generation_seconds(tokens) / pieces)
+                    last = i == pieces - 1
+                    chunk = {"candidates": [candidate(text[i * size:(i + 1) * size], last)],
+                             "modelVersion": model}
+                    if last:
+                        chunk["usageMetadata"] = usage(body, tokens)
+                    yield f"data: {json.dumps(chunk)}\r\n\r\n"
+
+            return Response(events(), mimetype="text/event-stream")
+
+        return _error(404, f"Unknown action {action!r}")
+
+    @app.route("/<version>/cachedContents", methods=["POST"])
+    def create_cache(version):
+        body = request.get_json(silent=True) or {}
+        count("cache_creates")
+        ttl = float(str(body.get("ttl") or "3600s").rstrip("s"))
+        name = f"cachedContents/{uuid.uuid4().hex[:12]}"
+        caches[name] = {"tokens": estimate_tokens(_instruction_text(body))}
+        expire = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+        return jsonify({
+            "name": name,
+            "model": body.get("model"),
+            "displayName": body.get("displayName"),
+            "expireTime": expire.isoformat().replace("+00:00", "Z"),
+            "usageMetadata": {"totalTokenCount": caches[name]["tokens"]},
+        })
+
+    @app.route("/stats", methods=["GET"])
+    def stats():
+        with lock:
+            return jsonify(dict(counters))
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Gemini API for load testing")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--tokens-per-second", type=float, default=80.0,
+                        help="simulated output throughput (0 = instant)")
+    parser.add_argument("--output-tokens", type=int, default=60)
+    LatencyModel.add_arguments(parser)
+    args = parser.parse_args()
+
+    app = create_fake_gemini(
+        LatencyModel.from_args(args), args.tokens_per_second, args.output_tokens, args.seed
+    )
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Stand-in for Weaviate, for load testing without network
+
+The v4 Python client checks readiness over REST and runs queries over
+gRPC, so this serves both: the REST endpoints the client touches on
+connect (plus the contextionary concepts endpoint used by the local vector
+index), and a gRPC Search service that answers near_text, hybrid,
+near_object and iterator queries from a synthetic catalog. Point the
+backend at it with WEAVIATE_URL=http://localhost:8081 and
+WEAVIATE_GRPC_PORT=50052.
+
+    python -m loadtest.fake_weaviate --port 8081 --grpc-port 50052 \
+        --latency-ms 15 --latency-stddev-ms 10 --error-rate 0.005
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import uuid
+from concurrent import futures
+
+import grpc
+from flask import Flask, jsonify
+from weaviate.proto.v1 import (
+    health_weaviate_pb2,
+    properties_pb2,
+    search_get_pb2,
+    weaviate_pb2_grpc,
+)
+
+from loadtest.latency import LatencyModel
+
+WEAVIATE_VERSION = "1.34.4"
+VECTOR_DIMENSIONS = 300
+
+
+def synthetic_catalog(size=1000, seed=0):
+    """Movies with stable uuids, titles and descriptions"""
+    rng = random.Random(seed)
+    genres = ["horror", "comedy", "thriller", "drama", "sci-fi", "romance", "western", "heist"]
+    catalog = []
+    for i in range(size):
+        genre = rng.choice(genres)
+        catalog.append({
+            "uuid": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "title": f"Synthetic {genre.title()} {i:04d}",
+            "description": f"A {genre} film about case number {i}, used for load testing.",
+        })
+    return catalog
+
+
+def load_catalog(path):
+    """JSON list of {"title", "description"} objects, e.g. exported from Movies"""
+    with open(path, "r", encoding="utf-8") as f:
+        movies = json.load(f)
+    return [
+        {
+            "uuid": movie.get("uuid") or str(uuid.uuid5(uuid.NAMESPACE_URL, movie["title"])),
+            "title": movie["title"],
+            "description": movie.get("description", ""),
+        }
+        for movie in movies
+    ]
+
+
+class FakeSearchService(weaviate_pb2_grpc.WeaviateServicer):
+    """gRPC Search over a fixed catalog; results are a stable function of the request"""
+
+    def __init__(self, catalog, latency):
+        self.catalog = catalog
+        self.positions = {movie["uuid"]: i for i, movie in enumerate(catalog)}
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.counters = {"searches": 0, "errors": 0}
+
+    def _count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def _result(self, movie, distance):
+        fields = {
+            "title": properties_pb2.Value(text_value=movie["title"]),
+            "description": properties_pb2.Value(text_value=movie["description"]),
+        }
+        return search_get_pb2.SearchResult(
+            properties=search_get_pb2.PropertiesResult(
+                non_ref_props=properties_pb2.Properties(fields=fields),
+                target_collection="Movies",
+            ),
+            metadata=search_get_pb2.MetadataResult(
+                id=movie["uuid"],
+                id_as_bytes=uuid.UUID(movie["uuid"]).bytes,
+                distance=distance,
+                distance_present=True,
+            ),
+        )
+
+    def Search(self, request, context):
+        self._count("searches")
+        self.latency.sleep()
+        if self.latency.should_fail():
+            self._count("errors")
+            context.abort(grpc.StatusCode.UNAVAILABLE, "fake weaviate: simulated failure")
+
+        limit = request.limit or 10
+        if request.after or not (request.HasField("near_text") or request.HasField("hybrid_search")
+                                  or request.HasField("near_object")):
+            # Iterator / fetch_objects: page through the catalog in order
+            start = self.positions.get(request.after, -1) + 1 if request.after else request.offset
+            page = self.catalog[start:start + limit]
+        else:
+            digest = hashlib.sha256(request.SerializeToString()).digest()
+            start = int.from_bytes(digest[:8], "big") % max(1, len(self.catalog))
+            page = [self.catalog[(start + i) % len(self.catalog)] for i in range(min(limit, len(self.catalog)))]
+
+        return search_get_pb2.SearchReply(
+            took=0.001,
+            results=[self._result(movie, 0.1 + 0.01 * i) for i, movie in enumerate(page)],
+        )
+
+
+def _health_check(request, context):
+    return health_weaviate_pb2.WeaviateHealthCheckResponse(
+        status=health_weaviate_pb2.WeaviateHealthCheckResponse.SERVING
+    )
+
+
+def create_grpc_server(service, port, max_workers=32):
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
+    weaviate_pb2_grpc.add_WeaviateServicer_to_server(service, server)
+    server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler(
+        "grpc.health.v1.Health",
+        {"Check": grpc.unary_unary_rpc_method_handler(
+            _health_check,
+            request_deserializer=health_weaviate_pb2.WeaviateHealthCheckRequest.FromString,
+            response_serializer=health_weaviate_pb2.WeaviateHealthCheckResponse.SerializeToString,
+        )},
+    ),))
+    bound = server.add_insecure_port(f"[::]:{port}")
+    return server, bound
+
+
+def create_rest_app(service):
+    app = Flask(__name__)
+
+    @app.route("/v1/meta", methods=["GET"])
+    def meta():
+        return jsonify({
+            "hostname": "http://[::]:8080",
+            "version": WEAVIATE_VERSION,
+            "modules": {"text2vec-contextionary": {"version": "fake"}},
+        })
+
+    @app.route("/v1/.well-known/ready", methods=["GET"])
+    @app.route("/v1/.well-known/live", methods=["GET"])
+    def ready():
+        return "", 200
+
+    @app.route("/v1/.well-known/openid-configuration", methods=["GET"])
+    def openid():
+        return "", 404
+
+    @app.route("/v1/modules/text2vec-contextionary/concepts/<path:concept>", methods=["GET"])
+    def concepts(concept):
+        words = []
+        for word in concept.split():
+            rng = random.Random(hashlib.sha256(word.encode()).digest())
+            vector = [rng.uniform(-1, 1) for _ in range(VECTOR_DIMENSIONS)]
+            words.append({"word": word, "present": True, "info": {"vector": vector}})
+        return jsonify({"individualWords": words})
+
+    @app.route("/stats", methods=["GET"])
+    def stats():
+        with service.lock:
+            return jsonify(dict(service.counters))
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Weaviate (REST + gRPC) for load testing")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--grpc-port", type=int, default=50052)
+    parser.add_argument("--catalog", help="JSON file of movies; synthetic if omitted")
+    parser.add_argument("--catalog-size", type=int, default=1000)
+    LatencyModel.add_arguments(parser)
+    args = parser.parse_args()
+
+    catalog = load_catalog(args.catalog) if args.catalog else synthetic_catalog(args.catalog_size)
+    service = FakeSearchService(catalog, LatencyModel.from_args(args))
+    server, _ = create_grpc_server(service, args.grpc_port)
+    server.start()
+    create_rest_app(service).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import math
+import random
+import time
+from typing import Optional
+
+
+class LatencyModel:
+    """
+    Simulated upstream behaviour: a latency distribution plus an error rate.
+
+    distribution is one of "fixed", "uniform" (between 0 and 2x the mean),
+    "normal" or "lognormal" (heavy right tail, like real LLM latency).
+    Samples are in milliseconds and never negative.
+    """
+
+    DISTRIBUTIONS = ("fixed", "uniform", "normal", "lognormal")
+
+    def __init__(
+        self,
+        mean_ms: float = 0.0,
+        stddev_ms: float = 0.0,
+        distribution: str = "lognormal",
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"distribution must be one of {self.DISTRIBUTIONS}")
+        self.mean_ms = mean_ms
+        self.stddev_ms = stddev_ms
+        self.distribution = distribution
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+
+    def sample_ms(self) -> float:
+        if self.mean_ms <= 0:
+            return 0.0
+        if self.distribution == "fixed" or self.stddev_ms <= 0:
+            return self.mean_ms
+        if self.distribution == "uniform":
+            return self._random.uniform(0, 2 * self.mean_ms)
+        if self.distribution == "normal":
+            return max(0.0, self._random.gauss(self.mean_ms, self.stddev_ms))
+        # Lognormal with the requested mean and standard deviation
+        sigma2 = math.log(1 + (self.stddev_ms / self.mean_ms) ** 2)
+        mu = math.log(self.mean_ms) - sigma2 / 2
+        return self._random.lognormvariate(mu, math.sqrt(sigma2))
+
+    def sleep(self) -> None:
+        time.sleep(self.sample_ms() / 1000)
+
+    def should_fail(self) -> bool:
+        return self._random.random() < self.error_rate
+
+    @classmethod
+    def add_arguments(cls, parser: argparse.ArgumentParser) -> None:
+        parser.add_argument("--latency-ms", type=float, default=0.0, help="mean latency")
+        parser.add_argument("--latency-stddev-ms", type=float, default=0.0)
+        parser.add_argument("--latency-distribution", choices=cls.DISTRIBUTIONS, default="lognormal")
+        parser.add_argument("--error-rate", type=float, default=0.0,
+                            help="fraction of requests that fail (0-1)")
+        parser.add_argument("--seed", type=int, default=None)
+
+    @classmethod
+    def from_args(cls, args: argparse.Namespace) -> "LatencyModel":
+        return cls(args.latency_ms, args.latency_stddev_ms, args.latency_distribution,
+                   args.error_rate, args.seed)
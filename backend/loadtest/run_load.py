@@ -0,0 +1,123 @@
+"""
+Closed-loop load generator for the chat endpoint
+
+Each of --concurrency workers sends requests back to back until
+--requests have been sent, then prints throughput, status codes and
+latency percentiles. Run it against a backend wired to the stand-ins:
+
+    python -m loadtest.run_load --url http://localhost:5001/api \
+        --concurrency 32 --requests 2000
+"""
+import argparse
+import itertools
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+DEFAULT_QUERIES = [
+    "feel-good comedy", "80s horror", "something like Inception",
+    "a heist movie with a twist", "romantic drama set in Paris",
+    "sci-fi with aliens but not too scary", "western for a long weekend",
+]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run(url, total, concurrency, queries, stream=False, unique=False, timeout=60):
+    """Send `total` chat requests from `concurrency` workers; returns a summary dict"""
+    endpoint = f"{url.rstrip('/')}/chat/message" + ("/stream" if stream else "")
+    counter = itertools.count()
+    lock = threading.Lock()
+    latencies, first_bytes = [], []
+    statuses = Counter()
+
+    def worker():
+        session = requests.Session()
+        while True:
+            n = next(counter)
+            if n >= total:
+                return
+            query = queries[n % len(queries)]
+            if unique:
+                # Defeat response caching to measure the full pipeline
+                query = f"{query} {uuid.uuid4().hex[:6]}"
+            start = time.monotonic()
+            first_byte = None
+            try:
+                response = session.post(endpoint, json={
+                    "user_email": f"load{n % concurrency}@example.com",
+                    "message": query,
+                }, timeout=timeout, stream=stream)
+                if stream:
+                    for _ in response.iter_content(chunk_size=None):
+                        if first_byte is None:
+                            first_byte = time.monotonic() - start
+                else:
+                    response.content
+                status = str(response.status_code)
+            except requests.RequestException as e:
+                status = type(e).__name__
+            elapsed = time.monotonic() - start
+            with lock:
+                statuses[status] += 1
+                latencies.append(elapsed)
+                if first_byte is not None:
+                    first_bytes.append(first_byte)
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(worker)
+    wall = time.monotonic() - start
+
+    latencies.sort()
+    first_bytes.sort()
+    summary = {
+        "requests": len(latencies),
+        "seconds": wall,
+        "throughput_rps": len(latencies) / wall if wall else 0.0,
+        "statuses": dict(statuses),
+        "latency_ms": {p: percentile(latencies, p) * 1000 for p in (50, 90, 99)},
+        "max_ms": (latencies[-1] if latencies else 0.0) * 1000,
+    }
+    if stream:
+        summary["first_byte_ms"] = {p: percentile(first_bytes, p) * 1000 for p in (50, 90, 99)}
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test POST /api/chat/message")
+    parser.add_argument("--url", default="http://localhost:5001/api")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--queries-file", help="one query per line")
+    parser.add_argument("--stream", action="store_true", help="use /message/stream")
+    parser.add_argument("--unique", action="store_true",
+                        help="append a random suffix to every query (bypasses caches)")
+    args = parser.parse_args()
+
+    queries = DEFAULT_QUERIES
+    if args.queries_file:
+        with open(args.queries_file, "r", encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+
+    summary = run(args.url, args.requests, args.concurrency, queries, args.stream, args.unique)
+    print(f"{summary['requests']} requests in {summary['seconds']:.1f}s "
+          f"({summary['throughput_rps']:.1f} req/s), statuses {summary['statuses']}")
+    print("latency ms  p50 {50:.0f}  p90 {90:.0f}  p99 {99:.0f}".format(**summary["latency_ms"])
+          + f"  max {summary['max_ms']:.0f}")
+    if args.stream:
+        print("first byte ms  p50 {50:.0f}  p90 {90:.0f}  p99 {99:.0f}".format(**summary["first_byte_ms"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,68 @@
 from google import genai
+from google.genai import errors as genai_errors
+from google.genai import types
 import weaviate
-from urllib.parse import urlparse
-import requests
+from weaviate.classes.init import AdditionalConfig, Timeout
+from bson import ObjectId
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import lru_cache
+from urllib.parse import quote, urlparse
+import logging
 import os
+import requests
+import threading
+import time
+
+from config import Config
+from DAL import conversations_dal, precomputed_dal
+from utils.admission import AdmissionController, AdmissionRejected
+from utils.circuit_breaker import CircuitBreaker
+from utils.context_cache import PromptPrefixCache
+from utils.memory import ConversationMemory, format_history
+from utils.metrics import current_trace, in_context, metrics, record, span
+from utils.model_router import ModelRouter
+from utils.prompting import format_context, prompt_size
+from utils.rec_cache import RecommendationCache, normalize_query
+from utils.recommendation import RESPONSE_SCHEMA, Recommendation
+from utils.single_flight import SingleFlight
+from utils.title_index import TitleIndex
+
+logger = logging.getLogger(__name__)
 
 # Get environment variables
 gemini_key = os.getenv('GEMINI_API_KEY')
 WEAVIATE_URL = os.getenv("WEAVIATE_URL", "http://weaviate:8080")
-BACKEND_BASE_URL = os.getenv("BACKEND_BASE_URL", "http://134.209.41.148:5001")
-conversation_api = f"{BACKEND_BASE_URL}/api/chat/conversation"
 collection_name = "Movies"
 
 # Initialize clients with error handling for testing
 try:
-    client = genai.Client(api_key=gemini_key) if gemini_key else None
+    client = genai.Client(
+        api_key=gemini_key,
+        http_options=types.HttpOptions(
+            timeout=int(Config.GEMINI_TIMEOUT_SECONDS * 1000),
+            base_url=Config.GEMINI_BASE_URL or None,
+        ),
+    ) if gemini_key else None
 except Exception as e:
     print(f"Warning: Could not initialize Gemini client: {e}")
     client = None
 
 try:
     parsed = urlparse(WEAVIATE_URL)
-    movie_client = weaviate.connect_to_local(host=parsed.hostname, port=parsed.port)
+    movie_client = weaviate.connect_to_local(
+        host=parsed.hostname,
+        port=parsed.port,
+        grpc_port=Config.WEAVIATE_GRPC_PORT,
+        additional_config=AdditionalConfig(
+            timeout=Timeout(
+                init=Config.WEAVIATE_INIT_TIMEOUT_SECONDS,
+                query=Config.WEAVIATE_QUERY_TIMEOUT_SECONDS,
+                insert=Config.WEAVIATE_INSERT_TIMEOUT_SECONDS,
+            )
+        ),
+    )
     movies = movie_client.collections.get(name=collection_name)
 except Exception as e:
     print(f"Warning: Could not initialize Weaviate client: {e}")
@@ -28,44 +70,778 @@ except Exception as e:
     movies = None
 
 
+class LLMUnavailableError(Exception):
+    """Raised when Gemini is open-circuited or the generation call failed"""
+
+
+class LLMOverloadedError(Exception):
+    """Raised when a Gemini call is shed because too many are already running or queued"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"gemini overloaded: {reason}")
+        self.retry_after = retry_after
+
+
+# Cap concurrent Gemini calls; excess callers queue briefly, then are shed
+llm_admission = AdmissionController(
+    max_concurrency=Config.LLM_MAX_CONCURRENCY,
+    max_queue=Config.LLM_MAX_QUEUE,
+    queue_timeout=Config.LLM_QUEUE_TIMEOUT_SECONDS,
+    default_retry_after=Config.LLM_RETRY_AFTER_SECONDS,
+)
+
+
+@contextmanager
+def _llm_slot():
+    """Hold an admission slot for a Gemini call; raises LLMOverloadedError if shed"""
+    try:
+        with llm_admission.admit():
+            yield
+    except AdmissionRejected as e:
+        raise LLMOverloadedError(e.reason, e.retry_after) from e
+
+
+# Fail fast while an upstream dependency is known to be down
+gemini_breaker = CircuitBreaker(
+    "gemini",
+    failure_threshold=Config.BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=Config.BREAKER_RESET_SECONDS,
+)
+weaviate_breaker = CircuitBreaker(
+    "weaviate",
+    failure_threshold=Config.BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=Config.BREAKER_RESET_SECONDS,
+)
+
+
+def embed_query(query):
+    """Embed a query with Gemini for similarity matching in the cache"""
+    result = client.models.embed_content(
+        model=Config.REC_CACHE_EMBED_MODEL,
+        contents=query,
+    )
+    return result.embeddings[0].values
+
+
+recommendation_cache = RecommendationCache(
+    max_entries=Config.REC_CACHE_MAX_ENTRIES,
+    ttl_seconds=Config.REC_CACHE_TTL_SECONDS,
+    similarity_threshold=Config.REC_CACHE_SIMILARITY_THRESHOLD,
+    embed_fn=embed_query if client else None,
+)
+
+
+def summarize_messages(summary, messages):
+    """Fold older messages into the conversation's rolling summary"""
+    prompt = (
+        "Update the running summary of a chat between a user and a movie recommendation assistant. "
+        "Keep the user's stated tastes and dislikes and the movies already recommended. "
+        "Use at most 120 words.\n"
+        f"Current summary: {summary or 'none'}\n"
+        f"New messages:\n{format_history(messages)}\n"
+    )
+    with _llm_slot():
+        response = client.models.generate_content(
+            model=Config.MEMORY_SUMMARY_MODEL,
+            contents=prompt,
+        )
+    return (response.text or "").strip()
+
+
+conversation_memory = ConversationMemory(
+    conversations_dal,
+    summarize_fn=summarize_messages,
+    keep_last=Config.HISTORY_MAX_MESSAGES,
+    token_budget=Config.MEMORY_TOKEN_BUDGET,
+    summary_interval=Config.MEMORY_SUMMARY_INTERVAL,
+)
+
+
 def get_prev_conversations(user_email, convo_id):
-    """Get conversation history from backend"""
+    """
+    Get the conversation history for the prompt
+
+    Returns the rolling summary plus the most recent messages, trimmed to
+    MEMORY_TOKEN_BUDGET. Schedules a background summary refresh when enough
+    messages have accumulated since the last one.
+    """
+    try:
+        convo_filter = {'_id': ObjectId(convo_id), 'user_email': user_email}
+        memory = conversation_memory.load(convo_filter)
+        if client:
+            conversation_memory.maybe_refresh(convo_filter, memory)
+        return conversation_memory.build_history(memory)
+    except Exception as e:
+        print(f"Warning: Could not load conversation history: {e}")
+        return ""
+
+
+# Optional in-process mirror of the Movies vectors (needs numpy)
+local_index = None
+if Config.VECTOR_INDEX_ENABLED:
+    try:
+        from utils.vector_index import LocalVectorIndex, sync_with_collection
+        local_index = LocalVectorIndex.load(Config.VECTOR_INDEX_PATH)
+    except Exception as e:
+        print(f"Warning: Could not load local vector index: {e}")
+
+
+@lru_cache(maxsize=4096)
+def vectorize_query(query):
+    """
+    Vectorize a query with Weaviate's text2vec-contextionary module
+
+    Averages the vectors of the query's known words, which puts it in the
+    same space as the exported collection vectors. Results are memoized so
+    repeated queries never leave the process.
+    """
+    response = requests.get(
+        f"{WEAVIATE_URL}/v1/modules/text2vec-contextionary/concepts/{quote(query)}",
+        timeout=Config.WEAVIATE_QUERY_TIMEOUT_SECONDS,
+    )
+    response.raise_for_status()
+    vectors = [
+        word["info"]["vector"]
+        for word in response.json().get("individualWords", [])
+        if word.get("present") and word.get("info")
+    ]
+    if not vectors:
+        raise ValueError(f"No known words in query: {query!r}")
+    return tuple(sum(column) / len(vectors) for column in zip(*vectors))
+
+
+def _refresh_local_index():
+    """Periodically pull collection changes into the local index"""
+    while True:
+        time.sleep(Config.VECTOR_INDEX_REFRESH_SECONDS)
+        try:
+            changes = sync_with_collection(local_index, movies)
+            if changes["added"] or changes["removed"]:
+                local_index.save()
+                logger.info(f"Local vector index refreshed: {changes}")
+        except Exception as e:
+            print(f"Warning: Could not refresh local vector index: {e}")
+
+
+if local_index is not None and movies is not None and Config.VECTOR_INDEX_REFRESH_SECONDS > 0:
+    threading.Thread(
+        target=_refresh_local_index, name="vector-index-refresh", daemon=True
+    ).start()
+
+
+# Normalized catalog titles, filled in the background at startup
+title_index = TitleIndex(min_chars=Config.TITLE_MIN_CHARS)
+
+
+def _load_title_index():
+    """Build the title dictionary from the local index, else the collection"""
+    global title_index
     try:
-        req = conversation_api + f"/{user_email}/{convo_id}"
-        response = requests.get(req)
-        return response.json().get('conversation', {}).get('messages', [])
-    except:
-        return []
+        if local_index is not None:
+            items = (
+                {"uuid": item["uuid"], "title": item["properties"].get("title")}
+                for item in local_index.items()
+            )
+        else:
+            items = (
+                {"uuid": obj.uuid, "title": (obj.properties or {}).get("title")}
+                for obj in movies.iterator(return_properties=["title"])
+            )
+        title_index = TitleIndex.build(items, min_chars=Config.TITLE_MIN_CHARS)
+        logger.info(f"Title index loaded with {len(title_index)} titles")
+    except Exception as e:
+        print(f"Warning: Could not build title index: {e}")
+
+
+if Config.TITLE_INDEX_ENABLED and (local_index is not None or movies is not None):
+    threading.Thread(target=_load_title_index, name="title-index-load", daemon=True).start()
+
+
+def search_similar_to_title(match, top_k=5):
+    """
+    near_object search seeded by a resolved catalog title
+
+    The named movie itself is left out of the hits: the user already knows
+    it, and dropping it keeps the prompt context to actual candidates.
+    """
+    if local_index is not None:
+        try:
+            return local_index.similar_to(match["uuid"], top_k)
+        except Exception as e:
+            print(f"Warning: Local near_object search failed; using Weaviate: {e}")
+
+    if movies is None:
+        raise RuntimeError("Weaviate client is not initialized")
+    results = weaviate_breaker.call(
+        movies.query.near_object,
+        near_object=match["uuid"],
+        limit=top_k + 1,
+        return_properties=["title", "description"],
+    )
+    return [obj for obj in results.objects if str(obj.uuid) != match["uuid"]][:top_k]
 
 
 def get_nearest_k(query, top_k=5):
-    """Query Weaviate for similar movies"""
-    return movies.query.near_text(   
+    """
+    Find similar movies for a query
+
+    Queries that name a catalog title ("something like Inception") are
+    resolved through the title index and answered with near_object.
+    Otherwise the local index is used when loaded, else a Weaviate hybrid
+    (BM25 + vector) or near_text search depending on RETRIEVAL_MODE.
+    """
+    match = title_index.find_in_query(query)
+    if match is not None:
+        try:
+            return search_similar_to_title(match, top_k)
+        except Exception as e:
+            print(f"Warning: Title search failed; using query search: {e}")
+
+    if local_index is not None:
+        try:
+            return local_index.search(vectorize_query(normalize_query(query)), top_k)
+        except Exception as e:
+            print(f"Warning: Local vector search failed; using Weaviate: {e}")
+
+    if movies is None:
+        raise RuntimeError("Weaviate client is not initialized")
+    if Config.RETRIEVAL_MODE == "hybrid":
+        return weaviate_breaker.call(
+            movies.query.hybrid,
+            query=query,
+            alpha=Config.HYBRID_ALPHA,
+            limit=top_k,
+            return_properties=["title", "description"],
+        )
+    return weaviate_breaker.call(
+        movies.query.near_text,
         query=query,
         limit=top_k,
         return_properties=["title", "description"],
     )
 
 
-def get_movie_recommendations(query, user_email=None, convo_id=None, top_k=5):
-    """Get AI-powered movie recommendations"""
-    context = get_nearest_k(query, top_k)
-    conversation = get_prev_conversations(user_email, convo_id) if user_email and convo_id else ""
-    
-    prompt = (
-        f"you are a movie recommendation assistant. Give me a movie recommendation that fits this query: {query}\n"
-        f". This is all of the previous correspondence with the user: {conversation}\n"
-        f". This is the context, containing some descriptions of movies. You do not have to limit your responses to the provided context: {context}\n"
-        f". Only list one movie. after your recommendation, list name, runtime (in minutes) and description.\n"
-        f". Format your response as follows:\n"
-        f"Movie Name: <name>\n"
-        f"Runtime: <runtime> minutes\n"
-        f"Description: <description>\n"
+def get_fallback_recommendation(query):
+    """
+    Answer from the top vector search hit when Gemini is unavailable
+
+    Uses the same "Movie Name / Runtime / Description" format as the LLM.
+    The catalog has no runtimes, so that line reads "unknown".
+
+    Returns:
+        str | None: The formatted recommendation, or None if retrieval fails
+    """
+    try:
+        results = get_nearest_k(query, 1)
+    except Exception as e:
+        print(f"Warning: Fallback retrieval failed: {e}")
+        return None
+
+    hits = getattr(results, "objects", results) or []
+    if not hits:
+        return None
+
+    props = hits[0].properties or {}
+    return (
+        f"Movie Name: {props.get('title', '').strip()}\n"
+        f"Runtime: unknown\n"
+        f"Description: {(props.get('description') or '').strip()}"
+    )
+
+
+# Shared pool for the I/O-bound retrieval stages of the chat pipeline
+retrieval_pool = ThreadPoolExecutor(
+    max_workers=Config.RETRIEVAL_POOL_WORKERS,
+    thread_name_prefix="retrieval",
+)
+
+
+def _stage_result(future, deadline, stage, default):
+    """Wait for a retrieval stage until its deadline, falling back to default"""
+    try:
+        return future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FutureTimeoutError:
+        future.cancel()
+        print(f"Warning: {stage} stage timed out; continuing without it")
+    except Exception as e:
+        print(f"Warning: {stage} stage failed; continuing without it: {e}")
+    return default
+
+
+def _traced(stage, fn):
+    """fn timed as `stage`, runnable on the retrieval pool with the caller's trace"""
+    def run(*args):
+        with span(stage):
+            return fn(*args)
+    return in_context(run)
+
+
+def retrieve(query, user_email=None, convo_id=None, top_k=5):
+    """
+    Run vector search and history loading concurrently
+
+    Each stage gets its own timeout budget measured from the start of the
+    fan-out. A stage that fails or runs over budget is replaced by an empty
+    value so the request can still be answered.
+    """
+    with span("retrieve"):
+        start = time.monotonic()
+        context_future = retrieval_pool.submit(
+            _traced("vector_search", get_nearest_k), query, top_k
+        )
+        history_future = (
+            retrieval_pool.submit(
+                _traced("history", get_prev_conversations), user_email, convo_id
+            )
+            if user_email and convo_id else None
+        )
+
+        context = _stage_result(
+            context_future, start + Config.VECTOR_STAGE_TIMEOUT_SECONDS, "vector search", ""
+        )
+        conversation = _stage_result(
+            history_future, start + Config.HISTORY_STAGE_TIMEOUT_SECONDS, "history", ""
+        ) if history_future else ""
+
+    return context, conversation
+
+
+# Static instructions, sent as the system instruction (or a cached handle to it)
+INSTRUCTIONS = (
+    "You are a movie recommendation assistant. Recommend one movie that fits the user's query, "
+    "taking the previous correspondence with the user into account. The context lists some "
+    "movies from the catalog with their descriptions; you do not have to limit your "
+    "recommendation to it.\n"
+)
+TEXT_FORMAT_INSTRUCTIONS = (
+    "After your recommendation, list name, runtime (in minutes) and description. "
+    "Format your response as follows:\n"
+    "Movie Name: <name>\n"
+    "Runtime: <runtime> minutes\n"
+    "Description: <description>\n"
+)
+STRUCTURED_FORMAT_INSTRUCTIONS = (
+    "Give the movie's title, runtime in minutes (null if unknown) "
+    "and a description of one or two sentences.\n"
+)
+
+
+def system_instruction(structured=False):
+    return INSTRUCTIONS + (STRUCTURED_FORMAT_INSTRUCTIONS if structured else TEXT_FORMAT_INSTRUCTIONS)
+
+
+def build_prompt(query, user_email=None, convo_id=None, top_k=5):
+    """
+    Retrieve context and history and assemble the per-request prompt
+
+    Only the parts that change per call are included; the instructions
+    travel separately (see system_instruction).
+    """
+    hits, conversation = retrieve(query, user_email, convo_id, top_k)
+    with span("prompt_build"):
+        context = format_context(hits, Config.CONTEXT_MAX_CHARS_PER_HIT)
+
+        prompt = (
+            f"Query: {query}\n"
+            f"Previous correspondence:\n{conversation}\n"
+            f"Context:\n{context}\n"
+        )
+
+    size = prompt_size(prompt)
+    record("prompt_bytes", size["bytes"])
+    record("history_bytes", len(conversation.encode("utf-8")) if conversation else 0)
+    logger.info(f"Prompt size: {size['bytes']} bytes, ~{size['est_tokens']} tokens")
+    return prompt
+
+
+def _create_prompt_cache(key):
+    """Upload the instructions for (model, structured) as Gemini cached content"""
+    model, structured = key
+    cache = client.caches.create(
+        model=model,
+        config=types.CreateCachedContentConfig(
+            display_name="movie-recommendation-instructions",
+            system_instruction=system_instruction(structured),
+            ttl=f"{Config.PROMPT_CACHE_TTL_SECONDS}s",
+        ),
+    )
+    expires_at = (
+        cache.expire_time.timestamp() if cache.expire_time
+        else time.time() + Config.PROMPT_CACHE_TTL_SECONDS
+    )
+    return cache.name, expires_at
+
+
+prompt_cache = PromptPrefixCache(
+    _create_prompt_cache,
+    refresh_margin=Config.PROMPT_CACHE_REFRESH_MARGIN_SECONDS,
+    retry_after=Config.PROMPT_CACHE_RETRY_SECONDS,
+)
+
+
+def _cached_instructions(model, structured):
+    """Name of the cached instructions for a model, or None to send them inline"""
+    if not (Config.PROMPT_CACHE_ENABLED and client):
+        return None
+    return prompt_cache.get((model, structured))
+
+
+def generation_config(structured=False, cached_content=None):
+    """
+    Gemini generation settings: output cap, instructions, and the JSON
+    schema if structured
+
+    With cached_content the instructions come from the cache handle and
+    must not be repeated inline.
+    """
+    kwargs = {"max_output_tokens": Config.MAX_OUTPUT_TOKENS}
+    if Config.GEMINI_THINKING_BUDGET is not None:
+        kwargs["thinking_config"] = types.ThinkingConfig(thinking_budget=Config.GEMINI_THINKING_BUDGET)
+    if cached_content:
+        kwargs["cached_content"] = cached_content
+    else:
+        kwargs["system_instruction"] = system_instruction(structured)
+    if structured:
+        kwargs["response_mime_type"] = "application/json"
+        kwargs["response_schema"] = RESPONSE_SCHEMA
+    return types.GenerateContentConfig(**kwargs)
+
+
+def response_text(text, structured=False):
+    """
+    Normalize generated output to the chat text format
+
+    Structured responses are parsed into a Recommendation and rendered, so
+    cached and stored answers always have the same shape. Unparseable JSON
+    (e.g. cut off by the output cap) raises ValueError.
+    """
+    if not structured or not text:
+        return text
+    return Recommendation.from_json(text).to_text()
+
+
+def _hit_token_cap(response):
+    """Whether generation stopped at max_output_tokens (answer cut off)"""
+    candidates = getattr(response, "candidates", None) or []
+    return bool(candidates) and getattr(candidates[0], "finish_reason", None) == types.FinishReason.MAX_TOKENS
+
+
+def _use_cache(user_email, convo_id, model_tier=None):
+    # Answers that depend on conversation history are never shared, and the
+    # cache is keyed by query only, so an explicitly chosen model bypasses it
+    return Config.REC_CACHE_ENABLED and not (user_email and convo_id) and model_tier is None
+
+
+model_router = ModelRouter(
+    Config.GEMINI_MODELS,
+    default_tier=Config.GEMINI_DEFAULT_TIER,
+    complex_tier=Config.GEMINI_COMPLEX_TIER,
+    complex_min_words=Config.MODEL_ROUTER_COMPLEX_MIN_WORDS,
+    complex_min_constraints=Config.MODEL_ROUTER_COMPLEX_MIN_CONSTRAINTS,
+)
+
+
+def _usage_counts(response):
+    """(prompt tokens, output tokens) from a Gemini response, if reported"""
+    usage = getattr(response, "usage_metadata", None)
+    return (
+        getattr(usage, "prompt_token_count", None),
+        getattr(usage, "candidates_token_count", None),
+    )
+
+
+def _record_token_counts(response):
+    """Prompt, output and cached token counts into the metrics histograms"""
+    usage = getattr(response, "usage_metadata", None)
+    record("prompt_tokens", getattr(usage, "prompt_token_count", None))
+    record("output_tokens", getattr(usage, "candidates_token_count", None))
+    record("cached_tokens", getattr(usage, "cached_content_token_count", None))
+
+
+def _record_prompt_cache_usage(cached_content, latency, response):
+    usage = getattr(response, "usage_metadata", None)
+    prompt_cache.record(
+        bool(cached_content),
+        latency,
+        getattr(usage, "prompt_token_count", None),
+        getattr(usage, "cached_content_token_count", None),
     )
-    
+
+
+# Status codes Gemini uses for a cached_content handle it can't use
+CACHE_REJECTED_CODES = (400, 403, 404)
+
+
+def _cache_handle_rejected(error):
+    """
+    Whether error says the cached_content handle is invalid or gone
+
+    Other client errors (429 quota, a bad prompt) would fail the same way
+    inline, so they keep the handle and are not retried.
+    """
+    return (
+        isinstance(error, genai_errors.ClientError)
+        and error.code in CACHE_REJECTED_CODES
+        and "cache" in (error.message or "").lower()
+    )
+
+
+def _generate_content(model, prompt, structured):
+    """
+    generate_content with the cached instructions when a handle exists
+
+    A handle the API rejects (expired or deleted early) is dropped and the
+    call is retried once with the instructions inline.
+    """
+    cached_content = _cached_instructions(model, structured)
+    if cached_content:
+        try:
+            start = time.monotonic()
+            response = client.models.generate_content(
+                model=model,
+                contents=prompt,
+                config=generation_config(structured, cached_content),
+            )
+            return response, cached_content, time.monotonic() - start
+        except genai_errors.ClientError as e:
+            if not _cache_handle_rejected(e):
+                raise
+            logger.warning(f"Cached instructions rejected; sending inline: {e}")
+            prompt_cache.invalidate((model, structured))
+
+    start = time.monotonic()
     response = client.models.generate_content(
-        model="gemini-3-pro-preview",
+        model=model,
         contents=prompt,
+        config=generation_config(structured),
+    )
+    return response, None, time.monotonic() - start
+
+
+# Concurrent identical requests share one upstream generation
+inflight_requests = SingleFlight()
+
+
+def _request_key(query, user_email, convo_id, top_k, model):
+    """Key identifying the prompt inputs of a recommendation request"""
+    has_history = bool(user_email and convo_id)
+    return (
+        normalize_query(query),
+        top_k,
+        model,
+        user_email if has_history else None,
+        str(convo_id) if has_history else None,
     )
-    
-    return response.text
\ No newline at end of file
+
+
+def _generate_recommendation(query, user_email, convo_id, top_k, model, use_cache):
+    if not gemini_breaker.allow_request():
+        raise LLMUnavailableError("gemini circuit is open")
+
+    structured = Config.STRUCTURED_OUTPUT_ENABLED
+    try:
+        prompt = build_prompt(query, user_email, convo_id, top_k)
+        with _llm_slot(), span("llm"):
+            response, cached_content, latency = _generate_content(model, prompt, structured)
+        if not response.text:
+            # e.g. blocked by safety filters; let the caller fall back
+            raise ValueError("Gemini returned an empty response")
+        if _hit_token_cap(response):
+            raise ValueError("Gemini response was cut off at MAX_OUTPUT_TOKENS")
+        text = response_text(response.text, structured)
+    except LLMOverloadedError:
+        # Shed before reaching Gemini; says nothing about upstream health
+        gemini_breaker.release_trial()
+        raise
+    except Exception as e:
+        gemini_breaker.record_failure()
+        raise LLMUnavailableError(str(e)) from e
+    gemini_breaker.record_success()
+    model_router.record(model, latency, *_usage_counts(response))
+    _record_prompt_cache_usage(cached_content, latency, response)
+    _record_token_counts(response)
+
+    if use_cache:
+        recommendation_cache.set(query, text)
+
+    return text
+
+
+def get_movie_recommendations(query, user_email=None, convo_id=None, top_k=5,
+                              model_tier=None):
+    """
+    Get AI-powered movie recommendations
+
+    model_tier picks a registered model explicitly ('flash', 'pro', ...)
+    and skips the shared answer cache; by default the router chooses one
+    from the query's complexity.
+    """
+    use_cache = _use_cache(user_email, convo_id, model_tier)
+    if use_cache:
+        with span("cache_lookup"):
+            cached = recommendation_cache.get(query)
+        if cached is not None:
+            return cached
+
+    _, model = model_router.choose(query, model_tier)
+    return inflight_requests.do(
+        _request_key(query, user_email, convo_id, top_k, model),
+        _generate_recommendation,
+        query, user_email, convo_id, top_k, model, use_cache,
+    )
+
+
+def _record_first_token(seconds):
+    # A generator can't hold a span open across yields, so stream timings are recorded directly
+    metrics.observe_stage("llm_first_token", seconds)
+    trace = current_trace()
+    if trace is not None:
+        trace.add_span("llm_first_token", seconds)
+
+
+def _record_llm_span(seconds):
+    metrics.observe_stage("llm", seconds)
+    trace = current_trace()
+    if trace is not None:
+        trace.add_span("llm", seconds)
+
+
+def stream_movie_recommendations(query, user_email=None, convo_id=None, top_k=5,
+                                 model_tier=None):
+    """Stream AI-powered movie recommendations as text chunks"""
+    use_cache = _use_cache(user_email, convo_id, model_tier)
+    if use_cache:
+        with span("cache_lookup"):
+            cached = recommendation_cache.get(query)
+        if cached is not None:
+            yield cached
+            return
+
+    _, model = model_router.choose(query, model_tier)
+    if not gemini_breaker.allow_request():
+        raise LLMUnavailableError("gemini circuit is open")
+
+    chunks = []
+    last_chunk = None
+    cached_content = _cached_instructions(model, False)
+    try:
+        prompt = build_prompt(query, user_email, convo_id, top_k)
+
+        # The slot is held until the stream finishes or the client goes away
+        with _llm_slot():
+            start = time.monotonic()
+            for chunk in client.models.generate_content_stream(
+                model=model,
+                contents=prompt,
+                config=generation_config(cached_content=cached_content),
+            ):
+                last_chunk = chunk
+                if chunk.text:
+                    if not chunks:
+                        _record_first_token(time.monotonic() - start)
+                    chunks.append(chunk.text)
+                    yield chunk.text
+        if not chunks:
+            raise ValueError("Gemini returned an empty response")
+    except LLMOverloadedError:
+        gemini_breaker.release_trial()
+        raise
+    except GeneratorExit:
+        # Client went away mid-stream; upstream itself was healthy
+        gemini_breaker.record_success()
+        raise
+    except Exception as e:
+        if cached_content and _cache_handle_rejected(e):
+            # Let the next request recreate the handle
+            prompt_cache.invalidate((model, False))
+        gemini_breaker.record_failure()
+        if chunks:
+            raise
+        raise LLMUnavailableError(str(e)) from e
+    gemini_breaker.record_success()
+    latency = time.monotonic() - start
+    _record_llm_span(latency)
+    model_router.record(model, latency, *_usage_counts(last_chunk))
+    _record_prompt_cache_usage(cached_content, latency, last_chunk)
+    _record_token_counts(last_chunk)
+
+    if _hit_token_cap(last_chunk):
+        # Already shown to the client, but don't serve it to anyone else
+        logger.warning("Streamed response was cut off at MAX_OUTPUT_TOKENS")
+        return
+    text = "".join(chunks)
+    if use_cache and text:
+        recommendation_cache.set(query, text)
+
+
+def get_precomputed_recommendation(query):
+    """
+    Answer stored by the offline precompute job for this query, if fresh
+
+    Precomputed answers ignore conversation history, so callers should
+    only use them for a conversation's opening message.
+    """
+    if not Config.PRECOMPUTED_ENABLED:
+        return None
+    key = normalize_query(query)
+    if not key:
+        return None
+
+    with span("precomputed_lookup"):
+        doc = precomputed_dal.find_one_precomputed(key)
+    if not doc or not doc.get("response"):
+        return None
+    computed_at = doc.get("computed_at")
+    max_age = timedelta(hours=Config.PRECOMPUTED_MAX_AGE_HOURS)
+    if computed_at and datetime.utcnow() - computed_at > max_age:
+        return None
+    return doc["response"]
+
+
+def store_precomputed_recommendation(query, response):
+    """Save an answer under the query's normalized text"""
+    recommendation = Recommendation.from_text(response)
+    return precomputed_dal.upsert_one_precomputed(normalize_query(query), {
+        "query": query,
+        "response": response,
+        "recommendation": recommendation.to_dict() if recommendation else None,
+        "computed_at": datetime.utcnow(),
+    })
+
+
+def get_cache_stats():
+    """Hit/miss counters for the recommendation cache"""
+    return recommendation_cache.stats()
+
+
+def get_single_flight_stats():
+    """Upstream calls made vs. requests coalesced onto an in-flight call"""
+    return inflight_requests.stats()
+
+
+def get_model_stats():
+    """Model registry plus per-model call counts, latency and token usage"""
+    return model_router.stats()
+
+
+def get_prompt_cache_stats():
+    """Cached-instruction handles, plus billed input tokens and latency with vs. without them"""
+    return prompt_cache.stats()
+
+
+def get_pipeline_metrics():
+    """Per-stage latency histograms plus token and prompt-size histograms"""
+    return metrics.snapshot()
+
+
+def get_admission_stats():
+    """Gemini concurrency gauges: in flight, queued, admitted and shed calls"""
+    return llm_admission.stats()
+
+
+def get_breaker_stats():
+    """Circuit breaker state for each upstream dependency"""
+    return {
+        'gemini': gemini_breaker.stats(),
+        'weaviate': weaviate_breaker.stats(),
+    }
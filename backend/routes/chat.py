@@ -1,17 +1,39 @@
 """
 Chat routes with ML integration
 """
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify, Response, stream_with_context
 from bson import ObjectId
+from bson.errors import InvalidId
+import atexit
+import json
 import logging
 from datetime import datetime
 import sys
-from ml_client import get_movie_recommendations
+from ml_client import (
+    LLMOverloadedError,
+    LLMUnavailableError,
+    get_fallback_recommendation,
+    get_precomputed_recommendation,
+    get_movie_recommendations,
+    stream_movie_recommendations,
+    get_cache_stats,
+    get_single_flight_stats,
+    get_model_stats,
+    get_prompt_cache_stats,
+    get_pipeline_metrics,
+    get_admission_stats,
+)
 
 import os
 
-from DAL import conversations_dal
-from utils.validators import validate_chat_message
+from config import Config
+from DAL import conversations_dal, idempotency_dal, messages_dal
+from utils.idempotency import idempotent
+from utils.jobs import FAILED, JobRunner, JobStore, LocalJobQueue, QueueFull
+from utils.metrics import span, start_trace
+from utils.recommendation import Recommendation
+from utils.validators import validate_chat_message, validate_page_params
+from utils.write_behind import BacklogFull, WriteBehindQueue
 
 logger = logging.getLogger(__name__)
 
@@ -20,30 +42,370 @@ logger = logging.getLogger(__name__)
 chat_bp = Blueprint('chat', __name__, url_prefix='/api/chat')
 
 
-def get_ai_recommendation(user_message: str) -> dict:
+def get_ai_recommendation(user_message: str, user_email: str = None,
+                          convo_id: str = None, model_tier: str = None) -> dict:
     """
     Get AI-powered movie recommendation
 
+    A conversation's opening message is answered from the precomputed table
+    when the offline job has stored an answer for it.
+
     Args:
         user_message (str): User's chat message
+        user_email (str): Owner of the conversation, for history lookup
+        convo_id (str): Existing conversation to draw history from
+        model_tier (str): Explicit model tier ('flash', 'pro'); routed
+            automatically when omitted
 
     Returns:
         dict: {
             'response': str,
-            'source': 'ai' | 'mock'
+            'source': 'ai' | 'precomputed' | 'fallback' | 'mock',
+            'recommendation': {'title', 'runtime_minutes', 'description'} | None
         }
+
+    Raises:
+        LLMUnavailableError: Gemini is down and no fallback answer exists
+        LLMOverloadedError: Too many Gemini calls in flight; shed
     """
-    response = get_movie_recommendations(user_message, top_k=5)
+    if not convo_id:
+        precomputed = get_precomputed_recommendation(user_message)
+        if precomputed:
+            return {
+                'response': precomputed,
+                'source': 'precomputed',
+                'recommendation': parse_recommendation(precomputed)
+            }
+
+    try:
+        response = get_movie_recommendations(
+            user_message, user_email=user_email, convo_id=convo_id, top_k=5,
+            model_tier=model_tier
+        )
+    except LLMUnavailableError:
+        logger.warning("LLM unavailable; answering from vector search")
+        response = get_fallback_recommendation(user_message)
+        if response is None:
+            raise
+        return {
+            'response': response,
+            'source': 'fallback',
+            'recommendation': parse_recommendation(response)
+        }
+
     return {
         'response': response,
-        'source': 'ai'
+        'source': 'ai',
+        'recommendation': parse_recommendation(response)
+    }
+
+
+def parse_recommendation(text: str):
+    """
+    Typed recommendation for a reply in the chat text format
+
+    Returns:
+        dict | None: {'title', 'runtime_minutes', 'description'}, or None
+            when the reply is not a single recommendation
+    """
+    recommendation = Recommendation.from_text(text)
+    return recommendation.to_dict() if recommendation else None
+
+
+
+
+
+def save_chat_exchange(user_email: str, convo_id, user_message: str,
+                       ai_response: str, source: str, recommendation: dict = None) -> str:
+    """
+    Persist a user message and the AI reply
+
+    Appends to the existing conversation when convo_id matches one owned by
+    user_email, otherwise starts a new conversation.
+
+    Returns:
+        str: The conversation id the messages were saved to
+    """
+    user_msg, ai_msg = build_exchange_messages(user_message, ai_response, source, recommendation)
+
+    # Update or create conversation
+    if convo_id:
+        try:
+            # Append both messages to the existing conversation in one update
+            success = conversations_dal.append_messages(
+                {
+                    '_id': ObjectId(convo_id),
+                    'user_email': user_email
+                },
+                [user_msg, ai_msg],
+                datetime.utcnow()
+            )
+            if not success:
+                # convo_id is valid format but no matching convo; treat as new
+                convo_id = None
+        except Exception:
+            # Invalid ObjectId format or DAL error; treat as new conversation
+            logger.exception("Error updating existing conversation; will create new one")
+            convo_id = None
+
+    if not convo_id:
+        # Create new conversation
+        convo_doc = {
+            'user_email': user_email,
+            'messages': [user_msg, ai_msg],
+            'message_count': 2,
+            'created_at': datetime.utcnow(),
+            'updated_at': datetime.utcnow()
+        }
+
+        inserted_id = conversations_dal.insert_one_conversation(convo_doc)
+        # Ensure we always return a string
+        convo_id = str(inserted_id)
+
+    return convo_id
+
+
+def build_exchange_messages(user_message: str, ai_response: str, source: str,
+                            recommendation: dict = None) -> list:
+    """The user message and AI reply documents for one chat exchange"""
+    user_msg = {
+        'timestamp': datetime.utcnow(),
+        'content': user_message,
+        'role': 'user'
+    }
+
+    ai_msg = {
+        'timestamp': datetime.utcnow(),
+        'content': ai_response,
+        'role': 'model',
+        'source': source  # 'ai' or 'mock'
+    }
+    if recommendation:
+        ai_msg['recommendation'] = recommendation
+    return [user_msg, ai_msg]
+
+
+def owns_conversation(user_email: str, convo_id: str) -> bool:
+    """Whether convo_id is one of user_email's conversations, saved or queued"""
+    if chat_persister.pending((convo_id, user_email)):
+        return True
+    try:
+        return conversations_dal.conversation_exists({
+            '_id': ObjectId(convo_id),
+            'user_email': user_email
+        })
+    except (InvalidId, TypeError):
+        return False
+
+
+def queue_chat_exchange(user_email: str, convo_id, user_message: str,
+                        ai_response: str, source: str, recommendation: dict = None) -> str:
+    """
+    Hand a user message and the AI reply to the write-behind persister
+
+    Same conversation rules as save_chat_exchange, but the only Mongo call
+    on the request path is the ownership check; new conversations get their
+    id up front. Saves directly when the backlog is full.
+
+    Returns:
+        str: The conversation id the messages will be saved to
+    """
+    if convo_id and not owns_conversation(user_email, str(convo_id)):
+        convo_id = None
+    created = not convo_id
+    convo_id = str(ObjectId()) if created else str(convo_id)
+
+    try:
+        chat_persister.submit(
+            {
+                'convo_id': convo_id,
+                'user_email': user_email,
+                'messages': build_exchange_messages(user_message, ai_response, source, recommendation),
+                'created': created,
+                'updated_at': datetime.utcnow()
+            },
+            keys=[(convo_id, user_email), user_email]
+        )
+    except BacklogFull:
+        logger.warning("Chat write-behind backlog full; saving exchange directly")
+        return save_chat_exchange(
+            user_email, None if created else convo_id, user_message, ai_response,
+            source, recommendation
+        )
+    return convo_id
+
+
+def store_chat_exchange(*args, **kwargs) -> str:
+    """Save a chat exchange now, or queue it when write-behind is enabled"""
+    if Config.CHAT_WRITE_BEHIND_ENABLED:
+        return queue_chat_exchange(*args, **kwargs)
+    return save_chat_exchange(*args, **kwargs)
+
+
+def wait_for_chat_writes(key, timeout: float = None) -> None:
+    """Let reads see this caller's queued chat writes (no-op when none are queued)"""
+    timeout = Config.CHAT_WRITE_BEHIND_WAIT_SECONDS if timeout is None else timeout
+    if not chat_persister.wait(key, timeout):
+        logger.warning("Timed out waiting for queued chat writes")
+
+
+def persist_chat_exchanges(items: list) -> list:
+    """
+    Write a batch of queued chat exchanges; returns the items to retry
+
+    New conversation headers go in one insert, each existing conversation
+    gets one index reservation for all of its queued messages, and every
+    message lands in one bucket bulk write. Items keep their reserved
+    indices, so a retry only repeats the steps that failed.
+    """
+    failed = []
+
+    new = [item for item in items if item['created'] and 'start' not in item]
+    headers = [{
+        '_id': ObjectId(item['convo_id']),
+        'user_email': item['user_email'],
+        'message_count': len(item['messages']),
+        'created_at': item['updated_at'],
+        'updated_at': item['updated_at']
+    } for item in new]
+    if conversations_dal.insert_conversation_headers(headers):
+        for item in new:
+            item['start'] = 0
+    else:
+        failed.extend(new)
+
+    groups = {}
+    for item in items:
+        if not item['created'] and 'start' not in item:
+            groups.setdefault((item['convo_id'], item['user_email']), []).append(item)
+    for (convo_id, user_email), group in groups.items():
+        reserved = conversations_dal.reserve_messages(
+            {'_id': ObjectId(convo_id), 'user_email': user_email},
+            sum(len(item['messages']) for item in group),
+            max(item['updated_at'] for item in group)
+        )
+        if reserved is None:
+            failed.extend(group)
+            continue
+        start = reserved[1]
+        for item in group:
+            item['start'] = start
+            start += len(item['messages'])
+
+    ready = [item for item in items if 'start' in item]
+    if not messages_dal.append_many_conversation_messages(
+        [(ObjectId(item['convo_id']), item['start'], item['messages']) for item in ready]
+    ):
+        failed.extend(ready)
+    return failed
+
+
+chat_persister = WriteBehindQueue(
+    persist_chat_exchanges,
+    batch_size=Config.CHAT_WRITE_BEHIND_BATCH_SIZE,
+    flush_interval=Config.CHAT_WRITE_BEHIND_INTERVAL_SECONDS,
+    max_retries=Config.CHAT_WRITE_BEHIND_MAX_RETRIES,
+    max_backlog=Config.CHAT_WRITE_BEHIND_MAX_BACKLOG,
+    name='chat-write-behind',
+)
+# Write whatever is still queued before the process exits
+atexit.register(chat_persister.close, Config.CHAT_WRITE_BEHIND_SHUTDOWN_SECONDS)
+
+
+def format_sse(data: dict, event: str = None) -> str:
+    """Serialize a payload as a Server-Sent Events frame"""
+    frame = f"event: {event}\n" if event else ""
+    return frame + f"data: {json.dumps(data)}\n\n"
+
+
+def stream_completed(body: str) -> bool:
+    """Whether a recorded SSE body ends with the done event"""
+    return body.rstrip().rsplit('\n\n', 1)[-1].startswith('event: done\n')
+
+
+def process_chat_message(user_email: str, user_message: str, convo_id=None,
+                         model_tier: str = None, debug: bool = False) -> dict:
+    """
+    Generate a reply, save the exchange and build the response body
+
+    Shared by the synchronous endpoint and the job workers. Raises
+    LLMUnavailableError when neither Gemini nor vector search can answer.
+    """
+    with start_trace() as trace:
+        with span('request'):
+            if convo_id:
+                # History for the prompt must include our last queued exchange
+                wait_for_chat_writes((str(convo_id), user_email))
+
+            # Get AI-powered recommendation
+            ai_result = get_ai_recommendation(user_message, user_email, convo_id, model_tier)
+            ai_response = ai_result['response']
+
+            with span('persist'):
+                convo_id = store_chat_exchange(
+                    user_email, convo_id, user_message, ai_response, ai_result['source'],
+                    ai_result.get('recommendation')
+                )
+
+    logger.info(f"Chat message processed for user {user_email} )")
+
+    body = {
+        'success': True,
+        'response': ai_response,
+        'convo_id': convo_id,
+        'source': ai_result['source'],
+        'recommendation': ai_result.get('recommendation'),
+    }
+    if debug:
+        body['debug'] = trace.to_dict()
+    return body
+
+
+def run_chat_job(payload: dict) -> dict:
+    return process_chat_message(**payload)
+
+
+def overloaded_body(error: LLMOverloadedError) -> dict:
+    return {
+        'message': 'Too many recommendations in progress, please retry shortly',
+        'error_code': 'LLM_OVERLOADED',
+        'retry_after': error.retry_after
     }
 
 
+def chat_job_error(error: Exception) -> dict:
+    if isinstance(error, LLMOverloadedError):
+        return overloaded_body(error)
+    if isinstance(error, LLMUnavailableError):
+        logger.warning("Recommendation service unavailable for chat job")
+        return {
+            'message': 'Recommendations are temporarily unavailable',
+            'error_code': 'SERVICE_UNAVAILABLE'
+        }
+    logger.error("Chat job error", exc_info=error)
+    return {
+        'message': 'Internal server error',
+        'error_code': 'INTERNAL_ERROR'
+    }
+
+
+chat_jobs = JobRunner(
+    run_chat_job,
+    workers=Config.CHAT_JOB_WORKERS,
+    job_queue=LocalJobQueue(Config.CHAT_JOB_QUEUE_SIZE),
+    store=JobStore(Config.CHAT_JOB_TTL_SECONDS),
+    error_fn=chat_job_error,
+)
+
 
+def wants_async(data: dict) -> bool:
+    """Async job mode: "async": true in the body or Prefer: respond-async"""
+    return data.get('async') is True or 'respond-async' in request.headers.get('Prefer', '')
 
 
 @chat_bp.route('/message', methods=['POST'])
+@idempotent('chat.message', idempotency_dal,
+            Config.IDEMPOTENCY_TTL_SECONDS, Config.IDEMPOTENCY_LOCK_SECONDS)
 def send_message():
     """
     Send a chat message and get AI response
@@ -52,13 +414,27 @@ def send_message():
         {
             "user_email": "john@example.com",
             "message": "Can you recommend a scary horror movie?",
-            "convo_id": "optional_conversation_id"
+            "convo_id": "optional_conversation_id",
+            "model_tier": "optional 'flash' | 'pro'",
+            "async": optional true to run as a background job
         }
 
+    Async mode (also selected by a Prefer: respond-async header) queues the
+    request on the chat worker pool and returns immediately; poll
+    GET /api/chat/jobs/<job_id> for the result.
+
+    An Idempotency-Key header makes retries safe: a repeat of the same
+    request returns the first response instead of calling the LLM again.
+
     Returns:
         200: Response with AI message
+        202: Job accepted; body has job_id and status_url
         400: Validation error
+        409: Same Idempotency-Key still in progress
+        422: Idempotency-Key reused with a different request
         500: Server error
+        503: LLM and vector search both unavailable, job queue full, or
+             Gemini overloaded (LLM_OVERLOADED, with Retry-After)
     """
     try:
         data = request.get_json()
@@ -80,72 +456,47 @@ def send_message():
                 'error_code': 'VALIDATION_ERROR'
             }), 400
 
-        user_email = data['user_email']
-        user_message = data['message']
-        convo_id = data.get('convo_id')  # may be None or a string
-
-        # Get AI-powered recommendation
-        ai_result = get_ai_recommendation(user_message)
-        ai_response = ai_result['response'] 
-
-        # Create message objects
-        user_msg = {
-            'timestamp': datetime.utcnow(),
-            'content': user_message,
-            'role': 'user'
-        }
-
-        ai_msg = {
-            'timestamp': datetime.utcnow(),
-            'content': ai_response,
-            'role': 'model',
-            'source': ai_result['source']  # 'ai' or 'mock'
+        message = {
+            'user_email': data['user_email'],
+            'user_message': data['message'],
+            'convo_id': data.get('convo_id'),  # may be None or a string
+            'model_tier': data.get('model_tier'),
+            'debug': current_app.debug,
         }
 
-        # Update or create conversation
-        if convo_id:
+        if wants_async(data):
             try:
-                # Try to update existing conversation
-                success = conversations_dal.update_one_conversation(
-                    {
-                        '_id': ObjectId(convo_id),
-                        'user_email': user_email
-                    },
-                    {
-                        'updated_at': datetime.utcnow()
-                    }
-                )
-                if success:
-                    conversations_dal.add_message_to_conversation(convo_id, user_msg)
-                    conversations_dal.add_message_to_conversation(convo_id, ai_msg)
-                else:
-                    # convo_id is valid format but no matching convo; treat as new
-                    convo_id = None
-            except Exception:
-                # Invalid ObjectId format or DAL error; treat as new conversation
-                logger.exception("Error updating existing conversation; will create new one")
-                convo_id = None
-
-        if not convo_id:
-            # Create new conversation
-            convo_doc = {
-                'user_email': user_email,
-                'messages': [user_msg, ai_msg],
-                'created_at': datetime.utcnow(),
-                'updated_at': datetime.utcnow()
-            }
-
-            inserted_id = conversations_dal.insert_one_conversation(convo_doc)
-            # Ensure we always return a string
-            convo_id = str(inserted_id)
-
-        logger.info(f"Chat message processed for user {user_email} )")
+                job_id = chat_jobs.submit(message)
+            except QueueFull:
+                return jsonify({
+                    'success': False,
+                    'message': 'Too many chat requests in progress, please retry shortly',
+                    'error_code': 'QUEUE_FULL'
+                }), 503, {'Retry-After': '5'}
+
+            status_url = f"{chat_bp.url_prefix}/jobs/{job_id}"
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'status': 'queued',
+                'status_url': status_url
+            }), 202, {'Location': status_url}
+
+        return jsonify(process_chat_message(**message)), 200
+
+    except LLMOverloadedError as e:
+        logger.warning("Chat message shed: %s", e)
+        return jsonify({'success': False, **overloaded_body(e)}), 503, {
+            'Retry-After': str(e.retry_after)
+        }
 
+    except LLMUnavailableError:
+        logger.exception("Recommendation service unavailable")
         return jsonify({
-            'success': True,
-            'response': ai_response,
-            'convo_id': convo_id,
-        }), 200
+            'success': False,
+            'message': 'Recommendations are temporarily unavailable',
+            'error_code': 'SERVICE_UNAVAILABLE'
+        }), 503
 
     except Exception:
         logger.exception("Chat message error")
@@ -156,17 +507,216 @@ def send_message():
         }), 500
 
 
+@chat_bp.route('/jobs/<job_id>', methods=['GET'])
+def get_chat_job(job_id):
+    """
+    Get the status of an async chat job, optionally waiting for it to finish
+
+    Query params:
+        user_email: Email the job was submitted with
+        wait: Optional seconds to long-poll for completion (capped at
+              CHAT_JOB_MAX_WAIT_SECONDS)
+
+    Returns:
+        200: {"job_id", "status": queued | running | succeeded | failed}
+             plus "result" (the POST /api/chat/message body) on success,
+             or "message" and "error_code" on failure
+        400: Missing user_email or invalid wait
+        404: Unknown or expired job
+    """
+    user_email = request.args.get('user_email')
+    if not user_email:
+        return jsonify({
+            'success': False,
+            'message': 'user_email parameter is required',
+            'error_code': 'MISSING_USER_EMAIL'
+        }), 400
+
+    try:
+        wait = min(float(request.args.get('wait', 0)), current_app.config['CHAT_JOB_MAX_WAIT_SECONDS'])
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'message': 'wait must be a number of seconds',
+            'error_code': 'VALIDATION_ERROR'
+        }), 400
+
+    job = chat_jobs.store.wait(job_id, wait) if wait > 0 else chat_jobs.store.get(job_id)
+    if job is None or job['payload']['user_email'] != user_email:
+        return jsonify({
+            'success': False,
+            'message': 'Job not found',
+            'error_code': 'JOB_NOT_FOUND'
+        }), 404
+
+    body = {'success': True, 'job_id': job_id, 'status': job['status']}
+    if job['status'] == FAILED:
+        body.update(success=False, **job['error'])
+    elif job['result'] is not None:
+        body['result'] = job['result']
+    return jsonify(body), 200
+
+
+@chat_bp.route('/message/stream', methods=['POST'])
+@idempotent('chat.message.stream', idempotency_dal,
+            Config.IDEMPOTENCY_TTL_SECONDS, Config.IDEMPOTENCY_LOCK_SECONDS,
+            stream_done=stream_completed)
+def stream_message():
+    """
+    Send a chat message and stream the AI response as Server-Sent Events
+
+    Expected JSON: same as POST /api/chat/message
+
+    Events:
+        message: {"delta": "<text chunk>"} for each generated chunk
+        done:    {"convo_id": "...", "response": "<full text>", "source": "...",
+                 "recommendation": {...} | null} once the reply has been
+                 saved to the conversation; includes "debug" stage timings
+                 when the app runs in debug mode
+        error:   {"message": "...", "error_code": "..."} if generation fails;
+                 error_code LLM_OVERLOADED carries "retry_after" seconds
+
+    With an Idempotency-Key header, a repeat of a completed stream replays
+    its events in one response without generating again; a repeat while
+    the first is still streaming gets 409.
+
+    Returns:
+        200: text/event-stream
+        400: Validation error
+        409: Same Idempotency-Key still in progress
+        422: Idempotency-Key reused with a different request
+    """
+    data = request.get_json()
+
+    if not data:
+        return jsonify({
+            'success': False,
+            'message': 'No data provided',
+            'error_code': 'NO_DATA'
+        }), 400
+
+    # Validate input
+    is_valid, error_message = validate_chat_message(data)
+    if not is_valid:
+        return jsonify({
+            'success': False,
+            'message': error_message,
+            'error_code': 'VALIDATION_ERROR'
+        }), 400
+
+    user_email = data['user_email']
+    user_message = data['message']
+    convo_id = data.get('convo_id')
+    model_tier = data.get('model_tier')
+    debug = current_app.debug
+
+    def generate():
+        with start_trace() as trace:
+            yield from _generate(trace)
+
+    def _generate(trace):
+        chunks = []
+        source = 'ai'
+        try:
+            if convo_id:
+                wait_for_chat_writes((str(convo_id), user_email))
+            precomputed = None if convo_id else get_precomputed_recommendation(user_message)
+            if precomputed:
+                source = 'precomputed'
+                chunks = [precomputed]
+                yield format_sse({'delta': precomputed})
+            else:
+                try:
+                    for chunk in stream_movie_recommendations(
+                        user_message, user_email=user_email, convo_id=convo_id, top_k=5,
+                        model_tier=model_tier
+                    ):
+                        chunks.append(chunk)
+                        yield format_sse({'delta': chunk})
+                except LLMUnavailableError:
+                    fallback = get_fallback_recommendation(user_message)
+                    if fallback is None:
+                        raise
+                    logger.warning("LLM unavailable; streaming answer from vector search")
+                    source = 'fallback'
+                    chunks = [fallback]
+                    yield format_sse({'delta': fallback})
+
+            ai_response = ''.join(chunks)
+            recommendation = parse_recommendation(ai_response)
+            with span('persist'):
+                saved_convo_id = store_chat_exchange(
+                    user_email, convo_id, user_message, ai_response, source, recommendation
+                )
+        except LLMOverloadedError as e:
+            logger.warning("Chat stream shed: %s", e)
+            yield format_sse(overloaded_body(e), event='error')
+            return
+        except Exception:
+            logger.exception("Chat stream error")
+            yield format_sse({
+                'message': 'Internal server error',
+                'error_code': 'INTERNAL_ERROR'
+            }, event='error')
+            return
+
+        logger.info(f"Chat stream processed for user {user_email}")
+        done = {
+            'convo_id': saved_convo_id,
+            'response': ai_response,
+            'source': source,
+            'recommendation': recommendation
+        }
+        if debug:
+            done['debug'] = trace.to_dict()
+        yield format_sse(done, event='done')
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+
+# Fields never sent in the conversation list
+CONVERSATION_LIST_PROJECTION = {'messages': 0, 'summary': 0}
+
+
+def encode_conversation_cursor(convo: dict) -> str:
+    """Opaque list cursor from the last conversation on a page"""
+    updated_at = convo.get('updated_at')
+    return f"{updated_at.isoformat() if updated_at else ''}_{convo['_id']}"
+
+
+def decode_conversation_cursor(cursor: str):
+    """(updated_at, _id) for conversations_dal, or None if malformed"""
+    updated_at, sep, convo_id = cursor.partition('_')
+    if not sep or not convo_id:
+        return None
+    try:
+        updated_at = datetime.fromisoformat(updated_at) if updated_at else None
+    except ValueError:
+        return None
+    return updated_at, ObjectId(convo_id) if ObjectId.is_valid(convo_id) else convo_id
+
+
 @chat_bp.route('/conversations', methods=['GET'])
 def get_conversations():
     """
-    Get all conversations for a user
+    Get a page of a user's conversations, most recently updated first
 
     Query params:
         user_email: User's email address
+        limit: Optional page size (default CONVERSATION_LIST_PAGE_SIZE)
+        cursor: Optional next_cursor from the previous page
 
     Returns:
-        200: List of conversations
-        400: Missing user_email
+        200: List of conversations without messages, plus next_cursor
+             (null on the last page)
+        400: Missing user_email or invalid limit/cursor
         500: Server error
     """
     try:
@@ -179,22 +729,53 @@ def get_conversations():
                 'error_code': 'MISSING_USER_EMAIL'
             }), 400
 
-        # Find conversations for this user
-        user_convos = conversations_dal.find_conversations_by_user(user_email)
+        wait_for_chat_writes(user_email)
+
+        max_limit = current_app.config['CONVERSATION_MAX_PAGE_SIZE']
+        try:
+            limit = int(request.args.get('limit', current_app.config['CONVERSATION_LIST_PAGE_SIZE']))
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= max_limit:
+            return jsonify({
+                'success': False,
+                'message': f'limit must be between 1 and {max_limit}',
+                'error_code': 'INVALID_PAGINATION'
+            }), 400
 
-        # Remove messages from list view and convert ObjectId
+        before = None
+        cursor = request.args.get('cursor')
+        if cursor:
+            before = decode_conversation_cursor(cursor)
+            if before is None:
+                return jsonify({
+                    'success': False,
+                    'message': 'Invalid cursor',
+                    'error_code': 'INVALID_PAGINATION'
+                }), 400
+
+        # One extra row tells us whether another page exists
+        user_convos = conversations_dal.find_conversations_by_user(
+            user_email, CONVERSATION_LIST_PROJECTION, limit + 1, before
+        )
+        next_cursor = None
+        if len(user_convos) > limit:
+            user_convos = user_convos[:limit]
+            next_cursor = encode_conversation_cursor(user_convos[-1])
+
+        # Convert ObjectId
         for convo in user_convos:
             convo_id = str(convo['_id'])
             convo['_id'] = convo_id
             convo['convo_id'] = convo_id
-            convo.pop('messages', None)
 
         logger.info(f"Retrieved {len(user_convos)} conversations for {user_email}")
 
         return jsonify({
             'success': True,
             'conversations': user_convos,
-            'count': len(user_convos)
+            'count': len(user_convos),
+            'next_cursor': next_cursor
         }), 200
 
     except Exception:
@@ -209,17 +790,23 @@ def get_conversations():
 @chat_bp.route('/conversation/<convo_id>', methods=['GET'])
 def get_conversation(convo_id):
     """
-    Get a specific conversation with all messages
+    Get a specific conversation with all messages, or one page of them
 
     Path params:
         convo_id: Conversation's ObjectId (string)
 
     Query params:
         user_email: User's email address
+        limit: Optional page size; returns the latest `limit` messages
+        before: Optional message index; page of messages older than it
+        after: Optional message index; page of messages newer than it
 
     Returns:
-        200: Conversation details with messages
-        400: Missing user_email or invalid convo_id
+        200: Conversation details with messages. Paged requests also get
+             "page": {"offset", "count", "total", "before", "after"} where
+             before/after are the cursors for the adjacent pages (null at
+             either end)
+        400: Missing user_email, invalid convo_id or invalid page params
         404: Conversation not found
         500: Server error
     """
@@ -233,12 +820,26 @@ def get_conversation(convo_id):
                 'error_code': 'MISSING_USER_EMAIL'
             }), 400
 
+        wait_for_chat_writes((convo_id, user_email))
+
+        is_valid, error_message, page = validate_page_params(
+            request.args,
+            current_app.config['CONVERSATION_PAGE_SIZE'],
+            current_app.config['CONVERSATION_MAX_PAGE_SIZE']
+        )
+        if not is_valid:
+            return jsonify({
+                'success': False,
+                'message': error_message,
+                'error_code': 'INVALID_PAGINATION'
+            }), 400
+
         # Find conversation
         try:
             convo = conversations_dal.find_one_conversation({
                 '_id': ObjectId(convo_id),
                 'user_email': user_email
-            })
+            }, **(page or {}))
         except Exception:
             logger.exception("Invalid conversation ID format")
             return jsonify({
@@ -264,10 +865,22 @@ def get_conversation(convo_id):
 
         logger.info(f"Retrieved conversation {convo_id} for user {user_email}")
 
-        return jsonify({
+        body = {
             'success': True,
             'conversation': convo
-        }), 200
+        }
+        if page:
+            offset = convo.pop('message_offset', 0)
+            total = convo.pop('message_count', 0)
+            count = len(convo.get('messages', []))
+            body['page'] = {
+                'offset': offset,
+                'count': count,
+                'total': total,
+                'before': offset if offset > 0 else None,
+                'after': offset + count - 1 if offset + count < total else None,
+            }
+        return jsonify(body), 200
 
     except Exception:
         logger.exception("Get conversation error")
@@ -276,3 +889,59 @@ def get_conversation(convo_id):
             'message': 'Internal server error',
             'error_code': 'INTERNAL_ERROR'
         }), 500
+
+
+@chat_bp.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    """
+    Get recommendation cache, request coalescing and prompt cache counters
+
+    Returns:
+        200: Cache size, hit/miss/eviction counters and hit rate, upstream
+             calls made vs. saved by single-flight coalescing, and billed
+             input tokens and latency with vs. without cached instructions
+    """
+    return jsonify({
+        'success': True,
+        'cache': get_cache_stats(),
+        'single_flight': get_single_flight_stats(),
+        'prompt_cache': get_prompt_cache_stats()
+    }), 200
+
+
+@chat_bp.route('/models', methods=['GET'])
+def model_stats():
+    """
+    Get the model registry and per-model usage
+
+    Returns:
+        200: Registered tiers, routing defaults, and per-model call counts,
+             latency and token usage
+    """
+    return jsonify({
+        'success': True,
+        'models': get_model_stats()
+    }), 200
+
+
+@chat_bp.route('/metrics', methods=['GET'])
+def pipeline_metrics():
+    """
+    Get recommendation pipeline histograms
+
+    Returns:
+        200: Per-stage latency (retrieve, vector_search, history,
+             prompt_build, cache_lookup, precomputed_lookup, llm,
+             llm_first_token, persist, request) and token / prompt-size
+             distributions with p50/p90/p99 and cumulative buckets, plus
+             async job worker count, queue depth and jobs by status,
+             Gemini admission gauges (in flight, queued, shed), and the
+             write-behind backlog and write/retry/drop counts
+    """
+    return jsonify({
+        'success': True,
+        'metrics': get_pipeline_metrics(),
+        'jobs': chat_jobs.stats(),
+        'llm_admission': get_admission_stats(),
+        'write_behind': chat_persister.stats()
+    }), 200
@@ -4,7 +4,9 @@ Handles movie CRUD operations
 """
 from flask import Blueprint, request, jsonify
 from bson import ObjectId
-from DAL import movies_dal
+from config import Config
+from DAL import idempotency_dal, movies_dal
+from utils.idempotency import idempotent
 from utils.validators import validate_movie_data
 import logging
 from datetime import datetime
@@ -15,6 +17,8 @@ movies_bp = Blueprint('movies', __name__, url_prefix='/api/movies')
 
 
 @movies_bp.route('/add', methods=['POST'])
+@idempotent('movies.add', idempotency_dal,
+            Config.IDEMPOTENCY_TTL_SECONDS, Config.IDEMPOTENCY_LOCK_SECONDS)
 def add_movie():
     """
     Add a new movie to user's list
@@ -29,9 +33,14 @@ def add_movie():
             "runtime": 148
         }
     
+    Resubmitting with the same Idempotency-Key header returns the first
+    response instead of inserting the movie again.
+    
     Returns:
         201: Movie added successfully
         400: Validation error
+        409: Same Idempotency-Key still in progress
+        422: Idempotency-Key reused with a different request
         500: Server error
     """
     try:
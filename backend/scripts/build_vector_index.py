@@ -0,0 +1,27 @@
+import os
+import sys
+from urllib.parse import urlparse
+
+import weaviate
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from utils.vector_index import export_collection
+
+WEAVIATE_URL = os.getenv("WEAVIATE_URL", "http://weaviate:8080")
+parsed = urlparse(WEAVIATE_URL)
+client = weaviate.connect_to_local(host=parsed.hostname, port=parsed.port)
+
+collection_name = "Movies"
+collection = client.collections.get(collection_name)
+
+index = export_collection(
+    collection,
+    quantize=Config.VECTOR_INDEX_QUANTIZE,
+    path=Config.VECTOR_INDEX_PATH,
+)
+index.save()
+print(f"Exported {len(index)} vectors ({index.dimensions} dims) to {Config.VECTOR_INDEX_PATH}")
+
+client.close()
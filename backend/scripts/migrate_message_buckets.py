@@ -0,0 +1,69 @@
+"""
+Split embedded conversation messages into message buckets
+
+Conversations used to keep every message in one growing `messages` array.
+This moves each conversation's messages into fixed-size documents in
+message_buckets (see utils/message_buckets.py) and leaves a header with
+message_count. Run it once while the backend is stopped, before starting a
+version that reads buckets:
+
+    python scripts/migrate_message_buckets.py --dry-run
+    python scripts/migrate_message_buckets.py
+
+Safe to re-run: only conversations that still have a `messages` array are
+touched, and their buckets are rewritten from scratch.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from DAL import db_app, messages_dal
+from utils.message_buckets import MESSAGE_BUCKET_SIZE
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--dry-run", action="store_true",
+                        help="report what would be migrated without writing")
+    parser.add_argument("--limit", type=int, default=0,
+                        help="migrate at most N conversations (0 = all)")
+    return parser.parse_args()
+
+
+def migrate_conversation(convo, dry_run=False):
+    """Move one conversation's embedded messages into buckets; returns message count"""
+    messages = convo.get("messages") or []
+    if dry_run:
+        return len(messages)
+
+    messages_dal.delete_conversation_messages(convo["_id"])
+    if messages and not messages_dal.append_conversation_messages(convo["_id"], 0, messages):
+        raise RuntimeError(f"could not write buckets for conversation {convo['_id']}")
+    db_app.conversations.update_one(
+        {"_id": convo["_id"]},
+        {"$set": {"message_count": len(messages)}, "$unset": {"messages": ""}},
+    )
+    return len(messages)
+
+
+def main():
+    args = parse_args()
+    cursor = db_app.conversations.find({"messages": {"$exists": True}}).limit(args.limit)
+
+    conversations = messages = 0
+    for convo in cursor:
+        try:
+            messages += migrate_conversation(convo, args.dry_run)
+            conversations += 1
+        except Exception as e:
+            print(f"Skipping conversation {convo['_id']}: {e}")
+
+    action = "Would migrate" if args.dry_run else "Migrated"
+    print(f"{action} {conversations} conversations, {messages} messages "
+          f"({MESSAGE_BUCKET_SIZE} messages per bucket)")
+
+
+if __name__ == "__main__":
+    main()
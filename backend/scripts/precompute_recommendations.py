@@ -0,0 +1,59 @@
+"""
+Precompute recommendations for popular queries
+
+Queries come from a file (one per line) or are mined from the opening
+messages of stored conversations. Answers are written to the precomputed
+table that POST /api/chat/message checks before calling Gemini. Run it
+off-peak, e.g. from cron:
+
+    python scripts/precompute_recommendations.py
+    python scripts/precompute_recommendations.py --queries-file queries.txt
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from DAL import conversations_dal
+from ml_client import get_movie_recommendations, store_precomputed_recommendation
+from utils.precompute import mine_popular_queries, precompute, read_query_file
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries-file", help="file with one query per line")
+    parser.add_argument("--top", type=int, default=Config.PRECOMPUTE_TOP_N,
+                        help="number of mined queries to precompute")
+    parser.add_argument("--min-count", type=int, default=Config.PRECOMPUTE_MIN_COUNT,
+                        help="minimum times a mined query must have been asked")
+    parser.add_argument("--scan", type=int, default=0,
+                        help="only mine the most recent N conversations (0 = all)")
+    parser.add_argument("--workers", type=int, default=Config.PRECOMPUTE_WORKERS)
+    parser.add_argument("--rate", type=float, default=Config.PRECOMPUTE_RATE_PER_SECOND,
+                        help="max Gemini calls per second")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.queries_file:
+        queries = read_query_file(args.queries_file)
+    else:
+        openers = conversations_dal.find_opening_messages(args.scan)
+        queries = mine_popular_queries(openers, top_n=args.top, min_count=args.min_count)
+
+    print(f"Precomputing {len(queries)} queries with {args.workers} workers at {args.rate}/s")
+    stats = precompute(
+        queries,
+        compute_fn=get_movie_recommendations,
+        store_fn=store_precomputed_recommendation,
+        workers=args.workers,
+        rate_per_second=args.rate,
+    )
+    print(f"Stored {stats['stored']} of {stats['queries']} ({stats['failed']} failed)")
+
+
+if __name__ == "__main__":
+    main()
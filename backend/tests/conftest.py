@@ -22,6 +22,21 @@ def mock_ml_services():
         yield {'recommendations': mock_rec}
 
 
+class FakeClock:
+    """Stand-in for time.monotonic/time.time; advance it by setting now"""
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """Manually advanced clock for time-dependent components"""
+    return FakeClock()
+
+
 @pytest.fixture
 def sample_chat_message():
     """Sample chat message for testing"""
@@ -1,6 +1,7 @@
 """
 Unit tests for the Data Access Layer (DAL)
-Tests all DAL classes: users_dal, movies_dal, messages_dal, conversations_dal
+Tests all DAL classes: users_dal, movies_dal, messages_dal, conversations_dal,
+precomputed_dal
 """
 import os
 import sys
@@ -18,6 +19,7 @@ from backend.DAL import (
     movies_dal,
     messages_dal,
     conversations_dal,
+    precomputed_dal,
     db_app,
     db_vector,
 )
@@ -31,6 +33,8 @@ def reset_databases():
     db_app.movies[:] = []
     db_app.messages[:] = []
     db_app.conversations[:] = []
+    db_app.message_buckets[:] = []
+    db_app.precomputed[:] = []
     db_vector.users[:] = []
     db_vector.movies[:] = []
     db_vector.messages[:] = []
@@ -41,6 +45,8 @@ def reset_databases():
     db_app.movies[:] = []
     db_app.messages[:] = []
     db_app.conversations[:] = []
+    db_app.message_buckets[:] = []
+    db_app.precomputed[:] = []
     db_vector.users[:] = []
     db_vector.movies[:] = []
     db_vector.messages[:] = []
@@ -462,6 +468,28 @@ class TestConversationsDAL:
         user_convos = conversations_dal.find_conversations_by_user("same@example.com")
         assert len(user_convos) == 2
     
+    def test_find_conversations_by_user_recent_first_without_messages(self):
+        """Test recency order, projection and cursor paging of the list"""
+        for day in (3, 1, 2):
+            conversations_dal.insert_one_conversation({
+                "user_email": "list@example.com",
+                "updated_at": datetime(2025, 1, day),
+                "messages": [{"content": "hi", "role": "user"}]
+            })
+
+        first_page = conversations_dal.find_conversations_by_user(
+            "list@example.com", {"messages": 0}, limit=2
+        )
+        assert [c["updated_at"].day for c in first_page] == [3, 2]
+        assert all("messages" not in c for c in first_page)
+
+        last = first_page[-1]
+        second_page = conversations_dal.find_conversations_by_user(
+            "list@example.com", {"messages": 0}, limit=2,
+            before=(last["updated_at"], last["_id"])
+        )
+        assert [c["updated_at"].day for c in second_page] == [1]
+
     def test_find_conversations_by_user_empty(self):
         """Test finding conversations by user when none exist"""
         user_convos = conversations_dal.find_conversations_by_user("nonexistent@example.com")
@@ -492,45 +520,171 @@ class TestConversationsDAL:
         )
         assert updated is False
     
-    def test_add_message_to_conversation(self):
-        """Test adding a message to a conversation"""
-        conversation_data = {
-            "user_email": "addmsg@example.com",
-            "convo_id": 40
-        }
-        conversations_dal.insert_one_conversation(conversation_data)
-        
-        message_data = {"content": "New message", "role": "user", "timestamp": datetime.now()}
-        added = conversations_dal.add_message_to_conversation(40, message_data)
-        assert added is True
-        
-        found_convo = conversations_dal.find_one_conversation({"convo_id": 40})
-        assert len(found_convo["messages"]) == 1
-        assert found_convo["messages"][0]["content"] == "New message"
-    
-    def test_add_message_to_conversation_not_found(self):
-        """Test adding a message to a conversation that doesn't exist"""
-        message_data = {"content": "Test", "role": "user"}
-        added = conversations_dal.add_message_to_conversation(999, message_data)
-        assert added is False
-    
-    def test_add_multiple_messages_to_conversation(self):
-        """Test adding multiple messages to a conversation"""
-        conversation_data = {
-            "user_email": "multi@example.com",
-            "convo_id": 50
-        }
-        conversations_dal.insert_one_conversation(conversation_data)
-        
-        msg1 = {"content": "First", "role": "user", "timestamp": datetime.now()}
-        msg2 = {"content": "Second", "role": "model", "timestamp": datetime.now()}
-        
-        conversations_dal.add_message_to_conversation(50, msg1)
-        conversations_dal.add_message_to_conversation(50, msg2)
-        
-        found_convo = conversations_dal.find_one_conversation({"convo_id": 50})
-        assert len(found_convo["messages"]) == 2
+    def test_find_one_conversation_latest_page(self):
+        """Test fetching only the latest window of messages"""
+        convo_id = conversations_dal.insert_one_conversation({
+            "user_email": "page@example.com",
+            "messages": [{"content": str(i), "role": "user"} for i in range(10)]
+        })
+
+        convo = conversations_dal.find_one_conversation({"_id": convo_id}, limit=4)
+        assert [m["content"] for m in convo["messages"]] == ["6", "7", "8", "9"]
+        assert convo["message_offset"] == 6
+        assert convo["message_count"] == 10
+
+    def test_find_one_conversation_before_and_after(self):
+        """Test paging backwards and forwards from a message index"""
+        convo_id = conversations_dal.insert_one_conversation({
+            "user_email": "page@example.com",
+            "messages": [{"content": str(i), "role": "user"} for i in range(10)]
+        })
+
+        older = conversations_dal.find_one_conversation({"_id": convo_id}, limit=4, before=2)
+        assert [m["content"] for m in older["messages"]] == ["0", "1"]
+        assert older["message_offset"] == 0
+
+        newer = conversations_dal.find_one_conversation({"_id": convo_id}, limit=4, after=7)
+        assert [m["content"] for m in newer["messages"]] == ["8", "9"]
+        assert newer["message_offset"] == 8
+
+    def test_long_conversation_is_bucketed(self):
+        """Test that messages are split into fixed-size buckets behind the DAL"""
+        convo_id = conversations_dal.insert_one_conversation({
+            "user_email": "long@example.com",
+            "messages": [{"content": str(i), "role": "user"} for i in range(60)]
+        })
+        conversations_dal.append_messages(
+            {"_id": convo_id},
+            [{"content": str(i), "role": "user"} for i in range(60, 105)]
+        )
+
+        buckets = [b for b in db_app.message_buckets if b["convo_id"] == convo_id]
+        assert sorted(b["count"] for b in buckets) == [5, 50, 50]
+        assert "messages" not in db_app.conversations[-1]
+
+        convo = conversations_dal.find_one_conversation({"_id": convo_id})
+        assert [m["content"] for m in convo["messages"]] == [str(i) for i in range(105)]
+        assert all("n" not in m for m in convo["messages"])
+        assert convo["message_count"] == 105
+
+        page = conversations_dal.find_one_conversation({"_id": convo_id}, limit=10, before=55)
+        assert [m["content"] for m in page["messages"]] == [str(i) for i in range(45, 55)]
+
+    def test_delete_conversation_removes_buckets(self):
+        """Test that deleting a conversation deletes its message buckets"""
+        convo_id = conversations_dal.insert_one_conversation({
+            "user_email": "gone@example.com",
+            "messages": [{"content": "bye", "role": "user"}]
+        })
+        assert conversations_dal.delete_one_conversation({"_id": convo_id}) is True
+        assert not [b for b in db_app.message_buckets if b["convo_id"] == convo_id]
+
+    def test_append_messages(self):
+        """Test pushing an exchange, updated_at and counter in one update"""
+        convo_id = conversations_dal.insert_one_conversation({
+            "user_email": "append@example.com",
+            "messages": [{"content": "Hi", "role": "user"}],
+            "message_count": 1
+        })
+        updated_at = datetime(2025, 1, 1)
+
+        appended = conversations_dal.append_messages(
+            {"_id": convo_id, "user_email": "append@example.com"},
+            [{"content": "Q", "role": "user"}, {"content": "A", "role": "model"}],
+            updated_at
+        )
+        assert appended is True
+
+        found_convo = conversations_dal.find_one_conversation({"_id": convo_id})
+        assert [m["content"] for m in found_convo["messages"]] == ["Hi", "Q", "A"]
+        assert found_convo["message_count"] == 3
+        assert found_convo["updated_at"] == updated_at
+
+    def test_append_messages_wrong_owner(self):
+        """Test that appending requires the conversation owner's email"""
+        convo_id = conversations_dal.insert_one_conversation({
+            "user_email": "owner@example.com"
+        })
+        appended = conversations_dal.append_messages(
+            {"_id": convo_id, "user_email": "other@example.com"},
+            [{"content": "Q", "role": "user"}],
+            datetime.now()
+        )
+        assert appended is False
+        assert conversations_dal.find_one_conversation({"_id": convo_id})["messages"] == []
+    
+    def test_insert_conversation_headers_is_repeatable(self):
+        """Test that re-inserting headers with their own _id is a no-op"""
+        header = {"_id": "wb_1", "user_email": "wb@example.com", "message_count": 2}
+        assert conversations_dal.insert_conversation_headers([header]) is True
+        assert conversations_dal.insert_conversation_headers([header]) is True
+        assert len([c for c in db_app.conversations if c["_id"] == "wb_1"]) == 1
+        assert conversations_dal.conversation_exists({"_id": "wb_1", "user_email": "wb@example.com"})
+        assert not conversations_dal.conversation_exists({"_id": "wb_1", "user_email": "x@example.com"})
+
+    def test_reserve_messages(self):
+        """Test reserving message indices on a conversation header"""
+        convo_id = conversations_dal.insert_one_conversation({
+            "user_email": "reserve@example.com",
+            "messages": [{"content": "Hi", "role": "user"}]
+        })
+        filter = {"_id": convo_id, "user_email": "reserve@example.com"}
+        assert conversations_dal.reserve_messages(filter, 2) == (convo_id, 1)
+        assert conversations_dal.reserve_messages(filter, 1) == (convo_id, 3)
+        assert conversations_dal.reserve_messages({"_id": "missing"}, 1) is None
+
+    def test_repeated_bucket_append_is_ignored(self):
+        """Test that retrying an append does not store its messages twice"""
+        appends = [("convo_a", 0, [{"content": "Q"}, {"content": "A"}]), ("convo_b", 0, [{"content": "Hi"}])]
+        assert messages_dal.append_many_conversation_messages(appends) is True
+        assert messages_dal.append_many_conversation_messages(appends) is True
+        assert [m["content"] for m in messages_dal.find_conversation_messages("convo_a", 0, 10)] == ["Q", "A"]
+        assert [m["content"] for m in messages_dal.find_conversation_messages("convo_b", 0, 10)] == ["Hi"]
+
+    def test_find_conversation_memory(self):
+        """Test fetching summary fields, message count and unsummarized messages"""
+        conversations_dal.insert_one_conversation({
+            "user_email": "memory@example.com",
+            "convo_id": 56,
+            "summary": "Likes thrillers",
+            "summarized_count": 2,
+            "messages": [{"content": str(i), "role": "user"} for i in range(6)]
+        })
+
+        memory = conversations_dal.find_conversation_memory({"convo_id": 56}, 2)
+        assert memory["summary"] == "Likes thrillers"
+        assert memory["summarized_count"] == 2
+        assert memory["message_count"] == 6
+        assert [m["content"] for m in memory["messages"]] == ["2", "3", "4", "5"]
+
+        capped = conversations_dal.find_conversation_memory({"convo_id": 56}, 2, max_messages=3)
+        assert [m["content"] for m in capped["messages"]] == ["3", "4", "5"]
+
+    def test_find_message_range(self):
+        """Test fetching a slice of messages by index"""
+        conversations_dal.insert_one_conversation({
+            "user_email": "range@example.com",
+            "convo_id": 57,
+            "messages": [{"content": str(i), "role": "user"} for i in range(6)]
+        })
+
+        messages = conversations_dal.find_message_range({"convo_id": 57}, 1, 3)
+        assert [m["content"] for m in messages] == ["1", "2", "3"]
     
+    def test_find_opening_messages(self):
+        """Test fetching the first message of each conversation, newest first"""
+        conversations_dal.insert_one_conversation({
+            "messages": [{"content": "80s horror", "role": "user"}, {"content": "x", "role": "model"}]
+        })
+        conversations_dal.insert_one_conversation({"messages": []})
+        conversations_dal.insert_one_conversation({
+            "messages": [{"content": "feel-good comedy", "role": "user"}]
+        })
+
+        openers = conversations_dal.find_opening_messages()
+        assert [m["content"] for m in openers] == ["feel-good comedy", "80s horror"]
+        assert len(conversations_dal.find_opening_messages(1)) == 1
+
     def test_delete_one_conversation(self):
         """Test deleting a conversation"""
         conversation_data = {
@@ -550,3 +704,27 @@ class TestConversationsDAL:
         deleted = conversations_dal.delete_one_conversation({"convo_id": 999})
         assert deleted is False
 
+
+# ============ Precomputed DAL Tests ============
+
+class TestPrecomputedDAL:
+    """Test precomputed_dal class"""
+
+    def test_upsert_and_find(self):
+        """Test inserting then replacing a precomputed answer"""
+        assert precomputed_dal.upsert_one_precomputed("80s horror", {"response": "A"}) is True
+        assert precomputed_dal.upsert_one_precomputed("80s horror", {"response": "B"}) is True
+
+        found = precomputed_dal.find_one_precomputed("80s horror")
+        assert found["response"] == "B"
+        assert len(db_app.precomputed) == 1
+
+    def test_find_not_found(self):
+        """Test finding a query with no precomputed answer"""
+        assert precomputed_dal.find_one_precomputed("missing") is None
+
+    def test_delete(self):
+        """Test deleting a precomputed answer"""
+        precomputed_dal.upsert_one_precomputed("80s horror", {"response": "A"})
+        assert precomputed_dal.delete_one_precomputed("80s horror") is True
+        assert precomputed_dal.delete_one_precomputed("80s horror") is False
@@ -0,0 +1,90 @@
+# Unit tests for the LLM admission controller
+import os
+import sys
+import threading
+import time
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from backend.utils.admission import AdmissionController, AdmissionRejected
+
+
+def hold(controller, release, entered=None):
+    def run():
+        with controller.admit():
+            if entered:
+                entered.set()
+            release.wait(2)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+class TestAdmissionController:
+    def test_admits_up_to_limit(self):
+        controller = AdmissionController(max_concurrency=2)
+        with controller.admit(), controller.admit():
+            assert controller.stats()['in_flight'] == 2
+        assert controller.stats()['in_flight'] == 0
+
+    def test_full_queue_rejects_immediately(self):
+        controller = AdmissionController(max_concurrency=1, max_queue=0, default_retry_after=7)
+        release, entered = threading.Event(), threading.Event()
+        thread = hold(controller, release, entered)
+        entered.wait(2)
+
+        start = time.monotonic()
+        with pytest.raises(AdmissionRejected) as exc:
+            with controller.admit():
+                pass
+        release.set()
+        thread.join()
+
+        assert time.monotonic() - start < 0.1
+        assert exc.value.reason == 'queue_full'
+        assert exc.value.retry_after == 7
+        assert controller.stats()['rejected_queue_full'] == 1
+
+    def test_queued_caller_times_out(self):
+        controller = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=0.05)
+        release, entered = threading.Event(), threading.Event()
+        thread = hold(controller, release, entered)
+        entered.wait(2)
+
+        with pytest.raises(AdmissionRejected) as exc:
+            with controller.admit():
+                pass
+        release.set()
+        thread.join()
+
+        assert exc.value.reason == 'queue_timeout'
+        assert controller.stats()['queued'] == 0
+
+    def test_queued_caller_admitted_when_slot_frees(self):
+        controller = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=2)
+        release, entered = threading.Event(), threading.Event()
+        thread = hold(controller, release, entered)
+        entered.wait(2)
+        threading.Timer(0.05, release.set).start()
+
+        with controller.admit():
+            assert controller.stats()['in_flight'] == 1
+        thread.join()
+        assert controller.stats()['admitted'] == 2
+
+    def test_retry_after_tracks_hold_time(self):
+        clock = [0.0]
+        controller = AdmissionController(max_concurrency=1, max_queue=0, clock=lambda: clock[0])
+        with controller.admit():
+            clock[0] += 4.0
+        with controller.admit():
+            with pytest.raises(AdmissionRejected) as exc:
+                with controller.admit():
+                    pass
+        assert exc.value.retry_after == 4
+
+    def test_zero_concurrency_is_unlimited(self):
+        controller = AdmissionController(max_concurrency=0)
+        with controller.admit(), controller.admit(), controller.admit():
+            assert controller.stats()['in_flight'] == 3
@@ -1,9 +1,11 @@
 # Unit tests for chat routes
+import json
 import os
 import sys
 import pytest
 from unittest.mock import patch, MagicMock
 from bson import ObjectId
+from datetime import datetime
 
 # Add backend directory to path
 backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -12,6 +14,9 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../.
 
 os.environ["TESTING"] = "1"
 from app import create_app
+from ml_client import LLMOverloadedError, LLMUnavailableError
+from utils.metrics import record
+from utils.write_behind import BacklogFull
 
 
 @pytest.fixture
@@ -51,7 +56,7 @@ class TestSendMessage:
              patch('routes.chat.conversations_dal') as mock_dal:
             mock_validate.return_value = (True, None)
             mock_ai.return_value = {'response': 'Here are some recommendations', 'source': 'mock'}
-            mock_dal.update_one_conversation.return_value = True
+            mock_dal.append_messages.return_value = True
             
             response = client.post('/api/chat/message', json={
                 'user_email': 'john@example.com',
@@ -62,7 +67,114 @@ class TestSendMessage:
             })
             
             assert response.status_code == 200
+            filter, messages, _ = mock_dal.append_messages.call_args[0]
+            assert filter == {'_id': ObjectId(convo_id), 'user_email': 'john@example.com'}
+            assert [m['role'] for m in messages] == ['user', 'model']
+            mock_dal.update_one_conversation.assert_not_called()
+            mock_dal.insert_one_conversation.assert_not_called()
     
+    def test_send_message_llm_unavailable_uses_fallback(self, client):
+        with patch('routes.chat.get_movie_recommendations') as mock_rec, \
+             patch('routes.chat.get_fallback_recommendation') as mock_fallback, \
+             patch('routes.chat.conversations_dal') as mock_dal:
+            mock_rec.side_effect = LLMUnavailableError("gemini circuit is open")
+            mock_fallback.return_value = "Movie Name: Alien\nRuntime: unknown\nDescription: Space."
+            mock_dal.insert_one_conversation.return_value = "convo_123"
+
+            response = client.post('/api/chat/message', json={
+                'user_email': 'john@example.com',
+                'message': 'space horror'
+            })
+
+            assert response.status_code == 200
+            data = response.get_json()
+            assert data['source'] == 'fallback'
+            assert data['response'].startswith('Movie Name: Alien')
+            assert data['recommendation'] == {
+                'title': 'Alien', 'runtime_minutes': None, 'description': 'Space.'
+            }
+
+    def test_send_message_returns_typed_recommendation(self, client):
+        with patch('routes.chat.get_movie_recommendations') as mock_rec, \
+             patch('routes.chat.conversations_dal') as mock_dal:
+            mock_rec.return_value = "Movie Name: Heat\nRuntime: 170 minutes\nDescription: Cops and robbers."
+            mock_dal.insert_one_conversation.return_value = "convo_123"
+
+            response = client.post('/api/chat/message', json={
+                'user_email': 'john@example.com',
+                'message': 'a heist movie'
+            })
+
+            recommendation = {'title': 'Heat', 'runtime_minutes': 170, 'description': 'Cops and robbers.'}
+            assert response.get_json()['recommendation'] == recommendation
+            saved = mock_dal.insert_one_conversation.call_args[0][0]
+            assert saved['messages'][1]['recommendation'] == recommendation
+
+    def test_send_message_free_text_has_no_recommendation(self, client):
+        with patch('routes.chat.get_movie_recommendations', return_value='Could you tell me more?'), \
+             patch('routes.chat.conversations_dal') as mock_dal:
+            mock_dal.insert_one_conversation.return_value = "convo_123"
+
+            response = client.post('/api/chat/message', json={
+                'user_email': 'john@example.com',
+                'message': 'hmm'
+            })
+
+            assert response.get_json()['recommendation'] is None
+            saved = mock_dal.insert_one_conversation.call_args[0][0]
+            assert 'recommendation' not in saved['messages'][1]
+
+    def test_send_message_llm_and_fallback_unavailable(self, client):
+        with patch('routes.chat.get_movie_recommendations') as mock_rec, \
+             patch('routes.chat.get_fallback_recommendation') as mock_fallback:
+            mock_rec.side_effect = LLMUnavailableError("gemini circuit is open")
+            mock_fallback.return_value = None
+
+            response = client.post('/api/chat/message', json={
+                'user_email': 'john@example.com',
+                'message': 'space horror'
+            })
+
+            assert response.status_code == 503
+            assert response.get_json()['error_code'] == 'SERVICE_UNAVAILABLE'
+
+    def test_send_message_uses_precomputed_for_opening_message(self, client):
+        with patch('routes.chat.get_precomputed_recommendation') as mock_pre, \
+             patch('routes.chat.get_movie_recommendations') as mock_rec, \
+             patch('routes.chat.conversations_dal') as mock_dal:
+            mock_pre.return_value = "Movie Name: Airplane!\nRuntime: 88 minutes\nDescription: Surely."
+            mock_dal.insert_one_conversation.return_value = "convo_123"
+
+            response = client.post('/api/chat/message', json={
+                'user_email': 'john@example.com',
+                'message': 'feel-good comedy'
+            })
+
+            data = response.get_json()
+            assert data['source'] == 'precomputed'
+            assert data['recommendation']['title'] == 'Airplane!'
+            mock_rec.assert_not_called()
+
+    def test_send_message_skips_precomputed_mid_conversation(self, client):
+        with patch('routes.chat.get_precomputed_recommendation') as mock_pre, \
+             patch('routes.chat.get_movie_recommendations', return_value='Try Airplane!'), \
+             patch('routes.chat.conversations_dal') as mock_dal:
+            mock_dal.append_messages.return_value = True
+            convo_id = str(ObjectId())
+
+            response = client.post('/api/chat/message', json={
+                'user_email': 'john@example.com',
+                'message': 'feel-good comedy',
+                'convo_id': convo_id
+            })
+
+            assert response.get_json()['source'] == 'ai'
+            mock_pre.assert_not_called()
+            filter, messages, _ = mock_dal.append_messages.call_args[0]
+            assert filter == {'_id': ObjectId(convo_id), 'user_email': 'john@example.com'}
+            assert [m['content'] for m in messages] == ['feel-good comedy', 'Try Airplane!']
+            mock_dal.insert_one_conversation.assert_not_called()
+
     def test_send_message_no_data(self, client):
         response = client.post('/api/chat/message', json={})
         assert response.status_code == 400
@@ -87,7 +199,7 @@ class TestSendMessage:
              patch('routes.chat.conversations_dal') as mock_dal:
             mock_validate.return_value = (True, None)
             mock_ai.return_value = {'response': 'Here are some recommendations', 'source': 'mock'}
-            mock_dal.update_one_conversation.return_value = False
+            mock_dal.append_messages.return_value = False
             mock_dal.insert_one_conversation.return_value = "convo_123"
             
             response = client.post('/api/chat/message', json={
@@ -101,6 +213,48 @@ class TestSendMessage:
             assert response.status_code == 200
 
 
+class TestStreamMessage:
+    def test_stream_message_success(self, client):
+        with patch('routes.chat.stream_movie_recommendations') as mock_stream, \
+             patch('routes.chat.conversations_dal') as mock_dal:
+            mock_stream.return_value = iter(['Movie Name: ', 'Alien'])
+            mock_dal.insert_one_conversation.return_value = "convo_123"
+
+            response = client.post('/api/chat/message/stream', json={
+                'user_email': 'john@example.com',
+                'message': 'Something scary'
+            })
+
+            assert response.status_code == 200
+            assert response.mimetype == 'text/event-stream'
+            body = response.get_data(as_text=True)
+            assert 'data: {"delta": "Movie Name: "}' in body
+            assert 'event: done' in body
+            assert '"convo_id": "convo_123"' in body
+            saved = mock_dal.insert_one_conversation.call_args[0][0]
+            assert saved['messages'][1]['content'] == 'Movie Name: Alien'
+
+    def test_stream_message_generation_error(self, client):
+        def failing_stream(*args, **kwargs):
+            yield 'Movie'
+            raise RuntimeError("upstream closed")
+
+        with patch('routes.chat.stream_movie_recommendations', side_effect=failing_stream), \
+             patch('routes.chat.conversations_dal') as mock_dal:
+            response = client.post('/api/chat/message/stream', json={
+                'user_email': 'john@example.com',
+                'message': 'Something scary'
+            })
+
+            body = response.get_data(as_text=True)
+            assert 'event: error' in body
+            mock_dal.insert_one_conversation.assert_not_called()
+
+    def test_stream_message_no_data(self, client):
+        response = client.post('/api/chat/message/stream', json={})
+        assert response.status_code == 400
+
+
 class TestGetConversations:
     def test_get_conversations_success(self, client):
         with patch('routes.chat.conversations_dal') as mock_dal:
@@ -116,6 +270,39 @@ class TestGetConversations:
             assert data['success'] is True
             assert data['count'] == 2
     
+    def test_get_conversations_paged(self, client):
+        updated_at = datetime(2025, 3, 1, 12, 0)
+        ids = [ObjectId() for _ in range(3)]
+        with patch('routes.chat.conversations_dal') as mock_dal:
+            mock_dal.find_conversations_by_user.return_value = [
+                {'_id': convo_id, 'user_email': 'john@example.com', 'updated_at': updated_at}
+                for convo_id in ids
+            ]
+
+            response = client.get('/api/chat/conversations?user_email=john@example.com&limit=2')
+
+            data = response.get_json()
+            assert data['count'] == 2
+            assert data['next_cursor'] == f"{updated_at.isoformat()}_{ids[1]}"
+            args = mock_dal.find_conversations_by_user.call_args[0]
+            assert args == ('john@example.com', {'messages': 0, 'summary': 0}, 3, None)
+
+            client.get(f"/api/chat/conversations?user_email=john@example.com&cursor={data['next_cursor']}")
+            assert mock_dal.find_conversations_by_user.call_args[0][3] == (updated_at, ids[1])
+
+    def test_get_conversations_last_page(self, client):
+        with patch('routes.chat.conversations_dal') as mock_dal:
+            mock_dal.find_conversations_by_user.return_value = [
+                {'_id': ObjectId(), 'user_email': 'john@example.com'}
+            ]
+            response = client.get('/api/chat/conversations?user_email=john@example.com')
+            assert response.get_json()['next_cursor'] is None
+
+    def test_get_conversations_invalid_cursor(self, client):
+        response = client.get('/api/chat/conversations?user_email=john@example.com&cursor=garbage')
+        assert response.status_code == 400
+        assert response.get_json()['error_code'] == 'INVALID_PAGINATION'
+
     def test_get_conversations_missing_email(self, client):
         response = client.get('/api/chat/conversations')
         assert response.status_code == 400
@@ -140,6 +327,37 @@ class TestGetConversation:
             data = response.get_json()
             assert data['success'] is True
     
+    def test_get_conversation_page(self, client):
+        convo_id = str(ObjectId())
+        with patch('routes.chat.conversations_dal') as mock_dal:
+            mock_dal.find_one_conversation.return_value = {
+                '_id': ObjectId(convo_id),
+                'user_email': 'john@example.com',
+                'messages': [{'content': str(i), 'role': 'user'} for i in range(80, 100)],
+                'message_count': 120,
+                'message_offset': 80
+            }
+
+            response = client.get(
+                f'/api/chat/conversation/{convo_id}?user_email=john@example.com&limit=20&before=100'
+            )
+
+            assert response.status_code == 200
+            data = response.get_json()
+            assert data['page'] == {'offset': 80, 'count': 20, 'total': 120, 'before': 80, 'after': 99}
+            assert 'message_offset' not in data['conversation']
+            assert mock_dal.find_one_conversation.call_args.kwargs == {
+                'limit': 20, 'before': 100, 'after': None
+            }
+
+    def test_get_conversation_invalid_page(self, client):
+        convo_id = str(ObjectId())
+        response = client.get(
+            f'/api/chat/conversation/{convo_id}?user_email=john@example.com&before=1&after=2'
+        )
+        assert response.status_code == 400
+        assert response.get_json()['error_code'] == 'INVALID_PAGINATION'
+
     def test_get_conversation_missing_email(self, client):
         convo_id = str(ObjectId())
         response = client.get(f'/api/chat/conversation/{convo_id}')
@@ -158,3 +376,319 @@ class TestGetConversation:
             
             assert response.status_code == 404
 
+
+
+class TestCacheStats:
+    def test_cache_stats(self, client):
+        with patch('routes.chat.get_cache_stats') as mock_stats, \
+             patch('routes.chat.get_single_flight_stats') as mock_sf_stats, \
+             patch('routes.chat.get_prompt_cache_stats') as mock_pc_stats:
+            mock_stats.return_value = {'size': 0, 'hits': 0, 'misses': 0}
+            mock_sf_stats.return_value = {'in_flight': 0, 'upstream_calls': 3, 'coalesced': 7}
+            mock_pc_stats.return_value = {'created': 1, 'usage': {}}
+
+            response = client.get('/api/chat/cache/stats')
+
+            assert response.status_code == 200
+            data = response.get_json()
+            assert data['success'] is True
+            assert data['cache']['hits'] == 0
+            assert data['single_flight']['coalesced'] == 7
+            assert data['prompt_cache']['created'] == 1
+
+
+class TestModelStats:
+    def test_model_stats(self, client):
+        with patch('routes.chat.get_model_stats') as mock_stats:
+            mock_stats.return_value = {'models': {'flash': 'gemini-2.5-flash'}, 'usage': {}}
+
+            response = client.get('/api/chat/models')
+
+            assert response.status_code == 200
+            assert response.get_json()['models']['models']['flash'] == 'gemini-2.5-flash'
+
+
+class TestPipelineMetrics:
+    def test_debug_response_includes_trace(self, client):
+        def recommend(*args, **kwargs):
+            record('prompt_tokens', 321)
+            return {'response': 'Movie Name: Heat', 'source': 'ai'}
+
+        with patch('routes.chat.get_ai_recommendation', side_effect=recommend), \
+             patch('routes.chat.conversations_dal') as mock_dal:
+            mock_dal.insert_one_conversation.return_value = "convo_123"
+            response = client.post('/api/chat/message', json={
+                'user_email': 'john@example.com',
+                'message': 'A heist movie'
+            })
+
+        debug = response.get_json()['debug']
+        assert set(debug['stage_ms']) == {'request', 'persist'}
+        assert debug['prompt_tokens'] == 321
+
+    def test_no_trace_outside_debug(self):
+        app = create_app('testing')
+        app.config['DEBUG'] = False
+        with patch('routes.chat.get_ai_recommendation') as mock_ai, \
+             patch('routes.chat.conversations_dal') as mock_dal:
+            mock_ai.return_value = {'response': 'Movie Name: Heat', 'source': 'ai'}
+            mock_dal.insert_one_conversation.return_value = "convo_123"
+            response = app.test_client().post('/api/chat/message', json={
+                'user_email': 'john@example.com',
+                'message': 'A heist movie'
+            })
+
+        assert 'debug' not in response.get_json()
+
+    def test_stream_done_event_includes_trace(self, client):
+        with patch('routes.chat.stream_movie_recommendations') as mock_stream, \
+             patch('routes.chat.conversations_dal') as mock_dal:
+            mock_stream.return_value = iter(['Movie Name: ', 'Alien'])
+            mock_dal.insert_one_conversation.return_value = "convo_123"
+            response = client.post('/api/chat/message/stream', json={
+                'user_email': 'john@example.com',
+                'message': 'Something scary'
+            })
+
+        done = response.get_data(as_text=True).split('event: done\ndata: ')[1]
+        assert 'persist' in json.loads(done)['debug']['stage_ms']
+
+    def test_metrics_endpoint(self, client):
+        with patch('routes.chat.get_pipeline_metrics') as mock_metrics:
+            mock_metrics.return_value = {'stage_seconds': {'llm': {'count': 2}}, 'values': {}}
+
+            response = client.get('/api/chat/metrics')
+
+        assert response.status_code == 200
+        assert response.get_json()['metrics']['stage_seconds']['llm']['count'] == 2
+
+
+class TestChatJobs:
+    def test_async_message_returns_job_and_result(self, client):
+        with patch('routes.chat.get_ai_recommendation') as mock_ai, \
+             patch('routes.chat.conversations_dal') as mock_dal:
+            mock_ai.return_value = {'response': 'Movie Name: Heat', 'source': 'ai'}
+            mock_dal.insert_one_conversation.return_value = "convo_123"
+
+            response = client.post('/api/chat/message', json={
+                'user_email': 'john@example.com',
+                'message': 'A heist movie',
+                'async': True
+            })
+            assert response.status_code == 202
+            data = response.get_json()
+            assert response.headers['Location'] == data['status_url']
+
+            job = client.get(f"{data['status_url']}?user_email=john@example.com&wait=5").get_json()
+
+        assert job['status'] == 'succeeded'
+        assert job['result']['response'] == 'Movie Name: Heat'
+        assert job['result']['convo_id'] == 'convo_123'
+
+    def test_prefer_header_selects_async(self, client):
+        with patch('routes.chat.chat_jobs') as mock_jobs:
+            mock_jobs.submit.return_value = 'abc'
+            response = client.post('/api/chat/message', json={
+                'user_email': 'john@example.com',
+                'message': 'A heist movie'
+            }, headers={'Prefer': 'respond-async'})
+
+        assert response.status_code == 202
+        assert mock_jobs.submit.call_args[0][0]['user_message'] == 'A heist movie'
+
+    def test_failed_job_reports_error(self, client):
+        with patch('routes.chat.get_ai_recommendation', side_effect=LLMUnavailableError('down')):
+            job_id = client.post('/api/chat/message', json={
+                'user_email': 'john@example.com',
+                'message': 'A heist movie',
+                'async': True
+            }).get_json()['job_id']
+            job = client.get(f'/api/chat/jobs/{job_id}?user_email=john@example.com&wait=5').get_json()
+
+        assert job['status'] == 'failed'
+        assert job['success'] is False
+        assert job['error_code'] == 'SERVICE_UNAVAILABLE'
+
+    def test_queue_full(self, client):
+        from utils.jobs import QueueFull
+        with patch('routes.chat.chat_jobs') as mock_jobs:
+            mock_jobs.submit.side_effect = QueueFull()
+            response = client.post('/api/chat/message', json={
+                'user_email': 'john@example.com',
+                'message': 'A heist movie',
+                'async': True
+            })
+
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '5'
+
+    def test_job_not_visible_to_other_user(self, client):
+        with patch('routes.chat.chat_jobs') as mock_jobs:
+            mock_jobs.store.get.return_value = {
+                'status': 'queued', 'payload': {'user_email': 'john@example.com'}
+            }
+            response = client.get('/api/chat/jobs/abc?user_email=eve@example.com')
+
+        assert response.status_code == 404
+
+
+class TestLLMOverload:
+    def test_send_message_shed_returns_503_with_retry_after(self, client):
+        with patch('routes.chat.get_movie_recommendations',
+                   side_effect=LLMOverloadedError('queue_full', 12)), \
+             patch('routes.chat.conversations_dal') as mock_dal:
+            response = client.post('/api/chat/message', json={
+                'user_email': 'john@example.com',
+                'message': 'A heist movie',
+                'convo_id': str(ObjectId())
+            })
+
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '12'
+        assert response.get_json()['error_code'] == 'LLM_OVERLOADED'
+        mock_dal.append_messages.assert_not_called()
+
+    def test_stream_shed_sends_error_event(self, client):
+        with patch('routes.chat.stream_movie_recommendations',
+                   side_effect=LLMOverloadedError('queue_timeout', 3)), \
+             patch('routes.chat.conversations_dal'):
+            response = client.post('/api/chat/message/stream', json={
+                'user_email': 'john@example.com',
+                'message': 'A heist movie',
+                'convo_id': str(ObjectId())
+            })
+
+        body = response.get_data(as_text=True)
+        assert 'event: error' in body
+        assert '"retry_after": 3' in body
+
+
+class TestSendMessageIdempotency:
+    def test_retry_with_same_key_skips_llm(self, client):
+        with patch('routes.chat.validate_chat_message') as mock_validate, \
+             patch('routes.chat.get_ai_recommendation') as mock_ai, \
+             patch('routes.chat.conversations_dal') as mock_dal:
+            mock_validate.return_value = (True, None)
+            mock_ai.return_value = {'response': 'Try Alien', 'source': 'mock'}
+            mock_dal.insert_one_conversation.return_value = "convo_idem"
+            body = {'user_email': 'idem@example.com', 'message': 'Something scary'}
+            headers = {'Idempotency-Key': 'chat-retry-1'}
+
+            first = client.post('/api/chat/message', json=body, headers=headers)
+            second = client.post('/api/chat/message', json=body, headers=headers)
+
+            assert second.status_code == 200
+            assert second.get_json()['response'] == first.get_json()['response']
+            assert second.headers['Idempotent-Replayed'] == 'true'
+            mock_ai.assert_called_once()
+
+    def test_stream_retry_replays_without_generating(self, client):
+        with patch('routes.chat.stream_movie_recommendations') as mock_stream, \
+             patch('routes.chat.conversations_dal') as mock_dal:
+            mock_stream.return_value = iter(['Movie Name: ', 'Alien'])
+            mock_dal.insert_one_conversation.return_value = "convo_stream"
+            body = {'user_email': 'idem@example.com', 'message': 'Stream something'}
+            headers = {'Idempotency-Key': 'stream-retry-1'}
+
+            first = client.post('/api/chat/message/stream', json=body, headers=headers)
+            first_body = first.get_data(as_text=True)
+            second = client.post('/api/chat/message/stream', json=body, headers=headers)
+
+            assert second.status_code == 200
+            assert second.mimetype == 'text/event-stream'
+            assert second.headers['Idempotent-Replayed'] == 'true'
+            assert second.get_data(as_text=True) == first_body
+            mock_stream.assert_called_once()
+            mock_dal.insert_one_conversation.assert_called_once()
+
+    def test_failed_stream_can_be_retried_with_same_key(self, client):
+        def failing_stream(*args, **kwargs):
+            yield 'Movie'
+            raise RuntimeError("upstream closed")
+
+        with patch('routes.chat.stream_movie_recommendations', side_effect=failing_stream) as mock_stream, \
+             patch('routes.chat.conversations_dal'):
+            body = {'user_email': 'idem@example.com', 'message': 'Stream again'}
+            headers = {'Idempotency-Key': 'stream-retry-2'}
+
+            client.post('/api/chat/message/stream', json=body, headers=headers).get_data()
+            retry = client.post('/api/chat/message/stream', json=body, headers=headers)
+
+            assert 'Idempotent-Replayed' not in retry.headers
+            retry.get_data()
+            assert mock_stream.call_count == 2
+
+    def test_done_text_inside_a_delta_does_not_complete_the_stream(self, client):
+        def failing_stream(*args, **kwargs):
+            yield 'event: done'
+            raise RuntimeError("upstream closed")
+
+        with patch('routes.chat.stream_movie_recommendations', side_effect=failing_stream) as mock_stream, \
+             patch('routes.chat.conversations_dal'):
+            body = {'user_email': 'idem@example.com', 'message': 'Stream once more'}
+            headers = {'Idempotency-Key': 'stream-retry-3'}
+
+            client.post('/api/chat/message/stream', json=body, headers=headers).get_data()
+            client.post('/api/chat/message/stream', json=body, headers=headers).get_data()
+            assert mock_stream.call_count == 2
+
+
+class TestWriteBehind:
+    @pytest.fixture(autouse=True)
+    def write_behind(self):
+        with patch('routes.chat.Config.CHAT_WRITE_BEHIND_ENABLED', True):
+            yield
+
+    def test_exchanges_are_persisted_in_background(self, client):
+        with patch('routes.chat.get_ai_recommendation') as mock_ai:
+            mock_ai.return_value = {'response': 'Try Alien', 'source': 'mock'}
+            first = client.post('/api/chat/message', json={
+                'user_email': 'wb@example.com', 'message': 'Something scary'
+            })
+            convo_id = first.get_json()['convo_id']
+            second = client.post('/api/chat/message', json={
+                'user_email': 'wb@example.com', 'message': 'Older please', 'convo_id': convo_id
+            })
+
+        assert first.status_code == second.status_code == 200
+        assert second.get_json()['convo_id'] == convo_id
+
+        response = client.get(f'/api/chat/conversation/{convo_id}?user_email=wb@example.com')
+        messages = response.get_json()['conversation']['messages']
+        assert [m['content'] for m in messages] == [
+            'Something scary', 'Try Alien', 'Older please', 'Try Alien'
+        ]
+
+    def test_foreign_conversation_starts_new_one(self, client):
+        with patch('routes.chat.get_ai_recommendation') as mock_ai:
+            mock_ai.return_value = {'response': 'Try Alien', 'source': 'mock'}
+            owner = client.post('/api/chat/message', json={
+                'user_email': 'owner@example.com', 'message': 'Hi'
+            }).get_json()['convo_id']
+            other = client.post('/api/chat/message', json={
+                'user_email': 'other@example.com', 'message': 'Hi', 'convo_id': owner
+            }).get_json()['convo_id']
+
+        assert other != owner
+
+    def test_full_backlog_saves_directly(self, client):
+        with patch('routes.chat.get_ai_recommendation') as mock_ai, \
+             patch('routes.chat.chat_persister') as mock_persister, \
+             patch('routes.chat.save_chat_exchange') as mock_save:
+            mock_ai.return_value = {'response': 'Try Alien', 'source': 'mock'}
+            mock_persister.pending.return_value = 0
+            mock_persister.submit.side_effect = BacklogFull()
+            mock_save.return_value = 'convo_direct'
+            response = client.post('/api/chat/message', json={
+                'user_email': 'wb@example.com', 'message': 'Something scary'
+            })
+
+        assert response.get_json()['convo_id'] == 'convo_direct'
+        assert mock_save.call_args.args[1] is None
+
+    def test_metrics_report_backlog(self, client):
+        from routes.chat import chat_persister
+        assert chat_persister.flush(timeout=2)
+        data = client.get('/api/chat/metrics').get_json()
+        assert data['write_behind']['backlog'] == 0
+        assert data['write_behind']['written'] >= 2
@@ -0,0 +1,63 @@
+# Unit tests for the circuit breaker
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from backend.utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def fail():
+    raise RuntimeError("upstream error")
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("gemini", failure_threshold=2, reset_timeout=10, clock=clock)
+
+
+class TestCircuitBreaker:
+    def test_success_passes_through(self, breaker):
+        assert breaker.call(lambda: 'ok') == 'ok'
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_opens_after_threshold(self, breaker):
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                breaker.call(fail)
+
+        assert breaker.is_open
+        with pytest.raises(CircuitOpenError):
+            breaker.call(lambda: 'ok')
+        assert breaker.stats()['rejected'] == 1
+
+    def test_success_resets_failure_count(self, breaker):
+        with pytest.raises(RuntimeError):
+            breaker.call(fail)
+        breaker.call(lambda: 'ok')
+        with pytest.raises(RuntimeError):
+            breaker.call(fail)
+
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_allows_single_trial(self, breaker, clock):
+        breaker.record_failure()
+        breaker.record_failure()
+        clock.now += 10
+
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow_request() is True
+        assert breaker.allow_request() is False
+
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_half_open_failure_reopens(self, breaker, clock):
+        breaker.record_failure()
+        breaker.record_failure()
+        clock.now += 10
+
+        with pytest.raises(RuntimeError):
+            breaker.call(fail)
+        assert breaker.is_open
@@ -0,0 +1,88 @@
+# Unit tests for cached prompt prefix handles
+import os
+import sys
+import pytest
+from concurrent.futures import Executor, Future
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from backend.utils.context_cache import PromptPrefixCache
+
+
+class InlineExecutor(Executor):
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+def make_cache(clock, create_fn, executor=None):
+    return PromptPrefixCache(
+        create_fn, refresh_margin=60, retry_after=600,
+        executor=executor or InlineExecutor(), clock=clock,
+    )
+
+
+class TestPromptPrefixCache:
+    def test_first_get_creates_in_background(self, clock):
+        calls = []
+
+        def create(key):
+            calls.append(key)
+            return f'cache-{len(calls)}', clock.now + 3600
+
+        pending = []
+        cache = make_cache(clock, create, executor=type('Deferred', (Executor,), {
+            'submit': lambda self, fn, *a: pending.append((fn, a))
+        })())
+        assert cache.get('flash') is None
+        assert cache.get('flash') is None
+        assert len(pending) == 1
+
+        fn, args = pending.pop()
+        fn(*args)
+        assert cache.get('flash') == 'cache-1'
+        assert calls == ['flash']
+
+    def test_refreshes_before_expiry(self, clock):
+        names = iter(['cache-1', 'cache-2'])
+        cache = make_cache(clock, lambda key: (next(names), clock.now + 3600))
+
+        assert cache.get('flash') == 'cache-1'
+        clock.now += 3600 - 30
+        assert cache.get('flash') == 'cache-2'
+        assert cache.stats()['created'] == 2
+
+    def test_failed_create_backs_off(self, clock):
+        attempts = []
+
+        def create(key):
+            attempts.append(key)
+            raise RuntimeError('Cached content is too small')
+
+        cache = make_cache(clock, create)
+        assert cache.get('flash') is None
+        assert cache.get('flash') is None
+        assert len(attempts) == 1
+        assert 'too small' in cache.stats()['last_errors']['flash']
+
+        clock.now += 601
+        cache.get('flash')
+        assert len(attempts) == 2
+
+    def test_invalidate(self, clock):
+        names = iter(['cache-1', 'cache-2'])
+        cache = make_cache(clock, lambda key: (next(names), clock.now + 3600))
+        assert cache.get('flash') == 'cache-1'
+        cache.invalidate('flash')
+        assert cache.get('flash') == 'cache-2'
+
+    def test_usage_comparison(self, clock):
+        cache = make_cache(clock, lambda key: ('cache-1', clock.now + 3600))
+        cache.record(True, 0.4, prompt_tokens=1200, cached_tokens=1000)
+        cache.record(False, 0.6, prompt_tokens=1200)
+
+        usage = cache.stats()['usage']
+        assert usage['cached']['avg_billed_input_tokens'] == 200
+        assert usage['uncached']['avg_billed_input_tokens'] == 1200
+        assert usage['cached']['avg_latency_seconds'] == pytest.approx(0.4)
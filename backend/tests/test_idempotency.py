@@ -0,0 +1,131 @@
+# Unit tests for Idempotency-Key handling
+import hashlib
+import os
+import sys
+import pytest
+from flask import Flask, Response, jsonify, request
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from backend.fake_DAL import db_app, idempotency_dal
+from backend.utils.idempotency import idempotent
+
+
+@pytest.fixture
+def app():
+    db_app.idempotency_keys.clear()
+    app = Flask(__name__)
+    app.calls = 0
+
+    @app.route('/add', methods=['POST'])
+    @idempotent('test.add', idempotency_dal, ttl_seconds=60)
+    def add():
+        app.calls += 1
+        status = request.get_json().get('status', 201)
+        response = jsonify({'success': status < 400, 'call': app.calls})
+        response.headers['Location'] = f'/items/{app.calls}'
+        return response, status
+
+    return app
+
+
+def post(client, body, key='key-1'):
+    headers = {'Idempotency-Key': key} if key else {}
+    return client.post('/add', json=body, headers=headers)
+
+
+class TestIdempotent:
+    def test_replays_first_response(self, app):
+        client = app.test_client()
+        body = {'user_email': 'a@x.com'}
+        first = post(client, body)
+        second = post(client, body)
+
+        assert app.calls == 1
+        assert second.status_code == 201
+        assert second.get_json() == first.get_json()
+        assert second.headers['Location'] == '/items/1'
+        assert second.headers['Idempotent-Replayed'] == 'true'
+        assert 'Idempotent-Replayed' not in first.headers
+
+    def test_without_header_runs_every_time(self, app):
+        client = app.test_client()
+        post(client, {'user_email': 'a@x.com'}, key=None)
+        post(client, {'user_email': 'a@x.com'}, key=None)
+        assert app.calls == 2
+
+    def test_keys_are_scoped_per_user(self, app):
+        client = app.test_client()
+        post(client, {'user_email': 'a@x.com'})
+        post(client, {'user_email': 'b@x.com'})
+        assert app.calls == 2
+
+    def test_reused_key_with_different_body(self, app):
+        client = app.test_client()
+        post(client, {'user_email': 'a@x.com', 'n': 1})
+        response = post(client, {'user_email': 'a@x.com', 'n': 2})
+        assert response.status_code == 422
+        assert response.get_json()['error_code'] == 'IDEMPOTENCY_KEY_REUSED'
+        assert app.calls == 1
+
+    def test_in_progress_key_returns_409(self, app):
+        raw = b'{"user_email": "a@x.com"}'
+        idempotency_dal.claim_key('test.add:a@x.com:key-1', hashlib.sha256(raw).hexdigest(), 60)
+        response = app.test_client().post(
+            '/add', data=raw, content_type='application/json',
+            headers={'Idempotency-Key': 'key-1'},
+        )
+        assert response.status_code == 409
+        assert response.headers['Retry-After'] == '1'
+        assert app.calls == 0
+
+    def test_server_errors_are_not_stored(self, app):
+        client = app.test_client()
+        body = {'user_email': 'a@x.com', 'status': 503}
+        post(client, body)
+        post(client, body)
+        assert app.calls == 2
+
+    def test_rejects_oversized_key(self, app):
+        response = post(app.test_client(), {'user_email': 'a@x.com'}, key='k' * 300)
+        assert response.status_code == 400
+        assert response.get_json()['error_code'] == 'INVALID_IDEMPOTENCY_KEY'
+        assert app.calls == 0
+
+
+class TestIdempotentStream:
+    @pytest.fixture
+    def stream_app(self):
+        db_app.idempotency_keys.clear()
+        app = Flask(__name__)
+        app.calls = 0
+
+        @app.route('/stream', methods=['POST'])
+        @idempotent('test.stream', idempotency_dal, ttl_seconds=60,
+                    stream_done=lambda body: 'done' in body)
+        def stream():
+            app.calls += 1
+            chunks = request.get_json().get('chunks', ['a', 'done'])
+            return Response(iter(chunks), mimetype='text/event-stream')
+
+        return app
+
+    def test_disconnect_releases_key(self, stream_app):
+        client = stream_app.test_client()
+        body = {'user_email': 'a@x.com', 'chunks': ['a', 'b', 'done']}
+        response = client.post('/stream', json=body, headers={'Idempotency-Key': 'k'},
+                               buffered=False)
+        next(iter(response.response))
+        response.close()
+
+        assert db_app.idempotency_keys == {}
+        retry = client.post('/stream', json=body, headers={'Idempotency-Key': 'k'})
+        assert retry.get_data(as_text=True) == 'abdone'
+        assert stream_app.calls == 2
+
+    def test_incomplete_stream_is_not_stored(self, stream_app):
+        client = stream_app.test_client()
+        body = {'user_email': 'a@x.com', 'chunks': ['a', 'error']}
+        client.post('/stream', json=body, headers={'Idempotency-Key': 'k'}).get_data()
+        client.post('/stream', json=body, headers={'Idempotency-Key': 'k'}).get_data()
+        assert stream_app.calls == 2
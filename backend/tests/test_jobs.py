@@ -0,0 +1,90 @@
+# Unit tests for the async job queue, store and worker pool
+import os
+import sys
+import threading
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from backend.utils.jobs import (
+    FAILED,
+    QUEUED,
+    SUCCEEDED,
+    JobRunner,
+    JobStore,
+    LocalJobQueue,
+    QueueFull,
+)
+
+
+class TestLocalJobQueue:
+    def test_bounded(self):
+        q = LocalJobQueue(maxsize=1)
+        q.put('a')
+        with pytest.raises(QueueFull):
+            q.put('b')
+        assert q.get(timeout=0) == 'a'
+        assert q.get(timeout=0) is None
+
+
+class TestJobStore:
+    def test_finished_jobs_expire(self, clock):
+        store = JobStore(ttl_seconds=60, clock=clock)
+        job_id = store.create({'n': 1})
+        store.update(job_id, status=SUCCEEDED, result='ok')
+
+        clock.now += 61
+        store.create({'n': 2})
+        assert store.get(job_id) is None
+
+    def test_unfinished_jobs_do_not_expire(self, clock):
+        store = JobStore(ttl_seconds=60, clock=clock)
+        job_id = store.create({'n': 1})
+
+        clock.now += 600
+        store.create({'n': 2})
+        assert store.get(job_id)['status'] == QUEUED
+
+    def test_wait_returns_when_finished(self):
+        store = JobStore()
+        job_id = store.create({})
+        threading.Timer(0.05, store.update, args=(job_id,), kwargs={'status': SUCCEEDED, 'result': 1}).start()
+
+        job = store.wait(job_id, timeout=2)
+        assert job['status'] == SUCCEEDED
+        assert job['result'] == 1
+
+    def test_wait_times_out(self):
+        store = JobStore()
+        job_id = store.create({})
+        assert store.wait(job_id, timeout=0.05)['status'] == QUEUED
+
+
+class TestJobRunner:
+    def test_runs_handler(self):
+        runner = JobRunner(lambda payload: payload['x'] * 2, workers=2)
+        job_id = runner.submit({'x': 21})
+
+        job = runner.store.wait(job_id, timeout=2)
+        assert job['status'] == SUCCEEDED
+        assert job['result'] == 42
+
+    def test_failure_recorded_with_error_fn(self):
+        def boom(payload):
+            raise ValueError('bad')
+
+        runner = JobRunner(boom, workers=1, error_fn=lambda e: str(e))
+        job = runner.store.wait(runner.submit({}), timeout=2)
+        assert job['status'] == FAILED
+        assert job['error'] == 'bad'
+
+    def test_full_queue_rejects_and_forgets_job(self):
+        release = threading.Event()
+        runner = JobRunner(lambda payload: release.wait(2), workers=1, job_queue=LocalJobQueue(1))
+        first = runner.submit({})
+        runner.store.wait(first, timeout=0.2)
+        runner.submit({})
+        with pytest.raises(QueueFull):
+            runner.submit({})
+        assert sum(runner.store.counts().values()) == 2
+        release.set()
@@ -0,0 +1,117 @@
+# Unit tests for the load-testing stand-ins
+import os
+import sys
+import threading
+import pytest
+
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, backend_path)
+
+from loadtest.latency import LatencyModel
+from loadtest.fake_gemini import create_fake_gemini
+from loadtest.run_load import percentile
+
+
+class TestLatencyModel:
+    def test_zero_mean_is_instant(self):
+        assert LatencyModel().sample_ms() == 0.0
+
+    @pytest.mark.parametrize('distribution', ['uniform', 'normal', 'lognormal'])
+    def test_sample_mean(self, distribution):
+        model = LatencyModel(100, 30, distribution, seed=1)
+        samples = [model.sample_ms() for _ in range(4000)]
+        assert min(samples) >= 0
+        assert sum(samples) / len(samples) == pytest.approx(100, rel=0.1)
+
+    def test_error_rate(self):
+        model = LatencyModel(error_rate=0.25, seed=1)
+        failures = sum(model.should_fail() for _ in range(4000))
+        assert failures / 4000 == pytest.approx(0.25, abs=0.03)
+
+    def test_unknown_distribution(self):
+        with pytest.raises(ValueError):
+            LatencyModel(distribution='pareto')
+
+
+class TestFakeGemini:
+    def body(self, **config):
+        return {'contents': [{'role': 'user', 'parts': [{'text': 'x' * 400}]}],
+                'generationConfig': config}
+
+    def test_generate_content(self):
+        client = create_fake_gemini(seed=1).test_client()
+        data = client.post('/v1beta/models/gemini-2.5-flash:generateContent',
+                           json=self.body(maxOutputTokens=20)).get_json()
+        assert data['candidates'][0]['content']['parts'][0]['text'].startswith('Movie Name:')
+        assert data['usageMetadata']['promptTokenCount'] == 100
+        assert data['usageMetadata']['candidatesTokenCount'] == 20
+
+    def test_json_mode(self):
+        client = create_fake_gemini(seed=1).test_client()
+        data = client.post('/v1beta/models/m:generateContent',
+                           json=self.body(responseMimeType='application/json')).get_json()
+        assert data['candidates'][0]['content']['parts'][0]['text'].startswith('{"title"')
+
+    def test_stream(self):
+        client = create_fake_gemini(seed=1).test_client()
+        body = client.post('/v1beta/models/m:streamGenerateContent?alt=sse', json=self.body()).get_data(as_text=True)
+        frames = [f for f in body.split('\r\n\r\n') if f]
+        assert len(frames) > 1
+        assert all(f.startswith('data: ') for f in frames)
+        assert 'usageMetadata' in frames[-1]
+
+    def test_error_rate(self):
+        client = create_fake_gemini(LatencyModel(error_rate=1.0)).test_client()
+        response = client.post('/v1beta/models/m:generateContent', json=self.body())
+        assert response.status_code == 503
+        assert response.get_json()['error']['status'] == 'UNAVAILABLE'
+
+    def test_cached_content_tokens(self):
+        client = create_fake_gemini().test_client()
+        cache = client.post('/v1beta/cachedContents', json={
+            'model': 'models/m', 'ttl': '60s',
+            'systemInstruction': {'parts': [{'text': 'i' * 800}]},
+        }).get_json()
+        body = self.body()
+        body['cachedContent'] = cache['name']
+        usage = client.post('/v1beta/models/m:generateContent', json=body).get_json()['usageMetadata']
+        assert usage['cachedContentTokenCount'] == 200
+        assert usage['promptTokenCount'] == 300
+
+
+class TestFakeWeaviate:
+    @pytest.fixture
+    def collection(self):
+        weaviate = pytest.importorskip('weaviate')
+        from werkzeug.serving import make_server
+        from loadtest.fake_weaviate import (
+            FakeSearchService, create_grpc_server, create_rest_app, synthetic_catalog,
+        )
+
+        service = FakeSearchService(synthetic_catalog(30), LatencyModel())
+        grpc_server, grpc_port = create_grpc_server(service, 0)
+        grpc_server.start()
+        rest = make_server('127.0.0.1', 0, create_rest_app(service), threaded=True)
+        threading.Thread(target=rest.serve_forever, daemon=True).start()
+
+        client = weaviate.connect_to_local(host='127.0.0.1', port=rest.server_port, grpc_port=grpc_port)
+        yield client.collections.get('Movies')
+        client.close()
+        rest.shutdown()
+        grpc_server.stop(0)
+
+    def test_near_text_and_hybrid(self, collection):
+        results = collection.query.near_text(query='scary', limit=3, return_properties=['title', 'description'])
+        assert len(results.objects) == 3
+        assert results.objects[0].properties['title'].startswith('Synthetic')
+        assert len(collection.query.hybrid(query='scary', alpha=0.5, limit=2).objects) == 2
+
+    def test_iterator_pages_catalog(self, collection):
+        assert sum(1 for _ in collection.iterator(return_properties=['title'])) == 30
+
+
+def test_percentile():
+    values = [0.1, 0.2, 0.3, 0.4, 0.5]
+    assert percentile(values, 50) == 0.3
+    assert percentile(values, 99) == 0.5
+    assert percentile([], 50) == 0.0
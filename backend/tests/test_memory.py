@@ -0,0 +1,140 @@
+# Unit tests for token-budgeted conversation memory
+import os
+import sys
+import pytest
+
+os.environ["TESTING"] = "1"
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from backend.DAL import conversations_dal, db_app
+from backend.utils.memory import (
+    ConversationMemory,
+    assemble_history,
+    format_history,
+)
+from backend.utils.prompting import estimate_tokens
+
+
+@pytest.fixture(autouse=True)
+def reset_conversations():
+    db_app.conversations[:] = []
+    db_app.message_buckets[:] = []
+    yield
+    db_app.conversations[:] = []
+    db_app.message_buckets[:] = []
+
+
+def make_messages(count):
+    roles = ['user', 'model']
+    return [{'role': roles[i % 2], 'content': f'message {i}'} for i in range(count)]
+
+
+class TestAssembleHistory:
+    def test_format_history(self):
+        text = format_history([{'role': 'user', 'content': 'hi\nthere'}])
+        assert text == 'user: hi there'
+
+    def test_assemble_history_keeps_newest_within_budget(self):
+        messages = make_messages(20)
+        history = assemble_history('', messages, token_budget=12)
+
+        assert 'message 19' in history
+        assert 'message 0' not in history
+        assert estimate_tokens(history) <= 12 + 1
+
+    def test_assemble_history_includes_summary(self):
+        history = assemble_history('User likes heist films.', make_messages(2), 200)
+        lines = history.splitlines()
+        assert lines[0] == 'Summary of earlier conversation: User likes heist films.'
+        assert lines[-1] == 'model: message 1'
+
+    def test_assemble_history_trims_oversized_latest_message(self):
+        messages = [{'role': 'user', 'content': 'word ' * 500}]
+        history = assemble_history('', messages, token_budget=10)
+        assert history.startswith('user: word')
+        assert len(history) <= 40
+
+
+class TestConversationMemory:
+    def make_memory(self, summaries):
+        def summarize(summary, messages):
+            summaries.append((summary, [m['content'] for m in messages]))
+            return f'summary of {len(messages)}'
+
+        return ConversationMemory(
+            conversations_dal,
+            summarize_fn=summarize,
+            keep_last=4,
+            token_budget=200,
+            summary_interval=5,
+        )
+
+    def test_load_returns_unsummarized_messages_and_count(self):
+        conversations_dal.insert_one_conversation({
+            'user_email': 'a@b.com',
+            'messages': make_messages(12),
+            'summary': 'earlier',
+            'summarized_count': 6,
+        })
+        memory = self.make_memory([]).load({'user_email': 'a@b.com'})
+
+        assert memory['message_count'] == 12
+        assert [m['content'] for m in memory['messages']] == [
+            f'message {i}' for i in range(6, 12)
+        ]
+
+    def test_messages_before_first_summary_are_not_dropped(self):
+        conversations_dal.insert_one_conversation(
+            {'user_email': 'a@b.com', 'messages': make_messages(19)}
+        )
+        memory_store = ConversationMemory(
+            conversations_dal, summarize_fn=lambda s, m: '', keep_last=10,
+            token_budget=800, summary_interval=10,
+        )
+        history = memory_store.build_history(memory_store.load({'user_email': 'a@b.com'}))
+
+        assert history.splitlines() == [
+            f"{'user' if i % 2 == 0 else 'model'}: message {i}" for i in range(19)
+        ]
+
+    def test_load_is_capped_by_token_budget(self):
+        conversations_dal.insert_one_conversation(
+            {'user_email': 'a@b.com', 'messages': make_messages(30)}
+        )
+        memory_store = ConversationMemory(
+            conversations_dal, summarize_fn=lambda s, m: '', keep_last=4, token_budget=20,
+        )
+        memory = memory_store.load({'user_email': 'a@b.com'})
+        assert [m['content'] for m in memory['messages']] == [
+            f'message {i}' for i in range(10, 30)
+        ]
+
+    def test_no_refresh_below_interval(self):
+        conversations_dal.insert_one_conversation(
+            {'user_email': 'a@b.com', 'messages': make_messages(8)}
+        )
+        memory_store = self.make_memory([])
+        memory = memory_store.load({'user_email': 'a@b.com'})
+
+        assert memory_store.maybe_refresh({'user_email': 'a@b.com'}, memory) is None
+
+    def test_refresh_folds_older_messages_into_summary(self):
+        conversations_dal.insert_one_conversation(
+            {'user_email': 'a@b.com', 'messages': make_messages(12)}
+        )
+        summaries = []
+        memory_store = self.make_memory(summaries)
+        convo_filter = {'user_email': 'a@b.com'}
+
+        future = memory_store.maybe_refresh(convo_filter, memory_store.load(convo_filter))
+        future.result(timeout=5)
+
+        assert summaries == [('', [f'message {i}' for i in range(8)])]
+        convo = conversations_dal.find_one_conversation(convo_filter)
+        assert convo['summary'] == 'summary of 8'
+        assert convo['summarized_count'] == 8
+
+        history = memory_store.build_history(memory_store.load(convo_filter))
+        assert history.startswith('Summary of earlier conversation: summary of 8')
+        assert 'message 11' in history
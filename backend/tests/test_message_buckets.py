@@ -0,0 +1,35 @@
+# Unit tests for message bucket arithmetic
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from backend.utils.message_buckets import bucket_spans, page_window
+
+
+class TestBucketSpans:
+    def test_within_one_bucket(self):
+        assert bucket_spans(3, 5, size=50) == [(0, 3, 5)]
+
+    def test_crosses_boundary(self):
+        assert bucket_spans(48, 53, size=50) == [(0, 48, 50), (1, 50, 53)]
+
+    def test_empty(self):
+        assert bucket_spans(7, 7, size=50) == []
+
+
+class TestPageWindow:
+    def test_unpaged_is_everything(self):
+        assert page_window(120) == (0, 120)
+
+    def test_latest(self):
+        assert page_window(120, limit=50) == (70, 120)
+
+    def test_before(self):
+        assert page_window(120, limit=50, before=30) == (0, 30)
+
+    def test_after(self):
+        assert page_window(120, limit=50, after=99) == (100, 120)
+
+    def test_after_past_end(self):
+        assert page_window(10, limit=5, after=20) == (10, 10)
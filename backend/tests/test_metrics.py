@@ -0,0 +1,94 @@
+# Unit tests for pipeline histograms and per-request traces
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from backend.utils import metrics as metrics_module
+from backend.utils.metrics import (
+    Histogram,
+    MetricsRegistry,
+    current_trace,
+    in_context,
+    record,
+    span,
+    start_trace,
+)
+
+
+class TestHistogram:
+    def test_empty(self):
+        snapshot = Histogram((1, 2)).snapshot()
+        assert snapshot['count'] == 0
+        assert snapshot['p50'] == 0.0
+
+    def test_quantiles_use_bucket_bounds(self):
+        hist = Histogram((0.1, 0.5, 1.0))
+        for value in [0.05] * 5 + [0.3] * 4 + [0.9]:
+            hist.observe(value)
+
+        assert hist.quantile(0.5) == 0.1
+        assert hist.quantile(0.9) == 0.5
+        assert hist.quantile(0.99) == 1.0
+
+    def test_overflow_reports_max(self):
+        hist = Histogram((1,))
+        hist.observe(7.5)
+        assert hist.quantile(0.5) == 7.5
+
+    def test_cumulative_buckets(self):
+        hist = Histogram((1, 2))
+        for value in (0.5, 1.5, 1.7, 3):
+            hist.observe(value)
+
+        snapshot = hist.snapshot()
+        assert snapshot['buckets'] == {'1': 1, '2': 3, '+Inf': 4}
+        assert snapshot['max'] == 3
+        assert snapshot['mean'] == (0.5 + 1.5 + 1.7 + 3) / 4
+
+
+class TestRegistry:
+    def test_snapshot_separates_stages_and_values(self):
+        registry = MetricsRegistry()
+        registry.observe_stage('llm', 1.2)
+        registry.observe_value('prompt_tokens', 800)
+
+        snapshot = registry.snapshot()
+        assert snapshot['stage_seconds']['llm']['count'] == 1
+        assert snapshot['values']['prompt_tokens']['sum'] == 800
+
+
+class TestTrace:
+    def setup_method(self):
+        metrics_module.metrics = MetricsRegistry()
+
+    def test_span_without_trace_only_records_histogram(self):
+        with span('retrieve'):
+            pass
+        assert current_trace() is None
+        assert metrics_module.metrics.snapshot()['stage_seconds']['retrieve']['count'] == 1
+
+    def test_span_and_record_attach_to_trace(self):
+        with start_trace() as trace:
+            with span('llm'):
+                pass
+            record('output_tokens', 42)
+            record('cached_tokens', None)
+
+        result = trace.to_dict()
+        assert 'llm' in result['stage_ms']
+        assert result['output_tokens'] == 42
+        assert 'cached_tokens' not in result
+        assert current_trace() is None
+
+    def test_in_context_carries_trace_to_pool_threads(self):
+        def stage():
+            with span('vector_search'):
+                return current_trace()
+
+        with start_trace() as trace, ThreadPoolExecutor(max_workers=1) as pool:
+            seen = pool.submit(in_context(stage)).result()
+
+        assert seen is trace
+        assert 'vector_search' in trace.spans
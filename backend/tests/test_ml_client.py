@@ -0,0 +1,446 @@
+# Unit tests for ml_client's RAG pipeline helpers
+import os
+import sys
+import time
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+
+backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, backend_path)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+os.environ["TESTING"] = "1"
+import ml_client
+from utils.metrics import start_trace
+
+
+def slow(value, delay):
+    def _call(*args, **kwargs):
+        time.sleep(delay)
+        return value
+    return _call
+
+
+class TestRetrieve:
+    def test_retrieve_runs_stages_concurrently(self):
+        with patch('ml_client.get_nearest_k', side_effect=slow('context', 0.2)), \
+             patch('ml_client.get_prev_conversations', side_effect=slow(['history'], 0.2)):
+            start = time.monotonic()
+            context, conversation = ml_client.retrieve('horror', 'a@b.com', 'convo_1')
+            elapsed = time.monotonic() - start
+
+        assert context == 'context'
+        assert conversation == ['history']
+        assert elapsed < 0.35
+
+    def test_retrieve_skips_history_without_convo(self):
+        with patch('ml_client.get_nearest_k', return_value='context'), \
+             patch('ml_client.get_prev_conversations') as mock_history:
+            context, conversation = ml_client.retrieve('horror')
+
+        assert context == 'context'
+        assert conversation == ""
+        mock_history.assert_not_called()
+
+    def test_retrieve_slow_stage_degrades(self):
+        with patch.object(ml_client.Config, 'HISTORY_STAGE_TIMEOUT_SECONDS', 0.05), \
+             patch('ml_client.get_nearest_k', return_value='context'), \
+             patch('ml_client.get_prev_conversations', side_effect=slow(['history'], 0.3)):
+            context, conversation = ml_client.retrieve('horror', 'a@b.com', 'convo_1')
+
+        assert context == 'context'
+        assert conversation == ""
+
+    def test_retrieve_failed_stage_degrades(self):
+        with patch('ml_client.get_nearest_k', side_effect=RuntimeError("weaviate down")):
+            context, conversation = ml_client.retrieve('horror')
+
+        assert context == ""
+        assert conversation == ""
+
+
+class TestFallbackRecommendation:
+    def test_fallback_formats_top_hit(self):
+        hit = SimpleNamespace(properties={'title': 'Alien', 'description': 'In space no one can hear you scream.'})
+        with patch('ml_client.get_nearest_k', return_value=SimpleNamespace(objects=[hit])):
+            text = ml_client.get_fallback_recommendation('space horror')
+
+        assert text == (
+            "Movie Name: Alien\n"
+            "Runtime: unknown\n"
+            "Description: In space no one can hear you scream."
+        )
+
+    def test_fallback_retrieval_failure(self):
+        with patch('ml_client.get_nearest_k', side_effect=RuntimeError("weaviate down")):
+            assert ml_client.get_fallback_recommendation('space horror') is None
+
+
+class TestGeminiBreaker:
+    # conftest patches get_movie_recommendations, so drive the generation step directly
+    def test_open_breaker_skips_generation(self):
+        breaker = ml_client.CircuitBreaker('gemini', failure_threshold=1, reset_timeout=60)
+        breaker.record_failure()
+        mock_client = MagicMock()
+
+        with patch.object(ml_client, 'gemini_breaker', breaker), \
+             patch.object(ml_client, 'client', mock_client):
+            with pytest.raises(ml_client.LLMUnavailableError):
+                ml_client._generate_recommendation('space horror', None, None, 5, 'gemini-flash', False)
+
+        mock_client.models.generate_content.assert_not_called()
+
+    def test_generation_failure_trips_breaker(self):
+        breaker = ml_client.CircuitBreaker('gemini', failure_threshold=1, reset_timeout=60)
+        mock_client = MagicMock()
+        mock_client.models.generate_content.side_effect = TimeoutError("deadline exceeded")
+
+        with patch.object(ml_client, 'gemini_breaker', breaker), \
+             patch.object(ml_client, 'client', mock_client), \
+             patch('ml_client.retrieve', return_value=("", "")):
+            with pytest.raises(ml_client.LLMUnavailableError):
+                ml_client._generate_recommendation('space horror', None, None, 5, 'gemini-flash', False)
+
+        assert breaker.is_open
+
+    def test_empty_response_is_a_failure(self):
+        mock_client = MagicMock()
+        mock_client.models.generate_content.return_value = SimpleNamespace(text='', usage_metadata=None)
+        mock_client.models.generate_content_stream.return_value = iter(
+            [SimpleNamespace(text=None, usage_metadata=None)]
+        )
+
+        breaker = ml_client.CircuitBreaker('gemini', failure_threshold=5, reset_timeout=60)
+        with patch.object(ml_client.Config, 'PROMPT_CACHE_ENABLED', False), \
+             patch.object(ml_client, 'gemini_breaker', breaker), \
+             patch.object(ml_client, 'client', mock_client), \
+             patch('ml_client.retrieve', return_value=("", "")):
+            with pytest.raises(ml_client.LLMUnavailableError):
+                ml_client._generate_recommendation('space horror', None, None, 5, 'gemini-flash', False)
+            with pytest.raises(ml_client.LLMUnavailableError):
+                list(ml_client.stream_movie_recommendations('space horror'))
+
+    def test_shed_call_does_not_touch_breaker(self):
+        breaker = ml_client.CircuitBreaker('gemini', failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()  # half-open: one trial allowed
+        full = ml_client.AdmissionController(max_concurrency=1, max_queue=0)
+        mock_client = MagicMock()
+
+        with patch.object(ml_client, 'gemini_breaker', breaker), \
+             patch.object(ml_client, 'llm_admission', full), \
+             patch.object(ml_client, 'client', mock_client), \
+             patch('ml_client.retrieve', return_value=("", "")):
+            with full.admit():
+                with pytest.raises(ml_client.LLMOverloadedError) as exc:
+                    ml_client._generate_recommendation('space horror', None, None, 5, 'gemini-flash', False)
+
+        assert exc.value.retry_after == 5
+        mock_client.models.generate_content.assert_not_called()
+        assert breaker.allow_request() is True
+
+
+class TestLocalIndexFastPath:
+    def test_get_nearest_k_prefers_local_index(self):
+        local = MagicMock()
+        local.search.return_value = SimpleNamespace(objects=[])
+        with patch.object(ml_client, 'local_index', local), \
+             patch('ml_client.vectorize_query', return_value=(1.0, 0.0)) as mock_vectorize, \
+             patch.object(ml_client, 'movies') as mock_movies:
+            ml_client.get_nearest_k('Scary movie!', 3)
+
+        mock_vectorize.assert_called_once_with('scary movie')
+        local.search.assert_called_once_with((1.0, 0.0), 3)
+        mock_movies.query.near_text.assert_not_called()
+
+    def test_get_nearest_k_falls_back_to_weaviate(self):
+        local = MagicMock()
+        with patch.object(ml_client, 'local_index', local), \
+             patch('ml_client.vectorize_query', side_effect=ValueError("no known words")), \
+             patch.object(ml_client, 'movies') as mock_movies:
+            ml_client.get_nearest_k('zzz', 3)
+
+        mock_movies.query.hybrid.assert_called_once()
+
+
+class TestRetrievalModes:
+    def test_hybrid_mode_uses_bm25_and_vector(self):
+        with patch.object(ml_client, 'local_index', None), \
+             patch.object(ml_client.Config, 'RETRIEVAL_MODE', 'hybrid'), \
+             patch.object(ml_client.Config, 'HYBRID_ALPHA', 0.4), \
+             patch.object(ml_client, 'movies') as mock_movies:
+            ml_client.get_nearest_k('heist thriller', 3)
+
+        kwargs = mock_movies.query.hybrid.call_args.kwargs
+        assert kwargs['query'] == 'heist thriller'
+        assert kwargs['alpha'] == 0.4
+        assert kwargs['limit'] == 3
+        mock_movies.query.near_text.assert_not_called()
+
+    def test_near_text_mode(self):
+        with patch.object(ml_client, 'local_index', None), \
+             patch.object(ml_client.Config, 'RETRIEVAL_MODE', 'near_text'), \
+             patch.object(ml_client, 'movies') as mock_movies:
+            ml_client.get_nearest_k('heist thriller', 3)
+
+        mock_movies.query.near_text.assert_called_once()
+        mock_movies.query.hybrid.assert_not_called()
+
+
+class TestTitleFastPath:
+    titles = ml_client.TitleIndex.build([
+        {'uuid': 'u-inception', 'title': 'Inception'},
+        {'uuid': 'u-alien', 'title': 'Alien'},
+    ])
+
+    def test_named_title_seeds_near_object(self):
+        seed = SimpleNamespace(uuid='u-inception', properties={'title': 'Inception'})
+        other = SimpleNamespace(uuid='u-tenet', properties={'title': 'Tenet'})
+        with patch.object(ml_client, 'title_index', self.titles), \
+             patch.object(ml_client, 'local_index', None), \
+             patch.object(ml_client, 'movies') as mock_movies:
+            mock_movies.query.near_object.return_value = SimpleNamespace(objects=[seed, other])
+            hits = ml_client.get_nearest_k('something like Inception', 3)
+
+        assert mock_movies.query.near_object.call_args.kwargs['near_object'] == 'u-inception'
+        assert mock_movies.query.near_object.call_args.kwargs['limit'] == 4
+        assert hits == [other]
+        mock_movies.query.hybrid.assert_not_called()
+
+    def test_named_title_uses_local_index(self):
+        local = MagicMock()
+        with patch.object(ml_client, 'title_index', self.titles), \
+             patch.object(ml_client, 'local_index', local), \
+             patch.object(ml_client, 'movies') as mock_movies:
+            ml_client.get_nearest_k('movies like alien', 2)
+
+        local.similar_to.assert_called_once_with('u-alien', 2)
+        mock_movies.query.near_object.assert_not_called()
+
+    def test_unknown_title_uses_query_search(self):
+        with patch.object(ml_client, 'title_index', self.titles), \
+             patch.object(ml_client, 'local_index', None), \
+             patch.object(ml_client, 'movies') as mock_movies:
+            ml_client.get_nearest_k('something like Heat', 3)
+
+        mock_movies.query.near_object.assert_not_called()
+        mock_movies.query.hybrid.assert_called_once()
+
+    def test_fallback_accepts_hit_list(self):
+        hit = SimpleNamespace(properties={'title': 'Tenet', 'description': 'Time runs backwards.'})
+        with patch('ml_client.get_nearest_k', return_value=[hit]):
+            text = ml_client.get_fallback_recommendation('something like Inception')
+
+        assert text.startswith("Movie Name: Tenet\n")
+
+
+class TestStructuredOutput:
+    def test_structured_generation_parses_json(self):
+        mock_client = MagicMock()
+        mock_client.models.generate_content.return_value = SimpleNamespace(
+            text='{"title": "Heat", "runtime_minutes": 170, "description": "Cops and robbers."}',
+            usage_metadata=None,
+        )
+        with patch.object(ml_client.Config, 'STRUCTURED_OUTPUT_ENABLED', True), \
+             patch.object(ml_client.Config, 'PROMPT_CACHE_ENABLED', False), \
+             patch.object(ml_client.Config, 'MAX_OUTPUT_TOKENS', 200), \
+             patch.object(ml_client, 'client', mock_client), \
+             patch('ml_client.retrieve', return_value=("", "")):
+            text = ml_client._generate_recommendation('heist', None, None, 5, 'gemini-flash', False)
+
+        assert text == "Movie Name: Heat\nRuntime: 170 minutes\nDescription: Cops and robbers."
+        config = mock_client.models.generate_content.call_args.kwargs['config']
+        assert config.response_mime_type == 'application/json'
+        assert config.max_output_tokens == 200
+
+    def test_unparseable_json_is_a_failure(self):
+        mock_client = MagicMock()
+        mock_client.models.generate_content.return_value = SimpleNamespace(
+            text='{"title": "He', usage_metadata=None
+        )
+        cache = ml_client.RecommendationCache()
+        breaker = ml_client.CircuitBreaker('gemini', failure_threshold=5, reset_timeout=60)
+        with patch.object(ml_client.Config, 'STRUCTURED_OUTPUT_ENABLED', True), \
+             patch.object(ml_client.Config, 'PROMPT_CACHE_ENABLED', False), \
+             patch.object(ml_client, 'gemini_breaker', breaker), \
+             patch.object(ml_client, 'recommendation_cache', cache), \
+             patch.object(ml_client, 'client', mock_client), \
+             patch('ml_client.retrieve', return_value=("", "")):
+            with pytest.raises(ml_client.LLMUnavailableError):
+                ml_client._generate_recommendation('heist', None, None, 5, 'gemini-flash', True)
+
+        assert cache.get('heist') is None
+
+    def test_answer_cut_off_at_token_cap_is_a_failure(self):
+        truncated = [SimpleNamespace(finish_reason=ml_client.types.FinishReason.MAX_TOKENS)]
+        mock_client = MagicMock()
+        mock_client.models.generate_content.return_value = SimpleNamespace(
+            text='Movie Name: Heat\nRuntime: 170 minutes\nDescription: Cops and',
+            candidates=truncated, usage_metadata=None,
+        )
+        mock_client.models.generate_content_stream.return_value = iter([
+            SimpleNamespace(text='Movie Name: Heat', candidates=truncated, usage_metadata=None)
+        ])
+        cache = ml_client.RecommendationCache()
+        breaker = ml_client.CircuitBreaker('gemini', failure_threshold=5, reset_timeout=60)
+        with patch.object(ml_client.Config, 'STRUCTURED_OUTPUT_ENABLED', False), \
+             patch.object(ml_client.Config, 'PROMPT_CACHE_ENABLED', False), \
+             patch.object(ml_client, 'gemini_breaker', breaker), \
+             patch.object(ml_client, 'recommendation_cache', cache), \
+             patch.object(ml_client, 'client', mock_client), \
+             patch('ml_client.retrieve', return_value=("", "")):
+            with pytest.raises(ml_client.LLMUnavailableError):
+                ml_client._generate_recommendation('heist', None, None, 5, 'gemini-flash', True)
+            assert list(ml_client.stream_movie_recommendations('heist')) == ['Movie Name: Heat']
+
+        assert cache.get('heist') is None
+
+    def test_thinking_budget(self):
+        with patch.object(ml_client.Config, 'GEMINI_THINKING_BUDGET', 0):
+            assert ml_client.generation_config().thinking_config.thinking_budget == 0
+        with patch.object(ml_client.Config, 'GEMINI_THINKING_BUDGET', None):
+            assert ml_client.generation_config().thinking_config is None
+
+    def test_text_mode_has_no_schema(self):
+        config = ml_client.generation_config(structured=False)
+        assert config.response_schema is None
+        assert config.max_output_tokens == ml_client.Config.MAX_OUTPUT_TOKENS
+
+
+class TestPromptCache:
+    def make_cache(self):
+        cache = ml_client.PromptPrefixCache(lambda key: ('cachedContents/abc', time.time() + 3600))
+        cache._handles[('gemini-flash', True)] = ('cachedContents/abc', time.time() + 3600)
+        return cache
+
+    def test_generation_uses_cached_instructions(self):
+        mock_client = MagicMock()
+        mock_client.models.generate_content.return_value = SimpleNamespace(
+            text='{"title": "Heat", "runtime_minutes": 170, "description": "x"}',
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=500, candidates_token_count=40, cached_content_token_count=400
+            ),
+        )
+        cache = self.make_cache()
+        with patch.object(ml_client.Config, 'STRUCTURED_OUTPUT_ENABLED', True), \
+             patch.object(ml_client.Config, 'PROMPT_CACHE_ENABLED', True), \
+             patch.object(ml_client, 'prompt_cache', cache), \
+             patch.object(ml_client, 'client', mock_client), \
+             patch('ml_client.retrieve', return_value=("", "")):
+            ml_client._generate_recommendation('heist', None, None, 5, 'gemini-flash', False)
+
+        config = mock_client.models.generate_content.call_args.kwargs['config']
+        assert config.cached_content == 'cachedContents/abc'
+        assert config.system_instruction is None
+        usage = cache.stats()['usage']['cached']
+        assert usage['calls'] == 1
+        assert usage['billed_input_tokens'] == 100
+
+    def test_rejected_handle_retries_inline(self):
+        mock_client = MagicMock()
+        mock_client.models.generate_content.side_effect = [
+            ml_client.genai_errors.ClientError(404, {'error': {'message': 'cache not found'}}),
+            SimpleNamespace(text='{"title": "Heat"}', usage_metadata=None),
+        ]
+        cache = self.make_cache()
+        with patch.object(ml_client.Config, 'PROMPT_CACHE_ENABLED', True), \
+             patch.object(ml_client, 'prompt_cache', cache), \
+             patch.object(ml_client, 'client', mock_client):
+            cache.get = MagicMock(return_value='cachedContents/abc')
+            response, cached_content, _ = ml_client._generate_content('gemini-flash', 'prompt', True)
+
+        assert cached_content is None
+        assert response.text == '{"title": "Heat"}'
+        retry_config = mock_client.models.generate_content.call_args.kwargs['config']
+        assert retry_config.system_instruction == ml_client.system_instruction(True)
+        assert ('gemini-flash', True) not in cache._handles
+
+    def test_quota_error_keeps_handle_and_is_not_retried(self):
+        mock_client = MagicMock()
+        mock_client.models.generate_content.side_effect = ml_client.genai_errors.ClientError(
+            429, {'error': {'message': 'Resource has been exhausted', 'status': 'RESOURCE_EXHAUSTED'}}
+        )
+        cache = self.make_cache()
+        with patch.object(ml_client.Config, 'PROMPT_CACHE_ENABLED', True), \
+             patch.object(ml_client, 'prompt_cache', cache), \
+             patch.object(ml_client, 'client', mock_client):
+            cache.get = MagicMock(return_value='cachedContents/abc')
+            with pytest.raises(ml_client.genai_errors.ClientError):
+                ml_client._generate_content('gemini-flash', 'prompt', True)
+
+        assert mock_client.models.generate_content.call_count == 1
+        assert ('gemini-flash', True) in cache._handles
+
+
+class TestModelTierCache:
+    def test_explicit_tier_bypasses_shared_cache(self):
+        cache = ml_client.RecommendationCache()
+        cache.set('heist', 'Movie Name: Heat')
+        mock_client = MagicMock()
+        mock_client.models.generate_content_stream.return_value = iter(
+            [SimpleNamespace(text='Movie Name: Thief', usage_metadata=None)]
+        )
+        breaker = ml_client.CircuitBreaker('gemini', failure_threshold=5, reset_timeout=60)
+        with patch.object(ml_client.Config, 'PROMPT_CACHE_ENABLED', False), \
+             patch.object(ml_client, 'gemini_breaker', breaker), \
+             patch.object(ml_client, 'recommendation_cache', cache), \
+             patch.object(ml_client, 'client', mock_client), \
+             patch('ml_client.retrieve', return_value=("", "")):
+            assert list(ml_client.stream_movie_recommendations('heist')) == ['Movie Name: Heat']
+            assert list(ml_client.stream_movie_recommendations('heist', model_tier='pro')) == \
+                ['Movie Name: Thief']
+
+        # The pro answer didn't replace the routed one
+        assert cache.get('heist') == 'Movie Name: Heat'
+
+
+class TestPrecomputed:
+    def setup_method(self):
+        ml_client.precomputed_dal.delete_one_precomputed('80s horror')
+
+    def test_store_and_get(self):
+        ml_client.store_precomputed_recommendation(
+            '80s Horror!', "Movie Name: The Thing\nRuntime: 109 minutes\nDescription: Ice."
+        )
+        doc = ml_client.precomputed_dal.find_one_precomputed('80s horror')
+        assert doc['recommendation']['title'] == 'The Thing'
+        assert ml_client.get_precomputed_recommendation('80s horror').startswith('Movie Name: The Thing')
+
+    def test_stale_answer_ignored(self):
+        ml_client.precomputed_dal.upsert_one_precomputed('80s horror', {
+            'response': 'old',
+            'computed_at': ml_client.datetime.utcnow() - ml_client.timedelta(days=30),
+        })
+        with patch.object(ml_client.Config, 'PRECOMPUTED_MAX_AGE_HOURS', 24):
+            assert ml_client.get_precomputed_recommendation('80s horror') is None
+
+    def test_disabled(self):
+        ml_client.store_precomputed_recommendation('80s horror', 'text')
+        with patch.object(ml_client.Config, 'PRECOMPUTED_ENABLED', False):
+            assert ml_client.get_precomputed_recommendation('80s horror') is None
+
+
+class TestInstrumentation:
+    def test_generation_records_stages_and_tokens(self):
+        mock_client = MagicMock()
+        mock_client.models.generate_content.return_value = SimpleNamespace(
+            text='Movie Name: Heat',
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=500, candidates_token_count=40, cached_content_token_count=None
+            ),
+        )
+        with patch.object(ml_client.Config, 'PROMPT_CACHE_ENABLED', False), \
+             patch.object(ml_client.Config, 'STRUCTURED_OUTPUT_ENABLED', False), \
+             patch.object(ml_client, 'client', mock_client), \
+             patch('ml_client.get_nearest_k', return_value=[]), \
+             patch('ml_client.get_prev_conversations', return_value=""), \
+             start_trace() as trace:
+            ml_client._generate_recommendation('heist', 'a@b.com', 'convo_1', 5, 'gemini-flash', False)
+
+        result = trace.to_dict()
+        assert {'retrieve', 'vector_search', 'history', 'prompt_build', 'llm'} <= set(result['stage_ms'])
+        assert result['prompt_tokens'] == 500
+        assert result['output_tokens'] == 40
+        assert 'cached_tokens' not in result
+        assert result['prompt_bytes'] > 0
+        assert ml_client.get_pipeline_metrics()['stage_seconds']['llm']['count'] >= 1
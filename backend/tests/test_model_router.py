@@ -0,0 +1,57 @@
+# Unit tests for model tier routing
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from backend.utils.model_router import ModelRouter, count_constraints
+
+MODELS = {'flash': 'gemini-flash', 'pro': 'gemini-pro'}
+
+
+@pytest.fixture
+def router():
+    return ModelRouter(MODELS, complex_min_words=20, complex_min_constraints=3)
+
+
+class TestCountConstraints:
+    def test_simple_query_has_no_constraints(self):
+        assert count_constraints("something like Inception") == 0
+
+    def test_multi_constraint_query(self):
+        query = "an 80s horror movie under 2 hours, not too gory, for family night"
+        assert count_constraints(query) >= 3
+
+
+class TestModelRouter:
+    def test_simple_query_uses_default_tier(self, router):
+        assert router.choose("something like Inception") == ('flash', 'gemini-flash')
+
+    def test_complex_query_uses_pro(self, router):
+        query = "an 80s horror movie under 2 hours, not too gory, for family night"
+        assert router.choose(query) == ('pro', 'gemini-pro')
+
+    def test_long_query_uses_pro(self, router):
+        assert router.choose("word " * 20)[0] == 'pro'
+
+    def test_explicit_tier(self, router):
+        assert router.choose("something like Inception", 'pro') == ('pro', 'gemini-pro')
+
+    def test_unknown_tier_is_routed(self, router):
+        assert router.choose("something like Inception", 'ultra')[0] == 'flash'
+
+    def test_unregistered_default_tier(self):
+        with pytest.raises(ValueError):
+            ModelRouter(MODELS, default_tier='nano')
+
+    def test_record_usage(self, router):
+        router.record('gemini-flash', 0.5, prompt_tokens=100, output_tokens=40)
+        router.record('gemini-flash', 1.5, prompt_tokens=120, output_tokens=60)
+
+        usage = router.stats()['usage']['gemini-flash']
+        assert usage['calls'] == 2
+        assert usage['avg_latency_seconds'] == pytest.approx(1.0)
+        assert usage['max_latency_seconds'] == pytest.approx(1.5)
+        assert usage['prompt_tokens'] == 220
+        assert usage['output_tokens'] == 100
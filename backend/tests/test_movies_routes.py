@@ -229,3 +229,24 @@ class TestDeleteMovie:
             
             assert response.status_code == 404
 
+
+
+class TestAddMovieIdempotency:
+    def test_resubmit_with_same_key_inserts_once(self, client):
+        with patch('routes.movies.movies_dal') as mock_dal:
+            mock_dal.insert_one_movie.return_value = "movie_123"
+            body = {
+                'movie_name': 'The Matrix',
+                'movie_description': 'A sci-fi film',
+                'user_email': 'idem@example.com',
+                'has_watched': False
+            }
+            headers = {'Idempotency-Key': 'confirm-form-1'}
+
+            first = client.post('/api/movies/add', json=body, headers=headers)
+            second = client.post('/api/movies/add', json=body, headers=headers)
+
+            assert first.status_code == second.status_code == 201
+            assert second.get_json()['movie_id'] == 'movie_123'
+            assert second.headers['Idempotent-Replayed'] == 'true'
+            mock_dal.insert_one_movie.assert_called_once()
@@ -0,0 +1,68 @@
+# Unit tests for the recommendation precompute helpers
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from backend.utils.precompute import RateLimiter, mine_popular_queries, precompute, read_query_file
+
+
+def user(text):
+    return {'role': 'user', 'content': text}
+
+
+class TestMinePopularQueries:
+    def test_counts_normalized_queries(self):
+        messages = [
+            user('80s horror'), user('80s Horror!'), user('80s horror'),
+            user('feel-good comedy'), user('feel good comedy'),
+            user('something obscure'),
+            {'role': 'model', 'content': '80s horror'},
+        ]
+        assert mine_popular_queries(messages, top_n=10, min_count=2) == [
+            '80s horror', 'feel-good comedy'
+        ]
+
+    def test_top_n(self):
+        messages = [user('a b')] * 3 + [user('c d')] * 2
+        assert mine_popular_queries(messages, top_n=1, min_count=1) == ['a b']
+
+
+def test_read_query_file(tmp_path):
+    path = tmp_path / 'queries.txt'
+    path.write_text('# popular intents\n80s horror\n\n  feel-good comedy  \n')
+    assert read_query_file(str(path)) == ['80s horror', 'feel-good comedy']
+
+
+class TestRateLimiter:
+    def test_spaces_calls(self):
+        now = [0.0]
+        sleeps = []
+        limiter = RateLimiter(2.0, clock=lambda: now[0], sleep=sleeps.append)
+        for _ in range(3):
+            limiter.wait()
+        assert sleeps == [0.5, 1.0]
+
+
+class TestPrecompute:
+    def test_stores_results_and_skips_failures(self):
+        stored = {}
+        lock = threading.Lock()
+
+        def compute(query):
+            if query == 'bad':
+                raise RuntimeError('LLM down')
+            return f'answer to {query}'
+
+        def store(query, result):
+            with lock:
+                stored[query] = result
+
+        stats = precompute(
+            ['80s horror', '80s Horror', 'bad', 'comedy'], compute, store,
+            workers=2, rate_per_second=0,
+        )
+
+        assert stats == {'queries': 3, 'stored': 2, 'failed': 1}
+        assert stored == {'80s horror': 'answer to 80s horror', 'comedy': 'answer to comedy'}
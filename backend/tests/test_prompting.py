@@ -0,0 +1,69 @@
+# Unit tests for prompt formatting helpers
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from backend.utils.prompting import (
+    truncate,
+    format_context,
+    estimate_tokens,
+    prompt_size,
+)
+
+
+def make_hit(title, description):
+    return SimpleNamespace(
+        uuid="0b0e8d9c-5c1e-4b7c-9a0d-000000000000",
+        metadata=SimpleNamespace(distance=0.12),
+        properties={"title": title, "description": description},
+    )
+
+
+class TestTruncate:
+    def test_truncate_short_text_unchanged(self):
+        assert truncate("A short  plot.", 50) == "A short plot."
+
+    def test_truncate_cuts_at_word_boundary(self):
+        result = truncate("one two three four five", 12)
+        assert result == "one two…"
+        assert len(result) <= 12
+
+    def test_truncate_none(self):
+        assert truncate(None, 10) == ""
+
+
+class TestFormatContext:
+    def test_format_context_query_return(self):
+        results = SimpleNamespace(objects=[
+            make_hit("Alien", "In deep space, the crew of the Nostromo wakes to a distress call."),
+            make_hit("The Thing", "Researchers in Antarctica meet a shape-shifting alien."),
+        ])
+
+        context = format_context(results, max_chars_per_hit=30)
+
+        assert context.splitlines()[0].startswith("- Alien: In deep space")
+        assert "uuid" not in context
+        assert "0b0e8d9c" not in context
+        assert "distance" not in context
+        assert len(context.splitlines()) == 2
+
+    def test_format_context_skips_untitled(self):
+        context = format_context([{"title": "", "description": "x"}, {"title": "Heat"}])
+        assert context == "- Heat"
+
+    def test_format_context_empty(self):
+        assert format_context("") == ""
+        assert format_context(None) == ""
+
+
+class TestPromptSize:
+    def test_prompt_size_counts_bytes(self):
+        size = prompt_size("é" * 8)
+        assert size["chars"] == 8
+        assert size["bytes"] == 16
+        assert size["est_tokens"] == 2
+
+    def test_estimate_tokens_empty(self):
+        assert estimate_tokens("") == 0
@@ -0,0 +1,155 @@
+# Unit tests for token-bucket rate limiting
+import os
+import sys
+import pytest
+from flask import Blueprint, Flask, jsonify
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from backend.utils.rate_limit import (
+    MemoryBucketBackend,
+    RateLimit,
+    RateLimiter,
+    StoreBucketBackend,
+)
+
+
+class TestMemoryBucketBackend:
+    def test_allows_burst_then_rejects(self, clock):
+        backend = MemoryBucketBackend(clock=clock)
+        states = [backend.take('k', capacity=3, rate=1) for _ in range(4)]
+        assert [s.allowed for s in states] == [True, True, True, False]
+        assert states[2].remaining == 0
+        assert states[3].retry_after == pytest.approx(1.0)
+
+    def test_refills_over_time(self, clock):
+        backend = MemoryBucketBackend(clock=clock)
+        for _ in range(2):
+            backend.take('k', capacity=2, rate=0.5)
+        assert not backend.take('k', capacity=2, rate=0.5).allowed
+
+        clock.now += 2.0
+        state = backend.take('k', capacity=2, rate=0.5)
+        assert state.allowed
+        assert state.reset_after == pytest.approx(4.0)
+
+    def test_keys_are_independent(self, clock):
+        backend = MemoryBucketBackend(clock=clock)
+        backend.take('a', capacity=1, rate=1)
+        assert not backend.take('a', capacity=1, rate=1).allowed
+        assert backend.take('b', capacity=1, rate=1).allowed
+
+    def test_evicts_full_buckets_at_capacity(self, clock):
+        backend = MemoryBucketBackend(clock=clock, max_keys=2)
+        backend.take('a', capacity=1, rate=1)
+        backend.take('b', capacity=1, rate=1)
+        clock.now += 5.0
+        backend.take('c', capacity=1, rate=1)
+        assert set(backend._buckets) == {'c'}
+
+
+class TestStoreBucketBackend:
+    def test_maps_store_result(self):
+        class Store:
+            def take_token(self, key, capacity, rate, cost):
+                return False, 0.5
+
+        state = StoreBucketBackend(Store()).take('k', capacity=5, rate=0.25)
+        assert not state.allowed
+        assert state.retry_after == pytest.approx(2.0)
+
+    def test_fake_dal_take_token(self):
+        from backend.fake_DAL import db_app, rate_limits_dal
+        db_app.rate_limits.clear()
+        results = [rate_limits_dal.take_token('k', 2, 0.001) for _ in range(3)]
+        assert [allowed for allowed, _ in results] == [True, True, False]
+
+
+def make_app(clock, **limiter_kwargs):
+    bp = Blueprint('chat', __name__, url_prefix='/api/chat')
+
+    @bp.route('/message', methods=['GET', 'POST'])
+    def message():
+        return jsonify({'success': True})
+
+    app = Flask(__name__)
+    app.register_blueprint(bp)
+    limiter = RateLimiter(
+        MemoryBucketBackend(clock=clock),
+        {'chat': RateLimit(per_minute=60, burst=2)},
+        ip_factor=2,
+        **limiter_kwargs,
+    )
+    limiter.init_app(app)
+    app.extensions['rate_limiter'] = limiter
+    return app
+
+
+@pytest.fixture
+def app(clock):
+    return make_app(clock)
+
+
+class TestRateLimiter:
+    def post(self, client, email, ip='10.0.0.1'):
+        return client.post('/api/chat/message', json={'user_email': email},
+                           environ_base={'REMOTE_ADDR': ip})
+
+    def test_user_limit_returns_429(self, app):
+        client = app.test_client()
+        assert self.post(client, 'a@x.com').status_code == 200
+        assert self.post(client, 'A@x.com').status_code == 200
+        response = self.post(client, 'a@x.com')
+        assert response.status_code == 429
+        assert response.get_json()['error_code'] == 'RATE_LIMITED'
+        assert response.headers['Retry-After'] == '1'
+        assert app.extensions['rate_limiter'].rejected == 1
+
+    def test_users_have_separate_buckets(self, app):
+        client = app.test_client()
+        for _ in range(2):
+            self.post(client, 'a@x.com')
+        assert self.post(client, 'b@x.com').status_code == 200
+
+    def test_ip_limit_applies_across_users(self, app):
+        client = app.test_client()
+        statuses = [self.post(client, f'user{i}@x.com').status_code for i in range(5)]
+        assert statuses == [200, 200, 200, 200, 429]
+        assert self.post(client, 'user9@x.com', ip='10.0.0.2').status_code == 200
+
+    def test_headers_report_tighter_bucket(self, app):
+        response = self.post(app.test_client(), 'a@x.com')
+        assert response.headers['X-RateLimit-Limit'] == '2'
+        assert response.headers['X-RateLimit-Remaining'] == '1'
+        assert response.headers['X-RateLimit-Reset'] == '1'
+
+    def test_reads_are_not_limited(self, app):
+        client = app.test_client()
+        for _ in range(5):
+            response = client.get('/api/chat/message?user_email=a@x.com')
+            assert response.status_code == 200
+            assert 'X-RateLimit-Limit' not in response.headers
+
+    def test_trusted_proxy_is_limited_by_forwarded_ip(self, clock):
+        app = make_app(clock, trusted_proxies=['10.0.0.9'])
+        client = app.test_client()
+
+        def post(email, forwarded):
+            return client.post('/api/chat/message', json={'user_email': email},
+                               headers={'X-Forwarded-For': forwarded},
+                               environ_base={'REMOTE_ADDR': '10.0.0.9'})
+
+        statuses = [post(f'user{i}@x.com', '1.2.3.4').status_code for i in range(5)]
+        assert statuses == [200, 200, 200, 200, 429]
+        # Other clients behind the same proxy have their own IP bucket
+        assert post('user9@x.com', '5.6.7.8').status_code == 200
+        # A spoofed first hop doesn't escape the bucket
+        assert post('user10@x.com', '9.9.9.9, 1.2.3.4').status_code == 429
+
+    def test_trusted_proxy_without_forwarded_ip_skips_ip_bucket(self, clock):
+        app = make_app(clock, trusted_proxies=['172.16.0.0/12'])
+        client = app.test_client()
+        statuses = [client.post('/api/chat/message', json={'user_email': f'user{i}@x.com'},
+                                environ_base={'REMOTE_ADDR': '172.18.0.5'}).status_code
+                    for i in range(6)]
+        assert statuses == [200] * 6
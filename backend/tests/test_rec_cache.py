@@ -0,0 +1,97 @@
+# Unit tests for the recommendation cache
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from backend.utils.rec_cache import (
+    RecommendationCache,
+    normalize_query,
+    cosine_similarity,
+)
+
+
+class TestNormalizeQuery:
+    def test_normalize_query_case_and_punctuation(self):
+        assert normalize_query("  Scary   HORROR movie?! ") == "scary horror movie"
+
+    def test_normalize_query_non_string(self):
+        assert normalize_query(None) == ""
+
+
+class TestCosineSimilarity:
+    def test_cosine_similarity_identical(self):
+        assert cosine_similarity([1.0, 2.0], [1.0, 2.0]) == pytest.approx(1.0)
+
+    def test_cosine_similarity_mismatched_lengths(self):
+        assert cosine_similarity([1.0], [1.0, 2.0]) == 0.0
+
+
+class TestRecommendationCache:
+    def test_get_miss_then_hit(self):
+        cache = RecommendationCache()
+        assert cache.get("scary horror movie") is None
+        cache.set("scary horror movie", "Movie Name: Alien")
+
+        assert cache.get("Scary horror movie!") == "Movie Name: Alien"
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_ttl_expiry(self, clock):
+        cache = RecommendationCache(ttl_seconds=10, clock=clock)
+        cache.set("comedy", "Movie Name: Airplane!")
+
+        clock.now += 11
+        assert cache.get("comedy") is None
+        assert cache.stats()["expirations"] == 1
+
+    def test_lru_eviction(self):
+        cache = RecommendationCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert cache.stats()["evictions"] == 1
+
+    def test_semantic_match(self):
+        vectors = {
+            "scary horror movie": [1.0, 0.0],
+            "frightening horror film": [0.95, 0.05],
+            "romantic comedy": [0.0, 1.0],
+        }
+        calls = []
+
+        def embed(text):
+            calls.append(text)
+            return vectors[text]
+
+        cache = RecommendationCache(similarity_threshold=0.9, embed_fn=embed)
+        assert cache.get("scary horror movie") is None
+        cache.set("scary horror movie", "Movie Name: The Thing")
+
+        # embedding computed on the miss is reused by set()
+        assert calls == ["scary horror movie"]
+        assert cache.get("frightening horror film") == "Movie Name: The Thing"
+        assert cache.get("romantic comedy") is None
+        assert cache.stats()["semantic_hits"] == 1
+
+    def test_semantic_embed_failure_is_a_miss(self):
+        def embed(text):
+            raise RuntimeError("embedding service down")
+
+        cache = RecommendationCache(similarity_threshold=0.9, embed_fn=embed)
+        cache.set("drama", "Movie Name: Whiplash")
+        assert cache.get("dramatic film") is None
+        assert cache.get("drama") == "Movie Name: Whiplash"
+
+    def test_empty_query_not_cached(self):
+        cache = RecommendationCache()
+        cache.set("   ", "value")
+        assert len(cache) == 0
+        assert cache.get("") is None
@@ -0,0 +1,50 @@
+# Unit tests for the typed recommendation object
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from backend.utils.recommendation import Recommendation
+
+
+class TestFromJson:
+    def test_parses_schema_output(self):
+        rec = Recommendation.from_json(
+            '{"title": " Heat ", "runtime_minutes": 170, "description": "Cops and robbers."}'
+        )
+        assert rec == Recommendation('Heat', 170, 'Cops and robbers.')
+
+    def test_null_or_invalid_runtime(self):
+        assert Recommendation.from_json('{"title": "Alien", "runtime_minutes": null}').runtime_minutes is None
+        assert Recommendation.from_json('{"title": "Alien", "runtime_minutes": "long"}').runtime_minutes is None
+
+    @pytest.mark.parametrize('text', ['', '{"title": "He', '[]', '{"description": "x"}'])
+    def test_malformed(self, text):
+        with pytest.raises(ValueError):
+            Recommendation.from_json(text)
+
+
+class TestTextFormat:
+    def test_round_trip(self):
+        rec = Recommendation('Heat', 170, 'Cops and robbers.')
+        assert rec.to_text() == "Movie Name: Heat\nRuntime: 170 minutes\nDescription: Cops and robbers."
+        assert Recommendation.from_text(rec.to_text()) == rec
+
+    def test_unknown_runtime(self):
+        rec = Recommendation.from_text("Movie Name: Alien\nRuntime: unknown\nDescription: Space.")
+        assert rec.runtime_minutes is None
+        assert "Runtime: unknown" in rec.to_text()
+
+    def test_not_a_recommendation(self):
+        assert Recommendation.from_text("Could you tell me more?") is None
+        assert Recommendation.from_text(None) is None
+
+    def test_malformed_runtime(self):
+        text = "Movie Name: Heat\nRuntime: 1.2.3 minutes\nDescription: Cops and robbers."
+        assert Recommendation.from_text(text) is None
+
+    def test_to_dict(self):
+        assert Recommendation('Heat', None, '').to_dict() == {
+            'title': 'Heat', 'runtime_minutes': None, 'description': ''
+        }
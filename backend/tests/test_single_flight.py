@@ -0,0 +1,81 @@
+# Unit tests for single-flight request coalescing
+import os
+import sys
+import threading
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from backend.utils.single_flight import SingleFlight
+
+
+def run_concurrently(count, target):
+    results = [None] * count
+    errors = [None] * count
+
+    def worker(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+
+class TestSingleFlight:
+    def test_sequential_calls_each_run(self):
+        flight = SingleFlight()
+        assert flight.do('k', lambda: 1) == 1
+        assert flight.do('k', lambda: 2) == 2
+        assert flight.stats()['upstream_calls'] == 2
+        assert flight.stats()['coalesced'] == 0
+
+    def test_concurrent_identical_calls_share_result(self):
+        flight = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def upstream():
+            calls.append(1)
+            release.wait(timeout=5)
+            return 'Movie Name: Heat'
+
+        threads, results, _ = run_concurrently(5, lambda: flight.do('heat', upstream))
+        # wait until every follower has joined the in-flight call
+        for _ in range(200):
+            if flight.stats()['coalesced'] == 4:
+                break
+            threading.Event().wait(0.01)
+        release.set()
+        for t in threads:
+            t.join(timeout=5)
+
+        assert len(calls) == 1
+        assert results == ['Movie Name: Heat'] * 5
+        stats = flight.stats()
+        assert stats['upstream_calls'] == 1
+        assert stats['coalesced'] == 4
+        assert stats['in_flight'] == 0
+
+    def test_error_is_shared_and_key_released(self):
+        flight = SingleFlight()
+        release = threading.Event()
+
+        def upstream():
+            release.wait(timeout=5)
+            raise RuntimeError('quota exceeded')
+
+        threads, _, errors = run_concurrently(3, lambda: flight.do('k', upstream))
+        for _ in range(200):
+            if flight.stats()['coalesced'] == 2:
+                break
+            threading.Event().wait(0.01)
+        release.set()
+        for t in threads:
+            t.join(timeout=5)
+
+        assert all(isinstance(e, RuntimeError) for e in errors)
+        assert flight.do('k', lambda: 'ok') == 'ok'
@@ -0,0 +1,72 @@
+# Unit tests for the catalog title dictionary
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from backend.utils.title_index import TitleIndex, normalize_title
+
+
+@pytest.fixture
+def titles():
+    return TitleIndex.build([
+        {'uuid': 'u-inception', 'title': 'Inception'},
+        {'uuid': 'u-matrix', 'title': 'The Matrix'},
+        {'uuid': 'u-her', 'title': 'Her'},
+        {'uuid': 'u-heat', 'title': 'Heat (1995)'},
+        {'uuid': 'u-dune', 'title': 'Dune: Part Two'},
+        {'uuid': 'u-matrix-dup', 'title': 'the matrix'},
+    ])
+
+
+class TestNormalizeTitle:
+    def test_strips_case_punctuation_and_article(self):
+        assert normalize_title('The Matrix!') == 'matrix'
+
+    def test_strips_year(self):
+        assert normalize_title('Heat (1995)') == 'heat'
+
+    def test_empty(self):
+        assert normalize_title(None) == ''
+
+
+class TestTitleIndex:
+    def test_first_duplicate_wins(self, titles):
+        assert len(titles) == 5
+        assert titles.lookup('THE MATRIX')['uuid'] == 'u-matrix'
+
+    def test_find_after_cue_word(self, titles):
+        assert titles.find_in_query('something like Inception')['uuid'] == 'u-inception'
+        assert titles.find_in_query('I loved heat, what next?')['uuid'] == 'u-heat'
+
+    def test_find_whole_query(self, titles):
+        assert titles.find_in_query('Her')['uuid'] == 'u-her'
+
+    def test_find_distinctive_multiword_title(self, titles):
+        assert titles.find_in_query('anything close to dune part two please')['uuid'] == 'u-dune'
+        assert titles.find_in_query('sci fi like the matrix')['uuid'] == 'u-matrix'
+
+    def test_short_generic_word_ignored(self, titles):
+        assert titles.find_in_query('a romance where he falls for her') is None
+
+    def test_article_does_not_make_a_title_distinctive(self, titles):
+        assert titles.find_in_query('sci fi the matrix vibes') is None
+
+    def test_everyday_phrases_do_not_match_titles(self):
+        titles = TitleIndex.build([
+            {'uuid': 'u-kids', 'title': 'Kids (1995)'},
+            {'uuid': 'u-family', 'title': 'The Family'},
+            {'uuid': 'u-date', 'title': 'Date Night'},
+            {'uuid': 'u-way', 'title': 'The Way of the Gun'},
+        ])
+        assert titles.find_in_query('good movies for the kids') is None
+        assert titles.find_in_query('something to watch with the family') is None
+        assert titles.find_in_query('a movie for date night') is None
+        assert titles.find_in_query('comedies like date night')['uuid'] == 'u-date'
+        assert titles.find_in_query('Date Night')['uuid'] == 'u-date'
+        assert titles.find_in_query('westerns in the way of the gun style')['uuid'] == 'u-way'
+
+    def test_no_match(self, titles):
+        assert titles.find_in_query('scary movie for tonight') is None
+        assert TitleIndex().find_in_query('like Inception') is None
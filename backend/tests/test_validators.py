@@ -10,6 +10,7 @@ from backend.utils.validators import (
     validate_login_data,
     validate_chat_message,
     validate_movie_data,
+    validate_page_params,
 )
 
 
@@ -136,6 +137,15 @@ class TestValidateChatMessage:
         }
         is_valid, _ = validate_chat_message(data)
         assert is_valid is False
+    
+    def test_validate_chat_message_invalid_model_tier(self):
+        data = {
+            "message": "Hello",
+            "user_email": "test@example.com",
+            "model_tier": 3
+        }
+        is_valid, _ = validate_chat_message(data)
+        assert is_valid is False
 
 
 class TestValidateMovieData:
@@ -215,4 +225,23 @@ class TestValidateMovieData:
             "rating": 8.5
         }
         is_valid, _ = validate_movie_data(data)
-        assert is_valid is True
\ No newline at end of file
+        assert is_valid is True
+
+class TestValidatePageParams:
+    def test_no_params_means_no_paging(self):
+        assert validate_page_params({}, 50, 200) == (True, "", None)
+
+    def test_default_limit(self):
+        is_valid, _, page = validate_page_params({"before": "120"}, 50, 200)
+        assert is_valid is True
+        assert page == {"limit": 50, "before": 120, "after": None}
+
+    def test_before_and_after_rejected(self):
+        is_valid, _, _ = validate_page_params({"before": "5", "after": "1"}, 50, 200)
+        assert is_valid is False
+
+    @pytest.mark.parametrize("args", [{"limit": "abc"}, {"limit": "0"}, {"limit": "500"}, {"after": "-1"}])
+    def test_invalid_values(self, args):
+        is_valid, _, page = validate_page_params(args, 50, 200)
+        assert is_valid is False
+        assert page is None
@@ -0,0 +1,94 @@
+# Unit tests for the in-process vector index
+import os
+import sys
+import pytest
+from types import SimpleNamespace
+
+np = pytest.importorskip("numpy")
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from backend.utils.vector_index import LocalVectorIndex, sync_with_collection
+
+RECORDS = [
+    {"uuid": "a", "vector": [1.0, 0.0, 0.0], "properties": {"title": "Alien"}},
+    {"uuid": "b", "vector": [0.0, 1.0, 0.0], "properties": {"title": "Heat"}},
+    {"uuid": "c", "vector": [0.7, 0.7, 0.0], "properties": {"title": "Aliens"}},
+]
+
+
+def titles(result):
+    return [hit.properties["title"] for hit in result.objects]
+
+
+class TestLocalVectorIndex:
+    @pytest.mark.parametrize("quantize", [False, True])
+    def test_search_orders_by_cosine(self, quantize):
+        index = LocalVectorIndex.build(RECORDS, quantize=quantize)
+        assert titles(index.search([1.0, 0.1, 0.0], k=2)) == ["Alien", "Aliens"]
+
+    @pytest.mark.parametrize("quantize", [False, True])
+    def test_similar_to_excludes_seed(self, quantize):
+        index = LocalVectorIndex.build(RECORDS, quantize=quantize)
+        assert titles(index.similar_to("a", k=1)) == ["Aliens"]
+        with pytest.raises(KeyError):
+            index.similar_to("missing")
+
+    def test_search_k_larger_than_index(self):
+        index = LocalVectorIndex.build(RECORDS)
+        assert len(index.search([0.0, 1.0, 0.0], k=10).objects) == 3
+
+    def test_save_and_load_memory_mapped(self, tmp_path):
+        path = str(tmp_path / "movies_index")
+        LocalVectorIndex.build(RECORDS, quantize=True, path=path).save()
+
+        loaded = LocalVectorIndex.load(path)
+        assert isinstance(loaded._vectors, np.memmap)
+        assert loaded.quantized
+        assert titles(loaded.search([0.0, 1.0, 0.0], k=1)) == ["Heat"]
+
+    def test_upsert_and_remove(self, tmp_path):
+        index = LocalVectorIndex.build(RECORDS, path=str(tmp_path / "idx"))
+        index.upsert([{"uuid": "b", "vector": [0.0, 0.0, 1.0], "properties": {"title": "Heat (2)"}}])
+        index.remove(["a"])
+
+        assert len(index) == 2
+        assert titles(index.search([0.0, 0.0, 1.0], k=1)) == ["Heat (2)"]
+        assert "Alien" not in titles(index.search([1.0, 0.0, 0.0], k=3))
+
+        index.save()
+        assert sorted(LocalVectorIndex.load(str(tmp_path / "idx")).uuids()) == ["b", "c"]
+
+    def test_upsert_dimension_mismatch(self):
+        index = LocalVectorIndex.build(RECORDS)
+        with pytest.raises(ValueError):
+            index.upsert([{"uuid": "d", "vector": [1.0, 0.0], "properties": {}}])
+
+
+class FakeCollection:
+    def __init__(self, objects):
+        self.objects = objects
+        self.fetched = []
+        self.query = SimpleNamespace(fetch_objects_by_ids=self.fetch_objects_by_ids)
+
+    def iterator(self, include_vector=False, return_properties=None):
+        return iter(self.objects)
+
+    def fetch_objects_by_ids(self, ids, **kwargs):
+        self.fetched.extend(ids)
+        return SimpleNamespace(objects=[o for o in self.objects if str(o.uuid) in ids])
+
+
+class TestSyncWithCollection:
+    def test_sync_fetches_only_new_objects(self):
+        index = LocalVectorIndex.build(RECORDS[:2])
+        collection = FakeCollection([
+            SimpleNamespace(uuid="b", vector={"default": [0.0, 1.0, 0.0]}, properties={"title": "Heat"}),
+            SimpleNamespace(uuid="c", vector={"default": [0.7, 0.7, 0.0]}, properties={"title": "Aliens"}),
+        ])
+
+        changes = sync_with_collection(index, collection)
+
+        assert changes == {"added": 1, "removed": 1}
+        assert collection.fetched == ["c"]
+        assert sorted(index.uuids()) == ["b", "c"]
@@ -0,0 +1,110 @@
+# Unit tests for the write-behind queue
+import os
+import sys
+import threading
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from backend.utils.write_behind import BacklogFull, WriteBehindQueue
+
+
+class Recorder:
+    def __init__(self, fail_times=0):
+        self.batches = []
+        self.fail_times = fail_times
+        self.lock = threading.Lock()
+
+    def __call__(self, items):
+        with self.lock:
+            if self.fail_times:
+                self.fail_times -= 1
+                return list(items)
+            self.batches.append(list(items))
+            return []
+
+    @property
+    def items(self):
+        return [item for batch in self.batches for item in batch]
+
+
+class TestWriteBehindQueue:
+    def test_batches_items_submitted_together(self):
+        recorder = Recorder()
+        queue = WriteBehindQueue(recorder, batch_size=10, flush_interval=0.2)
+        for i in range(5):
+            queue.submit(i)
+        assert queue.flush(timeout=2)
+        assert recorder.batches == [[0, 1, 2, 3, 4]]
+        assert queue.stats()['written'] == 5
+        queue.close()
+
+    def test_full_batch_is_written_without_lingering(self):
+        recorder = Recorder()
+        queue = WriteBehindQueue(recorder, batch_size=2, flush_interval=30)
+        queue.submit('a', keys=['k'])
+        queue.submit('b', keys=['k'])
+        assert queue.wait('k', timeout=2)
+        assert recorder.items == ['a', 'b']
+        queue.close()
+
+    def test_retries_failed_items_in_order(self):
+        recorder = Recorder(fail_times=2)
+        queue = WriteBehindQueue(recorder, flush_interval=0.01, retry_backoff=0.01)
+        queue.submit('first')
+        queue.submit('second')
+        assert queue.flush(timeout=2)
+        assert recorder.items == ['first', 'second']
+        assert queue.stats()['retried'] >= 2
+        queue.close()
+
+    def test_drops_after_max_retries(self):
+        def always_fail(items):
+            raise RuntimeError('mongo down')
+
+        queue = WriteBehindQueue(always_fail, flush_interval=0.01, max_retries=2, retry_backoff=0.01)
+        queue.submit('x', keys=['k'])
+        assert queue.wait('k', timeout=2)
+        stats = queue.stats()
+        assert stats['dropped'] == 1
+        assert stats['retried'] == 2
+        assert stats['backlog'] == 0
+        queue.close()
+
+    def test_pending_and_wait_track_keys(self):
+        release = threading.Event()
+
+        def slow(items):
+            release.wait(2)
+            return []
+
+        queue = WriteBehindQueue(slow, flush_interval=0)
+        queue.submit('x', keys=[('convo', 'a@x.com'), 'a@x.com'])
+        assert queue.pending('a@x.com') == 1
+        assert queue.pending('b@x.com') == 0
+        assert not queue.wait('a@x.com', timeout=0.05)
+        release.set()
+        assert queue.wait(('convo', 'a@x.com'), timeout=2)
+        assert queue.pending('a@x.com') == 0
+        queue.close()
+
+    def test_backlog_limit(self):
+        release = threading.Event()
+        queue = WriteBehindQueue(lambda items: release.wait(2) and [], max_backlog=2, flush_interval=10)
+        queue.submit(1)
+        queue.submit(2)
+        assert queue.backlog() == 2
+        with pytest.raises(BacklogFull):
+            queue.submit(3)
+        release.set()
+        queue.close()
+
+    def test_close_writes_backlog(self):
+        recorder = Recorder()
+        queue = WriteBehindQueue(recorder, flush_interval=30)
+        queue.submit('a')
+        queue.submit('b')
+        assert queue.close(timeout=2)
+        assert recorder.items == ['a', 'b']
+        with pytest.raises(BacklogFull):
+            queue.submit('c')
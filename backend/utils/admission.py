@@ -0,0 +1,110 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator
+
+
+class AdmissionRejected(Exception):
+    """Raised when a call is shed instead of queued (queue full or wait timed out)."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"admission rejected: {reason}")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Cap concurrent calls to an upstream, with a bounded wait queue.
+
+    Up to max_concurrency calls run at once. Further callers wait, at most
+    max_queue of them and each for at most queue_timeout seconds; beyond
+    that they are rejected immediately with AdmissionRejected, whose
+    retry_after estimates when a slot should free up from the average time
+    a slot is held. max_concurrency <= 0 disables the limit.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int = 0,
+        queue_timeout: float = 10.0,
+        default_retry_after: int = 5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.default_retry_after = default_retry_after
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._avg_hold = None
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected_full = 0
+        self.rejected_timeout = 0
+
+    @contextmanager
+    def admit(self) -> Iterator[None]:
+        self._acquire()
+        start = self._clock()
+        try:
+            yield
+        finally:
+            self._release(self._clock() - start)
+
+    def _acquire(self) -> None:
+        with self._cond:
+            if self.max_concurrency <= 0 or (
+                self.in_flight < self.max_concurrency and self.queued == 0
+            ):
+                self._enter()
+                return
+            if self.queued >= self.max_queue:
+                self.rejected_full += 1
+                raise AdmissionRejected("queue_full", self._retry_after())
+
+            self.queued += 1
+            deadline = self._clock() + self.queue_timeout
+            try:
+                while self.in_flight >= self.max_concurrency:
+                    remaining = deadline - self._clock()
+                    if remaining <= 0:
+                        self.rejected_timeout += 1
+                        raise AdmissionRejected("queue_timeout", self._retry_after())
+                    self._cond.wait(remaining)
+            finally:
+                self.queued -= 1
+            self._enter()
+
+    def _enter(self) -> None:
+        self.in_flight += 1
+        self.admitted += 1
+
+    def _release(self, held: float) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            # Exponentially weighted average of how long a slot is held
+            self._avg_hold = held if self._avg_hold is None else 0.8 * self._avg_hold + 0.2 * held
+            self._cond.notify()
+
+    def _retry_after(self) -> int:
+        if self._avg_hold is None or self.max_concurrency <= 0:
+            return self.default_retry_after
+        waves = (self.queued + 1) / self.max_concurrency
+        return max(1, math.ceil(self._avg_hold * waves))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "queued": self.queued,
+                "admitted": self.admitted,
+                "rejected_queue_full": self.rejected_full,
+                "rejected_queue_timeout": self.rejected_timeout,
+                "avg_hold_seconds": self._avg_hold or 0.0,
+            }
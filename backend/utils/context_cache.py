@@ -0,0 +1,137 @@
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class PromptPrefixCache:
+    """
+    Handles to server-side cached content for static prompt prefixes.
+
+    create_fn(key) uploads the prefix for a key (e.g. a model name) and
+    returns (cache name, expiry as epoch seconds). get(key) never blocks on
+    that upload: it returns the current handle, or None while one is being
+    created in the background. A handle is refreshed once it comes within
+    refresh_margin seconds of expiry. Failed uploads are retried after
+    retry_after seconds, so a model that rejects caching (e.g. a prefix
+    below its minimum size) costs one call per interval, not one per request.
+
+    record() keeps latency and token counts for calls made with and without
+    a handle, so the two can be compared.
+    """
+
+    def __init__(
+        self,
+        create_fn: Callable[[Hashable], Tuple[str, float]],
+        refresh_margin: float = 60.0,
+        retry_after: float = 600.0,
+        executor: Optional[Executor] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.create_fn = create_fn
+        self.refresh_margin = refresh_margin
+        self.retry_after = retry_after
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="prompt-cache"
+        )
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._handles: Dict[Hashable, Tuple[str, float]] = {}
+        self._creating = set()
+        self._failed_at: Dict[Hashable, float] = {}
+        self._last_error: Dict[Hashable, str] = {}
+        self._usage = {mode: self._empty_usage() for mode in ("cached", "uncached")}
+        self.created = 0
+        self.create_failures = 0
+
+    @staticmethod
+    def _empty_usage() -> Dict[str, Any]:
+        return {
+            "calls": 0,
+            "total_latency_seconds": 0.0,
+            "prompt_tokens": 0,
+            "cached_tokens": 0,
+        }
+
+    def get(self, key: Hashable) -> Optional[str]:
+        now = self._clock()
+        with self._lock:
+            handle = self._handles.get(key)
+            name = handle[0] if handle and handle[1] > now else None
+            if handle and handle[1] - self.refresh_margin > now:
+                return name
+
+            failed_at = self._failed_at.get(key)
+            if key in self._creating or (failed_at is not None and now - failed_at < self.retry_after):
+                return name
+            self._creating.add(key)
+
+        self.executor.submit(self._create, key)
+        return self._current(key) or name
+
+    def _current(self, key: Hashable) -> Optional[str]:
+        with self._lock:
+            handle = self._handles.get(key)
+            return handle[0] if handle and handle[1] > self._clock() else None
+
+    def _create(self, key: Hashable) -> None:
+        try:
+            name, expires_at = self.create_fn(key)
+        except Exception as e:
+            print(f"Warning: Could not create cached prompt prefix for {key}: {e}")
+            with self._lock:
+                self._creating.discard(key)
+                self._failed_at[key] = self._clock()
+                self._last_error[key] = str(e)
+                self.create_failures += 1
+            return
+
+        with self._lock:
+            self._creating.discard(key)
+            self._handles[key] = (name, expires_at)
+            self._failed_at.pop(key, None)
+            self._last_error.pop(key, None)
+            self.created += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        """Forget a handle the API no longer accepts; the next get() recreates it."""
+        with self._lock:
+            self._handles.pop(key, None)
+
+    def record(
+        self,
+        cached: bool,
+        latency_seconds: float,
+        prompt_tokens: Optional[int] = None,
+        cached_tokens: Optional[int] = None,
+    ) -> None:
+        with self._lock:
+            usage = self._usage["cached" if cached else "uncached"]
+            usage["calls"] += 1
+            usage["total_latency_seconds"] += latency_seconds
+            usage["prompt_tokens"] += prompt_tokens or 0
+            usage["cached_tokens"] += cached_tokens or 0
+
+    def stats(self) -> Dict[str, Any]:
+        now = self._clock()
+        with self._lock:
+            comparison = {}
+            for mode, u in self._usage.items():
+                calls = u["calls"]
+                billed = u["prompt_tokens"] - u["cached_tokens"]
+                comparison[mode] = {
+                    **u,
+                    "billed_input_tokens": billed,
+                    "avg_latency_seconds": u["total_latency_seconds"] / calls if calls else 0.0,
+                    "avg_billed_input_tokens": billed / calls if calls else 0.0,
+                }
+            return {
+                "handles": {
+                    str(key): {"name": name, "expires_in_seconds": max(0.0, expires_at - now)}
+                    for key, (name, expires_at) in self._handles.items()
+                },
+                "created": self.created,
+                "create_failures": self.create_failures,
+                "last_errors": {str(key): error for key, error in self._last_error.items()},
+                "usage": comparison,
+            }
@@ -0,0 +1,129 @@
+import hashlib
+from functools import wraps
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from flask import Response, current_app, jsonify, request
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+# Response headers worth replaying along with the stored body
+REPLAYED_HEADERS = ("Location",)
+
+
+def _error(message: str, error_code: str, status: int) -> Response:
+    response = jsonify({"success": False, "message": message, "error_code": error_code})
+    response.status_code = status
+    return response
+
+
+def idempotent(
+    scope: str,
+    store: Any,
+    ttl_seconds: float,
+    lock_seconds: float = 120,
+    stream_done: Optional[Callable[[str], bool]] = None,
+) -> Callable:
+    """
+    Replay the first response for a repeated Idempotency-Key header.
+
+    The key is scoped to `scope` and the request's user_email. The first
+    request claims it in `store` (see idempotency_dal) for lock_seconds
+    while the view runs; its response is then kept for ttl_seconds.
+    Repeats get the stored response with an Idempotent-Replayed header,
+    without running the view. A repeat that arrives while the first is
+    still running gets 409, one with a different body gets 422. 5xx
+    responses are not stored, so the client may retry them with the same
+    key. Requests without the header are not affected.
+
+    Streamed responses hold the key while they stream. With stream_done,
+    the full body is stored once the stream ends if stream_done(body) says
+    it completed successfully, and replayed in one piece; otherwise (or if
+    the client disconnects) the key is released.
+    """
+
+    def decorator(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            client_key = request.headers.get(IDEMPOTENCY_HEADER)
+            if client_key is None:
+                return view(*args, **kwargs)
+            client_key = client_key.strip()
+            if not client_key or len(client_key) > MAX_KEY_LENGTH:
+                return _error(
+                    f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters",
+                    "INVALID_IDEMPOTENCY_KEY", 400,
+                )
+
+            data = request.get_json(silent=True)
+            user = data.get("user_email") if isinstance(data, dict) else None
+            key = f"{scope}:{user or ''}:{client_key}"
+            fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+
+            existing = store.claim_key(key, fingerprint, lock_seconds)
+            if existing is not None:
+                return _replay(existing, fingerprint)
+
+            try:
+                response = current_app.make_response(view(*args, **kwargs))
+            except Exception:
+                store.release_key(key)
+                raise
+
+            if response.is_streamed and response.status_code < 500 and stream_done:
+                def finish(body: Optional[str]) -> None:
+                    if body is not None and stream_done(body):
+                        headers = {"Content-Type": response.headers["Content-Type"]}
+                        store.save_response(key, response.status_code, body, headers, ttl_seconds)
+                    else:
+                        store.release_key(key)
+
+                response.response = _record_stream(response.response, finish)
+            elif response.status_code >= 500 or response.is_streamed:
+                store.release_key(key)
+            else:
+                headers = {h: response.headers[h] for h in REPLAYED_HEADERS if h in response.headers}
+                store.save_response(
+                    key, response.status_code, response.get_data(as_text=True), headers, ttl_seconds
+                )
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def _record_stream(chunks: Iterable, finish: Callable[[Optional[str]], None]) -> Iterator:
+    """Pass a streamed body through, then call finish(body), or finish(None) if cut short"""
+    parts = []
+    completed = False
+    try:
+        for chunk in chunks:
+            parts.append(chunk.decode() if isinstance(chunk, bytes) else chunk)
+            yield chunk
+        completed = True
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+        finish("".join(parts) if completed else None)
+
+
+def _replay(record, fingerprint: str) -> Response:
+    if record.get("fingerprint") != fingerprint:
+        return _error(
+            f"{IDEMPOTENCY_HEADER} was already used with a different request",
+            "IDEMPOTENCY_KEY_REUSED", 422,
+        )
+    if record.get("status") is None:
+        response = _error(
+            "A request with this idempotency key is still in progress",
+            "IDEMPOTENCY_IN_PROGRESS", 409,
+        )
+        response.headers["Retry-After"] = "1"
+        return response
+
+    response = Response(record["body"], status=record["status"], mimetype="application/json")
+    for header, value in (record.get("headers") or {}).items():
+        response.headers[header] = value
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
@@ -0,0 +1,188 @@
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class QueueFull(Exception):
+    """The job queue is at capacity; the caller should retry later."""
+
+
+class LocalJobQueue:
+    """
+    Bounded in-process FIFO of job ids.
+
+    The JobRunner only needs put/get/qsize, so a shared broker (Redis list,
+    SQS, ...) can stand in for this when jobs must outlive the process.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self._queue: "queue.Queue[str]" = queue.Queue(maxsize=maxsize)
+
+    def put(self, job_id: str) -> None:
+        try:
+            self._queue.put_nowait(job_id)
+        except queue.Full:
+            raise QueueFull() from None
+
+    def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+
+class JobStore:
+    """
+    Job records with long-poll support and TTL expiry of finished jobs.
+
+    Records hold the payload, status, result or error, and timestamps.
+    Finished jobs are dropped ttl_seconds after they complete.
+    """
+
+    def __init__(self, ttl_seconds: float = 600, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._changed = threading.Condition()
+
+    def create(self, payload: Any) -> str:
+        job_id = uuid.uuid4().hex
+        with self._changed:
+            self._purge()
+            self._jobs[job_id] = {
+                "id": job_id,
+                "status": QUEUED,
+                "payload": payload,
+                "result": None,
+                "error": None,
+                "created_at": self._clock(),
+                "finished_at": None,
+            }
+        return job_id
+
+    def discard(self, job_id: str) -> None:
+        with self._changed:
+            self._jobs.pop(job_id, None)
+
+    def update(self, job_id: str, **fields) -> None:
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(fields)
+            if fields.get("status") in (SUCCEEDED, FAILED):
+                job["finished_at"] = self._clock()
+            self._changed.notify_all()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._changed:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Block up to timeout seconds for the job to finish; returns its record."""
+        deadline = self._clock() + timeout
+        with self._changed:
+            while True:
+                job = self._jobs.get(job_id)
+                if job is None or job["status"] in (SUCCEEDED, FAILED):
+                    return dict(job) if job else None
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    return dict(job)
+                self._changed.wait(remaining)
+
+    def counts(self) -> Dict[str, int]:
+        with self._changed:
+            counts = {QUEUED: 0, RUNNING: 0, SUCCEEDED: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job["status"]] += 1
+            return counts
+
+    def _purge(self) -> None:
+        now = self._clock()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job["finished_at"] is not None and now - job["finished_at"] > self.ttl_seconds
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+class JobRunner:
+    """
+    Run handler(payload) for submitted jobs on a fixed pool of worker threads.
+
+    Workers start on the first submit. handler's return value becomes the
+    job result; an exception marks the job failed with error_fn(exc) (the
+    exception's class name by default).
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[Any], Any],
+        workers: int = 4,
+        job_queue: Optional[LocalJobQueue] = None,
+        store: Optional[JobStore] = None,
+        error_fn: Optional[Callable[[Exception], Any]] = None,
+    ):
+        self.handler = handler
+        self.workers = workers
+        self.queue = job_queue or LocalJobQueue()
+        self.store = store or JobStore()
+        self.error_fn = error_fn or (lambda e: type(e).__name__)
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def submit(self, payload: Any) -> str:
+        """Queue a job and return its id; raises QueueFull at capacity."""
+        self._start()
+        job_id = self.store.create(payload)
+        try:
+            self.queue.put(job_id)
+        except QueueFull:
+            self.store.discard(job_id)
+            raise
+        return job_id
+
+    def _start(self) -> None:
+        with self._lock:
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(
+                    target=self._work, name=f"job-worker-{len(self._threads)}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self) -> None:
+        while True:
+            job_id = self.queue.get(timeout=1.0)
+            if job_id is None:
+                continue
+            job = self.store.get(job_id)
+            if job is None:
+                continue
+            self.store.update(job_id, status=RUNNING)
+            try:
+                result = self.handler(job["payload"])
+            except Exception as e:
+                self.store.update(job_id, status=FAILED, error=self.error_fn(e))
+            else:
+                self.store.update(job_id, status=SUCCEEDED, result=result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue.qsize(),
+            "jobs": self.store.counts(),
+        }
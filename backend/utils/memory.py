@@ -0,0 +1,144 @@
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from .prompting import CHARS_PER_TOKEN, estimate_tokens, truncate
+
+
+def format_message(message: Dict[str, Any]) -> str:
+    role = message.get("role") or "user"
+    content = " ".join(str(message.get("content") or "").split())
+    return f"{role}: {content}"
+
+
+def format_history(messages: List[Dict[str, Any]]) -> str:
+    return "\n".join(format_message(m) for m in messages or [])
+
+
+def assemble_history(
+    summary: str, messages: List[Dict[str, Any]], token_budget: int
+) -> str:
+    """
+    Fit a rolling summary plus the most recent messages into token_budget.
+
+    Newest messages are kept first; older ones are dropped once the budget
+    is spent. The summary is capped at half the budget.
+    """
+    parts = []
+    used = 0
+
+    if summary:
+        summary_text = truncate(summary, (token_budget // 2) * CHARS_PER_TOKEN)
+        parts.append(f"Summary of earlier conversation: {summary_text}")
+        used += estimate_tokens(parts[0])
+
+    recent = []
+    for message in reversed(messages or []):
+        line = format_message(message)
+        cost = estimate_tokens(line)
+        remaining = token_budget - used
+        if cost > remaining:
+            if not recent and remaining > 0:
+                # Always keep a trimmed version of the latest message
+                recent.append(truncate(line, remaining * CHARS_PER_TOKEN))
+            break
+        recent.append(line)
+        used += cost
+
+    parts.extend(reversed(recent))
+    return "\n".join(parts)
+
+
+class ConversationMemory:
+    """
+    Token-budgeted conversation memory backed by a conversation store.
+
+    The store must provide find_conversation_memory(filter, keep_last,
+    max_messages), find_message_range(filter, skip, limit) and
+    update_one_conversation(filter, update_data), as conversations_dal does.
+
+    Older messages are folded into a rolling `summary` field on the
+    conversation document, refreshed in the background once summary_interval
+    messages beyond the last keep_last are unsummarized. Every message the
+    summary does not cover yet is used verbatim, newest first within the
+    token budget, so none fall between the summary and the recent window.
+    """
+
+    def __init__(
+        self,
+        store: Any,
+        summarize_fn: Callable[[str, List[Dict[str, Any]]], str],
+        keep_last: int = 10,
+        token_budget: int = 800,
+        summary_interval: int = 10,
+        executor: Optional[Executor] = None,
+    ):
+        self.store = store
+        self.summarize_fn = summarize_fn
+        self.keep_last = keep_last
+        self.token_budget = token_budget
+        self.summary_interval = summary_interval
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="memory"
+        )
+        self._lock = threading.Lock()
+        self._refreshing = set()
+
+    def load(self, filter: Dict[str, Any]) -> Dict[str, Any]:
+        # Every message line costs at least a token, so no more than
+        # token_budget of them can make it into the history
+        return self.store.find_conversation_memory(
+            filter, self.keep_last, self.token_budget
+        ) or {}
+
+    def build_history(self, memory: Dict[str, Any]) -> str:
+        return assemble_history(
+            memory.get("summary", ""), memory.get("messages", []), self.token_budget
+        )
+
+    def needs_refresh(self, memory: Dict[str, Any]) -> bool:
+        unsummarized = (
+            memory.get("message_count", 0)
+            - self.keep_last
+            - memory.get("summarized_count", 0)
+        )
+        return unsummarized >= self.summary_interval
+
+    def maybe_refresh(
+        self, filter: Dict[str, Any], memory: Dict[str, Any]
+    ) -> Optional[Future]:
+        """Schedule a background summary refresh if one is due."""
+        if not self.needs_refresh(memory):
+            return None
+
+        key = str(filter.get("_id"))
+        with self._lock:
+            if key in self._refreshing:
+                return None
+            self._refreshing.add(key)
+
+        return self.executor.submit(self._refresh, key, filter, memory)
+
+    def _refresh(self, key: str, filter: Dict[str, Any], memory: Dict[str, Any]) -> None:
+        try:
+            self.refresh_summary(filter, memory)
+        except Exception as e:
+            print(f"Error refreshing conversation summary: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def refresh_summary(self, filter: Dict[str, Any], memory: Dict[str, Any]) -> bool:
+        start = memory.get("summarized_count", 0)
+        upto = memory.get("message_count", 0) - self.keep_last
+        if upto <= start:
+            return False
+
+        older = self.store.find_message_range(filter, start, upto - start)
+        if not older:
+            return False
+
+        summary = self.summarize_fn(memory.get("summary", ""), older)
+        return self.store.update_one_conversation(
+            filter, {"summary": summary, "summarized_count": start + len(older)}
+        )
@@ -0,0 +1,42 @@
+"""
+Fixed-size message buckets for conversation storage
+
+A conversation is a header document plus bucket documents holding
+MESSAGE_BUCKET_SIZE messages each: bucket `seq` holds message indices
+[seq * size, (seq + 1) * size). Appends only touch the last bucket, so the
+cost of a write no longer grows with the length of the conversation.
+"""
+import os
+from typing import List, Optional, Tuple
+
+MESSAGE_BUCKET_SIZE = int(os.getenv("MESSAGE_BUCKET_SIZE", 50))
+
+
+def bucket_spans(start: int, end: int, size: int = MESSAGE_BUCKET_SIZE) -> List[Tuple[int, int, int]]:
+    """(seq, lo, hi) for each bucket overlapping message indices [start, end)"""
+    spans = []
+    index = start
+    while index < end:
+        seq = index // size
+        hi = min(end, (seq + 1) * size)
+        spans.append((seq, index, hi))
+        index = hi
+    return spans
+
+
+def page_window(
+    total: int,
+    limit: Optional[int] = None,
+    before: Optional[int] = None,
+    after: Optional[int] = None,
+) -> Tuple[int, int]:
+    """[start, end) message indices for a page request over `total` messages"""
+    if limit is None:
+        return 0, total
+    if before is not None:
+        start = max(0, min(before, total) - limit)
+        return start, min(before, total)
+    if after is not None:
+        start = min(after + 1, total)
+        return start, min(start + limit, total)
+    return max(0, total - limit), total
@@ -0,0 +1,166 @@
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Sequence
+
+# Upper bounds; anything larger lands in the overflow bucket
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+
+class Histogram:
+    """Fixed-bucket histogram with quantile estimates from bucket bounds."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.total += value
+            self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation (max for overflow)."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = q * self.count
+            seen = 0
+            for i, n in enumerate(self._counts):
+                seen += n
+                if seen >= rank and n:
+                    return self.buckets[i] if i < len(self.buckets) else self.max
+            return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        p50, p90, p99 = self.quantile(0.5), self.quantile(0.9), self.quantile(0.99)
+        with self._lock:
+            cumulative, buckets = 0, {}
+            for bound, n in zip(self.buckets, self._counts):
+                cumulative += n
+                buckets[str(bound)] = cumulative
+            buckets["+Inf"] = self.count
+            return {
+                "count": self.count,
+                "sum": self.total,
+                "mean": self.total / self.count if self.count else 0.0,
+                "max": self.max,
+                "p50": p50,
+                "p90": p90,
+                "p99": p99,
+                "buckets": buckets,
+            }
+
+
+class MetricsRegistry:
+    """Named histograms: per-stage latency in seconds, plus token and byte counts."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Histogram] = {}
+        self._values: Dict[str, Histogram] = {}
+
+    def _get(self, table: Dict[str, Histogram], name: str, buckets) -> Histogram:
+        with self._lock:
+            if name not in table:
+                table[name] = Histogram(buckets)
+            return table[name]
+
+    def observe_stage(self, stage: str, seconds: float) -> None:
+        self._get(self._stages, stage, SECONDS_BUCKETS).observe(seconds)
+
+    def observe_value(self, name: str, value: float) -> None:
+        self._get(self._values, name, SIZE_BUCKETS).observe(value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stages, values = dict(self._stages), dict(self._values)
+        return {
+            "stage_seconds": {name: h.snapshot() for name, h in sorted(stages.items())},
+            "values": {name: h.snapshot() for name, h in sorted(values.items())},
+        }
+
+
+class Trace:
+    """Stage timings and counters for a single request."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans: Dict[str, float] = {}
+        self.values: Dict[str, float] = {}
+
+    def add_span(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.spans[stage] = self.spans.get(stage, 0.0) + seconds
+
+    def set_value(self, name: str, value: float) -> None:
+        with self._lock:
+            self.values[name] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "stage_ms": {stage: round(s * 1000, 2) for stage, s in self.spans.items()},
+                **self.values,
+            }
+
+
+metrics = MetricsRegistry()
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("trace", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace() -> Iterator[Trace]:
+    """Collect spans recorded in this context (and contexts copied from it)."""
+    trace = Trace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time a pipeline stage into the stage histogram and the current trace."""
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        elapsed = time.monotonic() - start
+        metrics.observe_stage(stage, elapsed)
+        trace = current_trace()
+        if trace is not None:
+            trace.add_span(stage, elapsed)
+
+
+def record(name: str, value: Optional[float]) -> None:
+    """Record a count (tokens, bytes) into its histogram and the current trace."""
+    if value is None:
+        return
+    metrics.observe_value(name, value)
+    trace = current_trace()
+    if trace is not None:
+        trace.set_value(name, value)
+
+
+def in_context(fn):
+    """Wrap fn to run in a copy of the caller's context, for thread pool submits."""
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.run(fn, *args, **kwargs)
+    return run
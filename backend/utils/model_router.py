@@ -0,0 +1,99 @@
+import re
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+# Signals that a query carries an extra constraint beyond "something like X"
+CONSTRAINT_PATTERNS = [
+    r"\b(?:19|20)?\d0'?s\b",                                  # decade: 80s, 1990s
+    r"\b(?:19|20)\d{2}\b",                                    # specific year
+    r"\b(?:under|over|less than|more than|at least|at most)\b",  # runtime/rating bounds
+    r"\b(?:minutes?|hours?|runtime|long|short)\b",
+    r"\b(?:not|no|without|avoid|except|but)\b",               # exclusions
+    r"\b(?:rated|rating|imdb|oscar|award)\b",
+    r"\b(?:kids?|family|children|teen)\b",
+    r"\b(?:language|subtitles?|foreign|korean|french|japanese|spanish)\b",
+    r"\b(?:directed|director|starring|actor|actress)\b",
+    r"\b(?:and|also|plus|with)\b",                            # combined criteria
+]
+_CONSTRAINT_RES = [re.compile(p, re.IGNORECASE) for p in CONSTRAINT_PATTERNS]
+
+
+def count_constraints(query: str) -> int:
+    return sum(1 for pattern in _CONSTRAINT_RES if pattern.search(query or ""))
+
+
+class ModelRouter:
+    """
+    Pick a Gemini model tier per query and track per-model usage.
+
+    Short, simple queries go to the default (fast) tier. Long queries or
+    queries with several constraints go to the "pro" tier. Callers can
+    opt into a tier explicitly.
+    """
+
+    def __init__(
+        self,
+        models: Dict[str, str],
+        default_tier: str = "flash",
+        complex_tier: str = "pro",
+        complex_min_words: int = 25,
+        complex_min_constraints: int = 3,
+    ):
+        if default_tier not in models or complex_tier not in models:
+            raise ValueError("default_tier and complex_tier must be registered models")
+        self.models = dict(models)
+        self.default_tier = default_tier
+        self.complex_tier = complex_tier
+        self.complex_min_words = complex_min_words
+        self.complex_min_constraints = complex_min_constraints
+        self._lock = threading.Lock()
+        self._usage: Dict[str, Dict[str, Any]] = {}
+
+    def choose(self, query: str, tier: Optional[str] = None) -> Tuple[str, str]:
+        """Return (tier, model name) for a query."""
+        if tier not in self.models:
+            words = len((query or "").split())
+            if (
+                words >= self.complex_min_words
+                or count_constraints(query) >= self.complex_min_constraints
+            ):
+                tier = self.complex_tier
+            else:
+                tier = self.default_tier
+        return tier, self.models[tier]
+
+    def record(
+        self,
+        model: str,
+        latency_seconds: float,
+        prompt_tokens: Optional[int] = None,
+        output_tokens: Optional[int] = None,
+    ) -> None:
+        with self._lock:
+            usage = self._usage.setdefault(model, {
+                "calls": 0,
+                "total_latency_seconds": 0.0,
+                "max_latency_seconds": 0.0,
+                "prompt_tokens": 0,
+                "output_tokens": 0,
+            })
+            usage["calls"] += 1
+            usage["total_latency_seconds"] += latency_seconds
+            usage["max_latency_seconds"] = max(usage["max_latency_seconds"], latency_seconds)
+            usage["prompt_tokens"] += prompt_tokens or 0
+            usage["output_tokens"] += output_tokens or 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            usage = {}
+            for model, u in self._usage.items():
+                usage[model] = dict(u)
+                usage[model]["avg_latency_seconds"] = (
+                    u["total_latency_seconds"] / u["calls"] if u["calls"] else 0.0
+                )
+            return {
+                "models": dict(self.models),
+                "default_tier": self.default_tier,
+                "complex_tier": self.complex_tier,
+                "usage": usage,
+            }
@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, List
+
+from .rec_cache import normalize_query
+
+
+def mine_popular_queries(
+    messages: Iterable[Dict[str, Any]], top_n: int = 300, min_count: int = 3
+) -> List[str]:
+    """
+    Most frequent user queries, by normalized text.
+
+    Pass conversation-opening messages: later turns usually depend on the
+    conversation so far and cannot be answered ahead of time. Each
+    returned query is the most common raw spelling of its normalized form.
+    """
+    counts = Counter()
+    spellings: Dict[str, Counter] = {}
+    for message in messages:
+        if message.get("role") != "user":
+            continue
+        text = " ".join(str(message.get("content") or "").split())
+        key = normalize_query(text)
+        if not key:
+            continue
+        counts[key] += 1
+        spellings.setdefault(key, Counter())[text] += 1
+
+    return [
+        spellings[key].most_common(1)[0][0]
+        for key, count in counts.most_common(top_n)
+        if count >= min_count
+    ]
+
+
+def read_query_file(path: str) -> List[str]:
+    """One query per line; blank lines and lines starting with # are skipped."""
+    with open(path, "r", encoding="utf-8") as f:
+        lines = (line.strip() for line in f)
+        return [line for line in lines if line and not line.startswith("#")]
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads."""
+
+    def __init__(self, rate_per_second: float, clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._next_at = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = self._clock()
+            start = max(now, self._next_at)
+            self._next_at = start + self.interval
+        if start > now:
+            self._sleep(start - now)
+
+
+def precompute(
+    queries: Iterable[str],
+    compute_fn: Callable[[str], Any],
+    store_fn: Callable[[str, Any], Any],
+    workers: int = 4,
+    rate_per_second: float = 1.0,
+) -> Dict[str, int]:
+    """
+    Run compute_fn for each distinct query on a bounded thread pool and
+    hand each result to store_fn. Calls are rate limited across workers;
+    a failing query is reported and skipped.
+    """
+    unique = {}
+    for query in queries:
+        key = normalize_query(query)
+        if key and key not in unique:
+            unique[key] = query
+    unique = list(unique.values())
+    limiter = RateLimiter(rate_per_second)
+    stats = {"queries": len(unique), "stored": 0, "failed": 0}
+
+    def run(query: str) -> None:
+        limiter.wait()
+        result = compute_fn(query)
+        if not result:
+            raise ValueError("empty result")
+        store_fn(query, result)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="precompute") as pool:
+        futures = {pool.submit(run, query): query for query in unique}
+        for future in as_completed(futures):
+            try:
+                future.result()
+                stats["stored"] += 1
+            except Exception as e:
+                print(f"Error precomputing {futures[future]!r}: {e}")
+                stats["failed"] += 1
+    return stats
@@ -0,0 +1,58 @@
+import math
+from typing import Any, Dict
+
+# Rough chars-per-token ratio for English text with Gemini tokenizers
+CHARS_PER_TOKEN = 4
+
+
+def truncate(text: str, max_chars: int) -> str:
+    """Collapse whitespace and cut text at a word boundary within max_chars."""
+    text = " ".join(str(text or "").split())
+    if max_chars <= 0 or len(text) <= max_chars:
+        return text
+    cut = text[: max_chars - 1]
+    if " " in cut:
+        cut = cut[: cut.rfind(" ")]
+    return cut.rstrip(" ,.;:") + "…"
+
+
+def _properties(hit: Any) -> Dict[str, Any]:
+    props = getattr(hit, "properties", hit)
+    return props if isinstance(props, dict) else {}
+
+
+def format_context(results: Any, max_chars_per_hit: int = 300) -> str:
+    """
+    Render vector search hits as compact "- Title: description" lines.
+
+    Accepts a Weaviate QueryReturn (anything with .objects) or a plain list
+    of hits/property dicts. UUIDs, metadata and vectors are dropped.
+    """
+    hits = getattr(results, "objects", results) or []
+    if isinstance(hits, str):
+        return hits
+
+    lines = []
+    for hit in hits:
+        props = _properties(hit)
+        title = " ".join(str(props.get("title") or "").split())
+        if not title:
+            continue
+        description = truncate(props.get("description"), max_chars_per_hit)
+        lines.append(f"- {title}: {description}" if description else f"- {title}")
+    return "\n".join(lines)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate that avoids a count_tokens round trip."""
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def prompt_size(prompt: str) -> Dict[str, int]:
+    return {
+        "bytes": len(prompt.encode("utf-8")),
+        "chars": len(prompt),
+        "est_tokens": estimate_tokens(prompt),
+    }
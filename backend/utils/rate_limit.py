@@ -0,0 +1,206 @@
+import ipaddress
+import math
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, NamedTuple, Optional
+
+from flask import jsonify, request
+
+
+class BucketState(NamedTuple):
+    allowed: bool
+    remaining: float
+    # Seconds until one token is available again (0 when allowed)
+    retry_after: float
+    # Seconds until the bucket is full again
+    reset_after: float
+
+
+def refill(tokens: float, elapsed: float, capacity: float, rate: float) -> float:
+    return min(capacity, tokens + max(0.0, elapsed) * rate)
+
+
+def bucket_state(tokens: float, allowed: bool, capacity: float, rate: float, cost: float) -> BucketState:
+    """BucketState for a bucket holding `tokens` after a take of `cost`"""
+    retry_after = 0.0 if allowed else (cost - tokens) / rate
+    return BucketState(allowed, tokens, retry_after, (capacity - tokens) / rate)
+
+
+class MemoryBucketBackend:
+    """
+    Token buckets in a process-local dict.
+
+    Each worker process keeps its own buckets, so with N workers a client
+    effectively gets N times the limit; use a shared backend there.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, max_keys: int = 100_000):
+        self._clock = clock
+        self._max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, tuple] = {}
+
+    def take(self, key: str, capacity: float, rate: float, cost: float = 1) -> BucketState:
+        now = self._clock()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = refill(tokens, now - updated, capacity, rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            if len(self._buckets) >= self._max_keys and key not in self._buckets:
+                self._evict_full(now, capacity, rate)
+            self._buckets[key] = (tokens, now)
+        return bucket_state(tokens, allowed, capacity, rate, cost)
+
+    def _evict_full(self, now: float, capacity: float, rate: float) -> None:
+        # A bucket that has refilled completely carries no state worth keeping
+        for key, (tokens, updated) in list(self._buckets.items()):
+            if refill(tokens, now - updated, capacity, rate) >= capacity:
+                del self._buckets[key]
+        if len(self._buckets) >= self._max_keys:
+            self._buckets.clear()
+
+
+class StoreBucketBackend:
+    """
+    Token buckets in a shared store, for multi-worker deployments.
+
+    store.take_token(key, capacity, rate, cost) must refill and take
+    atomically and return (allowed, tokens); rate_limits_dal does this with
+    a single find_one_and_update.
+    """
+
+    def __init__(self, store: Any):
+        self.store = store
+
+    def take(self, key: str, capacity: float, rate: float, cost: float = 1) -> BucketState:
+        allowed, tokens = self.store.take_token(key, capacity, rate, cost)
+        return bucket_state(tokens, allowed, capacity, rate, cost)
+
+
+class RateLimit(NamedTuple):
+    per_minute: float
+    burst: int
+
+    @property
+    def rate(self) -> float:
+        return self.per_minute / 60.0
+
+
+class RateLimiter:
+    """
+    Per-user and per-IP token buckets, configured per blueprint.
+
+    Requests with a method in `methods` to a blueprint in `limits` take one
+    token from the caller's user bucket (when the request names a user) and
+    one from the IP bucket, whose limits are ip_factor times larger since
+    several users may share an address. The first empty bucket gets a 429
+    with Retry-After; every limited response carries X-RateLimit-* headers
+    for the tighter of the two buckets.
+
+    Requests from a trusted_proxies address or network (e.g. the frontend
+    server, "172.16.0.0/12" for Docker bridge networks) are counted against the last untrusted X-Forwarded-For hop, or skip the IP
+    bucket when there is none. trust_proxy instead takes the first
+    X-Forwarded-For entry from any caller.
+    """
+
+    def __init__(
+        self,
+        backend: Any,
+        limits: Dict[str, RateLimit],
+        ip_factor: float = 4.0,
+        methods=("POST", "PUT", "PATCH", "DELETE"),
+        trust_proxy: bool = False,
+        trusted_proxies: Iterable[str] = (),
+    ):
+        self.backend = backend
+        self.limits = limits
+        self.ip_factor = ip_factor
+        self.methods = set(methods)
+        self.trust_proxy = trust_proxy
+        self.trusted_proxies = [ipaddress.ip_network(p, strict=False) for p in trusted_proxies]
+        self.rejected = 0
+
+    def init_app(self, app) -> None:
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _client_ip(self) -> Optional[str]:
+        """The caller's IP, or None for a trusted proxy that didn't name one"""
+        if self.trust_proxy and request.access_route:
+            return request.access_route[0]
+        remote = request.remote_addr or "unknown"
+        if not self._trusted(remote):
+            return remote
+        forwarded = request.headers.get("X-Forwarded-For", "")
+        for hop in reversed([hop.strip() for hop in forwarded.split(",") if hop.strip()]):
+            if not self._trusted(hop):
+                return hop
+        return None
+
+    def _trusted(self, address: str) -> bool:
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(ip in network for network in self.trusted_proxies)
+
+    @staticmethod
+    def _user() -> Optional[str]:
+        data = request.get_json(silent=True)
+        data = data if isinstance(data, dict) else {}
+        user = data.get("user_email") or data.get("email") or request.args.get("user_email")
+        return str(user).strip().lower() if user else None
+
+    def check(self, blueprint: str, user: Optional[str], ip: Optional[str]):
+        """(allowed, limit, state) for the tighter bucket of this request"""
+        limit = self.limits[blueprint]
+        checks = []
+        if user:
+            checks.append((f"user:{blueprint}:{user}", limit.burst, limit.rate))
+        if ip:
+            checks.append((f"ip:{blueprint}:{ip}", limit.burst * self.ip_factor, limit.rate * self.ip_factor))
+
+        tightest = None
+        for key, capacity, rate in checks:
+            state = self.backend.take(key, capacity, rate)
+            if not state.allowed:
+                return False, capacity, state
+            if tightest is None or state.remaining < tightest[1].remaining:
+                tightest = (capacity, state)
+        return True, tightest[0], tightest[1]
+
+    def _before_request(self):
+        blueprint = request.blueprint
+        if request.method not in self.methods or blueprint not in self.limits:
+            return None
+
+        user, ip = self._user(), self._client_ip()
+        if user is None and ip is None:
+            # Nothing else to key on; share the proxy's bucket
+            ip = request.remote_addr
+        allowed, capacity, state = self.check(blueprint, user, ip)
+        request.environ["rate_limit"] = (capacity, state)
+        if allowed:
+            return None
+
+        self.rejected += 1
+        response = jsonify({
+            "success": False,
+            "message": "Too many requests, please slow down",
+            "error_code": "RATE_LIMITED",
+        })
+        response.status_code = 429
+        response.headers["Retry-After"] = str(max(1, math.ceil(state.retry_after)))
+        return response
+
+    @staticmethod
+    def _after_request(response):
+        limited = request.environ.get("rate_limit")
+        if limited:
+            capacity, state = limited
+            response.headers["X-RateLimit-Limit"] = str(int(capacity))
+            response.headers["X-RateLimit-Remaining"] = str(int(state.remaining))
+            response.headers["X-RateLimit-Reset"] = str(math.ceil(state.reset_after))
+        return response
@@ -0,0 +1,166 @@
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace."""
+    if not isinstance(query, str):
+        return ""
+    cleaned = re.sub(r"[^\w\s]", " ", query.lower())
+    return " ".join(cleaned.split())
+
+
+def cosine_similarity(a: Sequence[float], b: Sequence[float]) -> float:
+    if not a or not b or len(a) != len(b):
+        return 0.0
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = math.sqrt(sum(x * x for x in a))
+    norm_b = math.sqrt(sum(y * y for y in b))
+    if norm_a == 0 or norm_b == 0:
+        return 0.0
+    return dot / (norm_a * norm_b)
+
+
+class RecommendationCache:
+    """
+    Thread-safe LRU + TTL cache for recommendation responses.
+
+    Entries are keyed by the normalized query text. When an embed_fn and a
+    similarity_threshold are given, an exact-key miss falls back to the
+    closest cached query whose embedding is at least that similar.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float = 3600,
+        similarity_threshold: Optional[float] = None,
+        embed_fn: Optional[Callable[[str], List[float]]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold or None
+        self.embed_fn = embed_fn
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (value, expires_at, embedding)
+        self._entries: "OrderedDict[str, Tuple[Any, float, Optional[List[float]]]]" = OrderedDict()
+        # embeddings computed on a miss, reused by the following set()
+        self._pending_embeddings: Dict[str, List[float]] = {}
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.embed_fn is not None and self.similarity_threshold is not None
+
+    def _embed(self, key: str) -> Optional[List[float]]:
+        try:
+            return list(self.embed_fn(key))
+        except Exception as e:
+            print(f"Error embedding query for cache: {e}")
+            return None
+
+    def _purge_expired(self, now: float) -> None:
+        expired = [k for k, (_, expires_at, _) in self._entries.items() if expires_at <= now]
+        for k in expired:
+            del self._entries[k]
+        self.expirations += len(expired)
+
+    def get(self, query: str) -> Optional[Any]:
+        key = normalize_query(query)
+        if not key:
+            return None
+
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, _ = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.expirations += 1
+
+            if not self.semantic_enabled:
+                self.misses += 1
+                return None
+
+        # Embedding may be a network call, so it runs outside the lock
+        embedding = self._embed(key)
+
+        with self._lock:
+            if embedding is None:
+                self.misses += 1
+                return None
+
+            self._purge_expired(now)
+            best_key, best_score = None, self.similarity_threshold
+            for k, (_, _, other) in self._entries.items():
+                if other is None:
+                    continue
+                score = cosine_similarity(embedding, other)
+                if score >= best_score:
+                    best_key, best_score = k, score
+
+            if best_key is not None:
+                self._entries.move_to_end(best_key)
+                self.hits += 1
+                self.semantic_hits += 1
+                return self._entries[best_key][0]
+
+            if len(self._pending_embeddings) >= self.max_entries:
+                self._pending_embeddings.clear()
+            self._pending_embeddings[key] = embedding
+            self.misses += 1
+            return None
+
+    def set(self, query: str, value: Any) -> None:
+        key = normalize_query(query)
+        if not key:
+            return
+
+        with self._lock:
+            embedding = self._pending_embeddings.pop(key, None)
+        if embedding is None and self.semantic_enabled:
+            embedding = self._embed(key)
+
+        with self._lock:
+            self._entries[key] = (value, self._clock() + self.ttl_seconds, embedding)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._pending_embeddings.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            }
@@ -0,0 +1,86 @@
+import json
+import re
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional
+
+# Gemini response schema for structured-output mode (OpenAPI subset)
+RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "title": {"type": "STRING"},
+        "runtime_minutes": {"type": "INTEGER", "nullable": True},
+        "description": {"type": "STRING"},
+    },
+    "required": ["title", "runtime_minutes", "description"],
+    "property_ordering": ["title", "runtime_minutes", "description"],
+}
+
+_NAME_RE = re.compile(r"Movie Name:\s*(.+)", re.IGNORECASE)
+_RUNTIME_RE = re.compile(r"Runtime:\s*(?:([\d.]+)\s*minutes?|unknown)", re.IGNORECASE)
+_DESCRIPTION_RE = re.compile(r"Description:\s*([\s\S]*)", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class Recommendation:
+    """A single movie recommendation as returned by the chat API."""
+    title: str
+    runtime_minutes: Optional[int]
+    description: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def to_text(self) -> str:
+        """Render in the "Movie Name / Runtime / Description" chat format."""
+        runtime = f"{self.runtime_minutes} minutes" if self.runtime_minutes else "unknown"
+        return (
+            f"Movie Name: {self.title}\n"
+            f"Runtime: {runtime}\n"
+            f"Description: {self.description}"
+        )
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Recommendation":
+        if not isinstance(data, dict):
+            raise ValueError("Recommendation must be a JSON object")
+        title = " ".join(str(data.get("title") or "").split())
+        if not title:
+            raise ValueError("Recommendation is missing a title")
+
+        runtime = data.get("runtime_minutes")
+        try:
+            runtime = int(runtime) if runtime is not None else None
+        except (TypeError, ValueError):
+            runtime = None
+        if runtime is not None and runtime <= 0:
+            runtime = None
+
+        description = str(data.get("description") or "").strip()
+        return cls(title, runtime, description)
+
+    @classmethod
+    def from_json(cls, text: str) -> "Recommendation":
+        """Parse a structured-output response; raises ValueError if malformed."""
+        try:
+            data = json.loads(text or "")
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid recommendation JSON: {e}") from e
+        return cls.from_dict(data)
+
+    @classmethod
+    def from_text(cls, text: str) -> Optional["Recommendation"]:
+        """Parse the chat text format; returns None if the text is not one."""
+        name = _NAME_RE.search(text or "")
+        runtime = _RUNTIME_RE.search(text or "")
+        description = _DESCRIPTION_RE.search(text or "")
+        if not (name and runtime and description):
+            return None
+        try:
+            minutes = int(float(runtime.group(1))) if runtime.group(1) else None
+            return cls.from_dict({
+                "title": name.group(1),
+                "runtime_minutes": minutes,
+                "description": description.group(1),
+            })
+        except ValueError:
+            return None
@@ -0,0 +1,86 @@
+import re
+from typing import Any, Dict, Iterable, Optional
+
+from .rec_cache import normalize_query
+
+LEADING_ARTICLE = re.compile(r"^(?:the|a|an) ")
+YEAR_SUFFIX = re.compile(r"\(\s*\d{4}\s*\)")
+
+# Words that usually introduce a film title in a chat query
+CUE_WORDS = {"like", "to", "than", "as", "of", "loved", "liked", "enjoyed", "watched"}
+
+# Function words that do not make a title stand out in free text
+STOP_WORDS = {
+    "a", "an", "and", "at", "for", "from", "in", "is", "it", "me", "my", "of",
+    "on", "or", "the", "to", "with", "you", "your",
+}
+
+# Titles with at least this many words (after the leading article), two of
+# them not stop words, match anywhere in a query
+DISTINCTIVE_MIN_WORDS = 3
+
+
+def normalize_title(title: str) -> str:
+    """Normalize a title for lookup: case, punctuation, year and leading article."""
+    normalized = normalize_query(YEAR_SUFFIX.sub(" ", title or ""))
+    return LEADING_ARTICLE.sub("", normalized)
+
+
+class TitleIndex:
+    """
+    In-memory dictionary of normalized catalog titles.
+
+    find_in_query() scans a chat query for a named film, longest match
+    first. Titles shorter than DISTINCTIVE_MIN_WORDS words are only accepted
+    when they are the whole query or follow a cue word ("like", "similar
+    to", ...), so everyday phrases ("the kids", "date night") do not match
+    films that happen to share their words.
+    """
+
+    def __init__(self, min_chars: int = 4, max_words: int = 8):
+        self.min_chars = min_chars
+        self.max_words = max_words
+        self._titles: Dict[str, Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._titles)
+
+    @classmethod
+    def build(cls, items: Iterable[Dict[str, Any]], **kwargs) -> "TitleIndex":
+        """Build from items of {"uuid", "title"}; the first of duplicate titles wins."""
+        index = cls(**kwargs)
+        titles = {}
+        for item in items:
+            key = normalize_title(item.get("title"))
+            if key and key not in titles:
+                titles[key] = {"uuid": str(item["uuid"]), "title": item["title"]}
+        index._titles = titles
+        return index
+
+    def lookup(self, title: str) -> Optional[Dict[str, Any]]:
+        return self._titles.get(normalize_title(title))
+
+    def find_in_query(self, query: str) -> Optional[Dict[str, Any]]:
+        words = normalize_query(query).split()
+        if not words or not self._titles:
+            return None
+
+        for n in range(min(self.max_words, len(words)), 0, -1):
+            for i in range(len(words) - n + 1):
+                key = LEADING_ARTICLE.sub("", " ".join(words[i:i + n]))
+                match = self._titles.get(key)
+                if match is None:
+                    continue
+                whole_query = n == len(words)
+                after_cue = i > 0 and words[i - 1] in CUE_WORDS
+                distinctive = _is_distinctive(key) and len(key) >= self.min_chars
+                if whole_query or after_cue or distinctive:
+                    return match
+        return None
+
+
+def _is_distinctive(key: str) -> bool:
+    """Whether a normalized title is unlikely to appear in a query by accident"""
+    words = key.split()
+    content_words = [word for word in words if word not in STOP_WORDS]
+    return len(words) >= DISTINCTIVE_MIN_WORDS and len(content_words) >= 2
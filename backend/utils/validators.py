@@ -50,6 +50,10 @@ def validate_chat_message(data):
     if not content or not isinstance(content, str) or not content.strip():
         errors["message"] = "Message content is required."
 
+    model_tier = data.get("model_tier")
+    if model_tier is not None and not isinstance(model_tier, str):
+        errors["model_tier"] = "model_tier must be a string."
+
 
 
     
@@ -82,3 +86,35 @@ def validate_movie_data(data):
     return len(errors)==0, ""
 
     
+
+
+def validate_page_params(args, default_limit, max_limit):
+    """
+    Parse limit/before/after message-page query params
+
+    Returns (is_valid, error_message, page) where page is None when no
+    pagination was requested, else {"limit", "before", "after"}.
+    """
+    raw = {name: args.get(name) for name in ("limit", "before", "after")}
+    if all(value is None for value in raw.values()):
+        return True, "", None
+
+    page = {}
+    for name, value in raw.items():
+        if value is None:
+            page[name] = None
+            continue
+        try:
+            page[name] = int(value)
+        except (TypeError, ValueError):
+            return False, f"{name} must be an integer.", None
+        if page[name] < 0:
+            return False, f"{name} must not be negative.", None
+
+    if page["before"] is not None and page["after"] is not None:
+        return False, "Use either before or after, not both.", None
+    if page["limit"] is None:
+        page["limit"] = default_limit
+    if not 1 <= page["limit"] <= max_limit:
+        return False, f"limit must be between 1 and {max_limit}.", None
+    return True, "", page
@@ -0,0 +1,264 @@
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+
+@dataclass
+class LocalHit:
+    """Mirrors the parts of a Weaviate result object the pipeline reads."""
+    uuid: str
+    properties: Dict[str, Any]
+    score: float
+
+
+@dataclass
+class LocalQueryReturn:
+    objects: List[LocalHit] = field(default_factory=list)
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _quantize(matrix: np.ndarray):
+    """Symmetric per-row int8 quantization of unit-length rows."""
+    scales = np.abs(matrix).max(axis=1)
+    scales[scales == 0] = 1.0
+    quantized = np.round(matrix / scales[:, None] * 127).astype(np.int8)
+    return quantized, (scales / 127).astype(np.float32)
+
+
+class LocalVectorIndex:
+    """
+    In-process kNN index over an exported copy of the Movies vectors.
+
+    Rows are L2-normalized so a dot product equals cosine similarity, the
+    distance the Weaviate collection uses. On disk an index is three files
+    next to `path`: <path>.npy (float32 or int8 rows), <path>.scales.npy
+    (int8 only) and <path>.json (uuids and properties per row). The row
+    matrix is memory-mapped on load.
+
+    upsert()/remove() apply incremental changes in memory; save() compacts
+    them back to disk.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        items: List[Dict[str, Any]],
+        scales: Optional[np.ndarray] = None,
+        path: Optional[str] = None,
+    ):
+        if len(vectors) != len(items):
+            raise ValueError("vectors and items must have the same length")
+        self.path = path
+        self._lock = threading.Lock()
+        self._set(vectors, items, scales)
+
+    def _set(self, vectors, items, scales) -> None:
+        self._vectors = vectors
+        self._scales = scales
+        self._items = items
+        self._positions = {item["uuid"]: i for i, item in enumerate(items)}
+        self._alive = np.ones(len(items), dtype=bool)
+
+    @property
+    def quantized(self) -> bool:
+        return self._scales is not None
+
+    @property
+    def dimensions(self) -> int:
+        return self._vectors.shape[1] if self._vectors.ndim == 2 and len(self._vectors) else 0
+
+    def __len__(self) -> int:
+        return int(self._alive.sum())
+
+    def uuids(self) -> List[str]:
+        return [item["uuid"] for item, alive in zip(self._items, self._alive) if alive]
+
+    def items(self) -> List[Dict[str, Any]]:
+        """{"uuid", "properties"} of every live row."""
+        return [item for item, alive in zip(self._items, self._alive) if alive]
+
+    @classmethod
+    def build(cls, records: Iterable[Dict[str, Any]], quantize: bool = False,
+              path: Optional[str] = None) -> "LocalVectorIndex":
+        """Build from records of {"uuid", "vector", "properties"}."""
+        items, rows = [], []
+        for record in records:
+            items.append({"uuid": str(record["uuid"]), "properties": dict(record.get("properties") or {})})
+            rows.append(np.asarray(record["vector"], dtype=np.float32))
+
+        matrix = _normalize_rows(np.vstack(rows)) if rows else np.zeros((0, 0), dtype=np.float32)
+        scales = None
+        if quantize and len(matrix):
+            matrix, scales = _quantize(matrix)
+        return cls(matrix.astype(np.int8 if quantize else np.float32), items, scales, path)
+
+    @classmethod
+    def load(cls, path: str) -> "LocalVectorIndex":
+        vectors = np.load(f"{path}.npy", mmap_mode="r")
+        scales = np.load(f"{path}.scales.npy") if os.path.exists(f"{path}.scales.npy") else None
+        with open(f"{path}.json", "r", encoding="utf-8") as f:
+            items = json.load(f)
+        return cls(vectors, items, scales, path)
+
+    def save(self, path: Optional[str] = None) -> None:
+        """Compact removed rows and write the index atomically."""
+        path = path or self.path
+        if not path:
+            raise ValueError("No path to save the index to")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._lock:
+            keep = np.flatnonzero(self._alive)
+            vectors = np.ascontiguousarray(self._vectors[keep])
+            scales = self._scales[keep] if self._scales is not None else None
+            items = [self._items[i] for i in keep]
+
+        # np.save appends .npy unless the name already ends with it
+        np.save(f"{path}.npy.tmp.npy", vectors)
+        os.replace(f"{path}.npy.tmp.npy", f"{path}.npy")
+        if scales is not None:
+            np.save(f"{path}.scales.npy.tmp.npy", scales)
+            os.replace(f"{path}.scales.npy.tmp.npy", f"{path}.scales.npy")
+        elif os.path.exists(f"{path}.scales.npy"):
+            os.remove(f"{path}.scales.npy")
+        with open(f"{path}.json.tmp", "w", encoding="utf-8") as f:
+            json.dump(items, f)
+        os.replace(f"{path}.json.tmp", f"{path}.json")
+
+        loaded = np.load(f"{path}.npy", mmap_mode="r")
+        with self._lock:
+            self.path = path
+            self._set(loaded, items, scales)
+
+    def upsert(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Add new rows; rows whose uuid already exists are replaced."""
+        update = self.build(records, quantize=self.quantized)
+        if not len(update._items):
+            return 0
+
+        with self._lock:
+            if len(self._items) and update.dimensions != self.dimensions:
+                raise ValueError("Vector dimensions do not match the index")
+            for item in update._items:
+                position = self._positions.get(item["uuid"])
+                if position is not None:
+                    self._alive[position] = False
+
+            base = self._vectors if len(self._items) else update._vectors[:0]
+            vectors = np.concatenate([np.asarray(base), update._vectors])
+            scales = None
+            if self.quantized:
+                base_scales = self._scales if len(self._items) else update._scales[:0]
+                scales = np.concatenate([base_scales, update._scales])
+            alive = np.concatenate([self._alive, np.ones(len(update._items), dtype=bool)])
+            items = self._items + update._items
+            self._set(vectors, items, scales)
+            self._alive = alive
+        return len(update._items)
+
+    def remove(self, uuids: Iterable[str]) -> int:
+        removed = 0
+        with self._lock:
+            for uuid in uuids:
+                position = self._positions.get(str(uuid))
+                if position is not None and self._alive[position]:
+                    self._alive[position] = False
+                    removed += 1
+        return removed
+
+    def search(self, query_vector: Sequence[float], k: int = 5) -> LocalQueryReturn:
+        with self._lock:
+            vectors, scales, items, alive = self._vectors, self._scales, self._items, self._alive
+
+        if not len(items) or k <= 0:
+            return LocalQueryReturn()
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return LocalQueryReturn()
+        query = query / norm
+
+        if scales is not None:
+            scores = (vectors @ query) * scales
+        else:
+            scores = vectors @ query
+        scores = np.where(alive, scores, -np.inf)
+
+        k = min(k, int(alive.sum()))
+        if k == 0:
+            return LocalQueryReturn()
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return LocalQueryReturn([
+            LocalHit(items[i]["uuid"], items[i]["properties"], float(scores[i])) for i in top
+        ])
+
+    def similar_to(self, uuid: str, k: int = 5) -> LocalQueryReturn:
+        """Local equivalent of near_object: neighbours of a stored row, excluding it."""
+        with self._lock:
+            position = self._positions.get(str(uuid))
+            if position is None or not self._alive[position]:
+                raise KeyError(uuid)
+            vector = np.asarray(self._vectors[position], dtype=np.float32)
+            if self._scales is not None:
+                vector = vector * self._scales[position]
+
+        results = self.search(vector, k + 1)
+        return LocalQueryReturn([hit for hit in results.objects if hit.uuid != str(uuid)][:k])
+
+
+RETURN_PROPERTIES = ["title", "description"]
+
+
+def _record_from_object(obj: Any) -> Dict[str, Any]:
+    vector = obj.vector
+    if isinstance(vector, dict):
+        # Collections created with named vectors return {"default": [...]}
+        vector = vector.get("default") or next(iter(vector.values()), None)
+    return {"uuid": str(obj.uuid), "vector": vector, "properties": dict(obj.properties or {})}
+
+
+def export_collection(collection: Any, quantize: bool = False,
+                      path: Optional[str] = None) -> LocalVectorIndex:
+    """Build an index from every object (with its vector) in a Weaviate collection."""
+    records = (
+        _record_from_object(obj)
+        for obj in collection.iterator(include_vector=True, return_properties=RETURN_PROPERTIES)
+    )
+    return LocalVectorIndex.build(records, quantize=quantize, path=path)
+
+
+def sync_with_collection(index: LocalVectorIndex, collection: Any,
+                         batch_size: int = 100) -> Dict[str, int]:
+    """
+    Bring the index up to date with the collection by uuid diff.
+
+    Only uuids are listed remotely; vectors are fetched just for objects
+    the index has not seen. Objects edited in place keep their uuid and
+    are not picked up. Rebuild with export_collection for those.
+    """
+    remote = {str(obj.uuid) for obj in collection.iterator(return_properties=[])}
+    local = set(index.uuids())
+
+    added = sorted(remote - local)
+    for start in range(0, len(added), batch_size):
+        batch = added[start:start + batch_size]
+        result = collection.query.fetch_objects_by_ids(
+            batch, include_vector=True, return_properties=RETURN_PROPERTIES, limit=len(batch)
+        )
+        index.upsert(_record_from_object(obj) for obj in result.objects)
+
+    removed = index.remove(local - remote)
+    return {"added": len(added), "removed": removed}
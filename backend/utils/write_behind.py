@@ -0,0 +1,188 @@
+import collections
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+
+class BacklogFull(Exception):
+    """The write-behind backlog is at capacity; the caller should write directly."""
+
+
+class WriteBehindQueue:
+    """
+    Buffer writes and apply them in batches on a background thread.
+
+    submit() queues an item under one or more keys and returns at once. The
+    writer thread lets items collect for up to flush_interval (less once
+    batch_size are waiting), then hands them to flush_fn(items), which
+    returns the items it could not write. Those go back to the front of the queue and are retried after
+    retry_backoff seconds, at most max_retries times before being dropped,
+    so flush_fn must tolerate an item being written twice. wait(key) blocks
+    until nothing is pending under key, for callers that need to read their
+    own writes; close() flushes what is left and stops the thread.
+    """
+
+    def __init__(
+        self,
+        flush_fn: Callable[[List[Any]], Iterable[Any]],
+        batch_size: int = 100,
+        flush_interval: float = 0.05,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        max_backlog: int = 10_000,
+        name: str = "write-behind",
+    ):
+        self.flush_fn = flush_fn
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_backlog = max_backlog
+        self.name = name
+        self._cond = threading.Condition()
+        self._queue: "collections.deque[Dict[str, Any]]" = collections.deque()
+        self._in_flight = 0
+        self._pending: Dict[Hashable, int] = collections.Counter()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._flush_waiters = 0
+        self._resume_at = 0.0
+        self.written = 0
+        self.retried = 0
+        self.dropped = 0
+        self.batches = 0
+
+    def submit(self, item: Any, keys: Iterable[Hashable] = ()) -> None:
+        """Queue an item; raises BacklogFull at capacity or after close()."""
+        keys = tuple(keys)
+        with self._cond:
+            if self._closed or len(self._queue) + self._in_flight >= self.max_backlog:
+                raise BacklogFull()
+            self._queue.append(
+                {"item": item, "keys": keys, "attempts": 0, "queued_at": time.monotonic()}
+            )
+            for key in keys:
+                self._pending[key] += 1
+            self._start()
+            self._cond.notify_all()
+
+    def backlog(self) -> int:
+        """Items queued or being written"""
+        with self._cond:
+            return len(self._queue) + self._in_flight
+
+    def pending(self, key: Hashable) -> int:
+        with self._cond:
+            return self._pending.get(key, 0)
+
+    def wait(self, key: Hashable, timeout: float) -> bool:
+        """Block until nothing is pending under key; False on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending.get(key, 0):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def flush(self, timeout: float) -> bool:
+        """Block until the backlog is empty; False on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._flush_waiters += 1
+            self._cond.notify_all()
+            try:
+                while self._queue or self._in_flight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                return True
+            finally:
+                self._flush_waiters -= 1
+
+    def close(self, timeout: float = 10.0) -> bool:
+        """Stop taking items, write the backlog and stop the writer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return self.backlog() == 0
+
+    def _start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                batch = self._next_batch()
+                if batch is None:
+                    return
+                self._in_flight = len(batch)
+
+            try:
+                failed_items = list(self.flush_fn([entry["item"] for entry in batch]) or [])
+            except Exception as e:
+                print(f"Error in {self.name} flush: {e}")
+                failed_items = [entry["item"] for entry in batch]
+            failed_ids = {id(item) for item in failed_items}
+
+            with self._cond:
+                retry = []
+                for entry in batch:
+                    if id(entry["item"]) not in failed_ids:
+                        self.written += 1
+                        self._done(entry)
+                    elif entry["attempts"] < self.max_retries:
+                        entry["attempts"] += 1
+                        self.retried += 1
+                        retry.append(entry)
+                    else:
+                        print(f"{self.name}: dropping item after {entry['attempts'] + 1} attempts")
+                        self.dropped += 1
+                        self._done(entry)
+                # Retries go first so writes under the same key stay in order
+                self._queue.extendleft(reversed(retry))
+                if retry:
+                    self._resume_at = time.monotonic() + self.retry_backoff
+                self._in_flight = 0
+                self.batches += 1
+                self._cond.notify_all()
+
+    def _next_batch(self) -> Optional[List[Dict[str, Any]]]:
+        """Wait for the next batch to write (lock held); None once closed and drained."""
+        while True:
+            if not self._queue:
+                if self._closed:
+                    return None
+                self._cond.wait()
+                continue
+            ready_at = self._resume_at
+            if len(self._queue) < self.batch_size and not self._closed and not self._flush_waiters:
+                ready_at = max(ready_at, self._queue[0]["queued_at"] + self.flush_interval)
+            now = time.monotonic()
+            if now >= ready_at:
+                return [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            self._cond.wait(ready_at - now)
+
+    def _done(self, entry: Dict[str, Any]) -> None:
+        for key in entry["keys"]:
+            self._pending[key] -= 1
+            if not self._pending[key]:
+                del self._pending[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "backlog": len(self._queue) + self._in_flight,
+                "max_backlog": self.max_backlog,
+                "written": self.written,
+                "retried": self.retried,
+                "dropped": self.dropped,
+                "batches": self.batches,
+            }
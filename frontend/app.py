@@ -3,6 +3,7 @@ Frontend Flask Application for Movie Recommendation System
 """
 from flask import Flask, render_template, request, redirect, url_for, session, flash
 import os
+import uuid
 from dotenv import load_dotenv
 import requests
 
@@ -14,6 +15,13 @@ app.secret_key = os.getenv('FLASK_SECRET_KEY', 'dev-secret-key-change-in-product
 BACKEND_API_URL = 'http://134.209.41.148:5001/api'
 
 
+def forwarded_headers():
+    """X-Forwarded-For for backend calls, so its rate limits see the browser's IP"""
+    forwarded = request.headers.get('X-Forwarded-For')
+    client = request.remote_addr or ''
+    return {'X-Forwarded-For': f'{forwarded}, {client}' if forwarded else client}
+
+
 def is_logged_in():
     """Check if user is logged in"""
     return 'user_email' in session
@@ -50,7 +58,8 @@ def login():
 
         try:
             response = requests.post(f'{BACKEND_API_URL}/auth/login', 
-                                    json={'email': email, 'password': password})
+                                    json={'email': email, 'password': password},
+                                    headers=forwarded_headers())
             if response.status_code == 200:
                 data = response.json()
                 if data.get('success'):
@@ -88,7 +97,8 @@ def register():
         try:
             response = requests.post(f'{BACKEND_API_URL}/auth/register',
                                     json={'fname': fname, 'lname': lname, 
-                                          'email': email, 'password': password})
+                                          'email': email, 'password': password},
+                                    headers=forwarded_headers())
             if response.status_code == 201:
                 flash('Registration successful! Please login.', 'success')
                 return redirect(url_for('login'))
@@ -119,7 +129,8 @@ def not_watched():
 
     try:
         user_email = session.get('user_email')
-        response = requests.get(f'{BACKEND_API_URL}/movies/not-watched?user_email={user_email}')
+        response = requests.get(f'{BACKEND_API_URL}/movies/not-watched?user_email={user_email}',
+                                headers=forwarded_headers())
         if response.status_code == 200:
             data = response.json()
             movies = data.get('movies', [])
@@ -139,7 +150,8 @@ def movie_detail(movie_id):
     # TODO: Backend integration - Uncomment when ready
     try:
         user_email = session.get('user_email')
-        response = requests.get(f'{BACKEND_API_URL}/movies/{movie_id}?user_email={user_email}')
+        response = requests.get(f'{BACKEND_API_URL}/movies/{movie_id}?user_email={user_email}',
+                                headers=forwarded_headers())
         if response.status_code == 200:
             data = response.json()
             movie = data.get('movie')
@@ -174,7 +186,8 @@ def rate_movie(movie_id):
                 'user_email': user_email,
                 'rating': float(rating),
                 'has_watched': True
-            }
+            },
+            headers=forwarded_headers()
         )
         if response.status_code == 200:
             flash('Movie rated successfully!', 'success')
@@ -191,7 +204,8 @@ def watched():
   
     try:
         user_email = session.get('user_email')
-        response = requests.get(f'{BACKEND_API_URL}/movies/watched?user_email={user_email}')
+        response = requests.get(f'{BACKEND_API_URL}/movies/watched?user_email={user_email}',
+                                headers=forwarded_headers())
         if response.status_code == 200:
             data = response.json()
             movies = data.get('movies', [])
@@ -213,6 +227,11 @@ def confirm_movie():
         movie_name = request.form.get('movie_name')
         movie_description = request.form.get('movie_description')
         runtime = request.form.get('runtime')
+        # Issued with the form, so a double submit adds the movie only once
+        idempotency_key = request.form.get('idempotency_key')
+        headers = forwarded_headers()
+        if idempotency_key:
+            headers['Idempotency-Key'] = idempotency_key
         
 
         try:
@@ -226,7 +245,8 @@ def confirm_movie():
                     'user_email': user_email,
                     'has_watched': False,
                     'rating': None
-                }
+                },
+                headers=headers
             )
             if response.status_code == 201:
                 flash('Movie added to your watchlist!', 'success')
@@ -247,7 +267,8 @@ def confirm_movie():
     return render_template('confirm.html', 
                          movie_name=movie_name,
                          movie_description=movie_description,
-                         runtime=runtime)
+                         runtime=runtime,
+                         idempotency_key=uuid.uuid4().hex)
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=8000, debug=True)
@@ -3,6 +3,8 @@ let currentConvoId = null;
 let currentUserEmail = null;
 
 const API_BASE_URL = 'http://134.209.41.148:5001/api';
+const MESSAGE_PAGE_SIZE = 50;
+let olderMessagesCursor = null;
 
 document.addEventListener('DOMContentLoaded', function () {
     const flashMessages = document.querySelectorAll('.flash');
@@ -38,23 +40,186 @@ function initChat() {
 
         input.value = '';
 
+        addUserMessage(message);
         showTypingIndicator();
 
-        sendMessageToBackend(message);
+        // One key per message, so retries of it are answered only once
+        streamMessageFromBackend(message, newIdempotencyKey());
     });
 }
 
-function sendMessageToBackend(userMessage) {
+function streamMessageFromBackend(userMessage, idempotencyKey) {
     if (!currentUserEmail) {
         hideTypingIndicator();
         addBotMessage("You're not logged in or email is missing.");
         return;
     }
 
-    fetch(`${API_BASE_URL}/chat/message`, {
+    if (!window.ReadableStream || !window.TextDecoder) {
+        sendMessageToBackend(userMessage, idempotencyKey);
+        return;
+    }
+
+    postWithRetry(`${API_BASE_URL}/chat/message/stream`, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Idempotency-Key': idempotencyKey
+        },
+        body: JSON.stringify({
+            role: 'user',
+            message: userMessage,
+            convo_id: currentConvoId || null,
+            user_email: currentUserEmail
+        })
+    })
+        .then(async res => {
+            if (!res.ok || !res.body) {
+                let data = {};
+                try {
+                    data = await res.json();
+                } catch (jsonErr) {
+                    console.error('Failed to parse JSON from /chat/message/stream response:', jsonErr);
+                }
+                hideTypingIndicator();
+                const errorCode = data.error_code ? ` (${data.error_code})` : '';
+                const msg = data.message || 'Sorry, something went wrong. Please try again.';
+                addBotMessage(`Error ${res.status}${errorCode}: ${msg}`);
+                return;
+            }
+
+            const reader = res.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            let streamed = '';
+            let streamParagraph = null;
+
+            while (true) {
+                const { value, done } = await reader.read();
+                if (done) break;
+
+                buffer += decoder.decode(value, { stream: true });
+
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    const frame = parseSseFrame(buffer.slice(0, boundary));
+                    buffer = buffer.slice(boundary + 2);
+                    if (!frame) continue;
+
+                    if (frame.event === 'done') {
+                        currentConvoId = frame.data.convo_id;
+                        loadConversation();
+                        return;
+                    }
+
+                    if (frame.event === 'error') {
+                        hideTypingIndicator();
+                        const errorCode = frame.data.error_code ? ` (${frame.data.error_code})` : '';
+                        addBotMessage(`Error${errorCode}: ${frame.data.message || 'Generation failed.'}`);
+                        return;
+                    }
+
+                    if (frame.data.delta) {
+                        if (!streamParagraph) {
+                            hideTypingIndicator();
+                            streamParagraph = addStreamingBotMessage();
+                        }
+                        streamed += frame.data.delta;
+                        streamParagraph.innerHTML = escapeHtml(streamed).replace(/\n/g, '<br>');
+                        scrollToBottom();
+                    }
+                }
+            }
+
+            // Stream closed without a done event
+            hideTypingIndicator();
+            if (!streamed) {
+                addBotMessage('Sorry, the response was interrupted. Please try again.');
+            }
+        })
+        .catch(error => {
+            console.error('Network or fetch error calling /chat/message/stream:', error);
+            hideTypingIndicator();
+            addBotMessage(`Network error: ${error.message}`);
+        });
+}
+
+function parseSseFrame(raw) {
+    let event = 'message';
+    const dataLines = [];
+
+    raw.split('\n').forEach(line => {
+        if (line.startsWith('event:')) {
+            event = line.slice(6).trim();
+        } else if (line.startsWith('data:')) {
+            dataLines.push(line.slice(5).trim());
+        }
+    });
+
+    if (!dataLines.length) return null;
+
+    try {
+        return { event, data: JSON.parse(dataLines.join('\n')) };
+    } catch (e) {
+        console.error('Failed to parse SSE frame:', raw, e);
+        return null;
+    }
+}
+
+function newIdempotencyKey() {
+    if (window.crypto && crypto.randomUUID) {
+        return crypto.randomUUID();
+    }
+    return `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+}
+
+const MAX_SEND_ATTEMPTS = 3;
+
+// Resend the same request (and Idempotency-Key) after a network error, or
+// while the server is still answering an earlier attempt (409)
+async function postWithRetry(url, options, attempt = 1) {
+    let res;
+    try {
+        res = await fetch(url, options);
+    } catch (error) {
+        if (attempt >= MAX_SEND_ATTEMPTS) throw error;
+        await sleep(500 * attempt);
+        return postWithRetry(url, options, attempt + 1);
+    }
+
+    if (res.status === 409 && attempt < MAX_SEND_ATTEMPTS) {
+        let data = {};
+        try {
+            data = await res.clone().json();
+        } catch (jsonErr) {
+            return res;
+        }
+        if (data.error_code === 'IDEMPOTENCY_IN_PROGRESS') {
+            const retryAfter = parseFloat(res.headers.get('Retry-After')) || 1;
+            await sleep(retryAfter * 1000);
+            return postWithRetry(url, options, attempt + 1);
+        }
+    }
+    return res;
+}
+
+function sleep(ms) {
+    return new Promise(resolve => setTimeout(resolve, ms));
+}
+
+function sendMessageToBackend(userMessage, idempotencyKey) {
+    if (!currentUserEmail) {
+        hideTypingIndicator();
+        addBotMessage("You're not logged in or email is missing.");
+        return;
+    }
+
+    postWithRetry(`${API_BASE_URL}/chat/message`, {
         method: 'POST',
         headers: {
-            'Content-Type': 'application/json'
+            'Content-Type': 'application/json',
+            // A retried request replays the first answer instead of re-running the LLM
+            'Idempotency-Key': idempotencyKey
         },
         body: JSON.stringify({
             role: 'user',
@@ -116,7 +281,7 @@ function sendMessageToBackend(userMessage) {
 function loadConversation() {
     if (!currentConvoId || !currentUserEmail) return;
 
-    fetch(`${API_BASE_URL}/chat/conversation/${currentConvoId}?user_email=${encodeURIComponent(currentUserEmail)}`)
+    fetch(conversationPageUrl())
         .then(async res => {
             let data;
             try {
@@ -148,6 +313,8 @@ function loadConversation() {
             const convo = data.conversation;
             const messages = convo.messages || [];
             renderConversation(messages);
+            olderMessagesCursor = data.page ? data.page.before : null;
+            updateLoadOlderButton();
         })
         .catch(error => {
             console.error('Error loading conversation:', error);
@@ -155,29 +322,91 @@ function loadConversation() {
         });
 }
 
-function renderConversation(messages) {
+function conversationPageUrl(before = null) {
+    let url = `${API_BASE_URL}/chat/conversation/${currentConvoId}` +
+        `?user_email=${encodeURIComponent(currentUserEmail)}&limit=${MESSAGE_PAGE_SIZE}`;
+    if (before !== null) url += `&before=${before}`;
+    return url;
+}
+
+function loadOlderMessages() {
+    if (olderMessagesCursor === null || !currentConvoId || !currentUserEmail) return;
+
+    fetch(conversationPageUrl(olderMessagesCursor))
+        .then(res => res.json())
+        .then(data => {
+            if (!data.success) {
+                console.error('Could not load older messages:', data);
+                return;
+            }
+            prependMessages(data.conversation.messages || []);
+            olderMessagesCursor = data.page ? data.page.before : null;
+            updateLoadOlderButton();
+        })
+        .catch(error => {
+            console.error('Error loading older messages:', error);
+        });
+}
+
+function updateLoadOlderButton() {
     const chatMessages = document.getElementById('chatMessages');
     if (!chatMessages) return;
 
-    chatMessages.innerHTML = '';
+    const existing = document.getElementById('loadOlderMessages');
+    if (existing) existing.remove();
+    if (olderMessagesCursor === null) return;
 
-    messages.forEach(msg => {
-        if (msg.role === 'user') {
-            addUserMessage(msg.content, false);
-        } else if (msg.role === 'model') {
-            if (isMovieRecommendation(msg.content)) {
-                addBotMovieRecommendationFromText(msg.content, false);
-            } else {
-                addBotMessage(msg.content, false);
-            }
+    const button = document.createElement('button');
+    button.id = 'loadOlderMessages';
+    button.className = 'load-older-btn';
+    button.textContent = 'Load older messages';
+    button.addEventListener('click', loadOlderMessages);
+    chatMessages.prepend(button);
+}
+
+function renderMessage(msg) {
+    if (msg.role === 'user') {
+        addUserMessage(msg.content, false);
+    } else if (msg.role === 'model') {
+        if (msg.recommendation) {
+            addBotMovieRecommendation(msg.recommendation, false);
+        } else if (isMovieRecommendation(msg.content)) {
+            addBotMovieRecommendationFromText(msg.content, false);
         } else {
             addBotMessage(msg.content, false);
         }
-    });
+    } else {
+        addBotMessage(msg.content, false);
+    }
+}
+
+function renderConversation(messages) {
+    const chatMessages = document.getElementById('chatMessages');
+    if (!chatMessages) return;
+
+    chatMessages.innerHTML = '';
+
+    messages.forEach(renderMessage);
 
     scrollToBottom();
 }
 
+function prependMessages(messages) {
+    const chatMessages = document.getElementById('chatMessages');
+    if (!chatMessages) return;
+
+    // Render the older page, then put the already-loaded messages back after
+    // it, keeping the viewport on the message the user was reading
+    const loaded = Array.from(chatMessages.children).filter(el => el.id !== 'loadOlderMessages');
+    const distanceFromBottom = chatMessages.scrollHeight - chatMessages.scrollTop;
+
+    chatMessages.innerHTML = '';
+    messages.forEach(renderMessage);
+    loaded.forEach(el => chatMessages.appendChild(el));
+
+    chatMessages.scrollTop = chatMessages.scrollHeight - distanceFromBottom;
+}
+
 function addUserMessage(text, scroll = true) {
     const chatMessages = document.getElementById('chatMessages');
     if (!chatMessages) return;
@@ -208,15 +437,30 @@ function addBotMessage(text, scroll = true) {
     if (scroll) scrollToBottom();
 }
 
+function addStreamingBotMessage() {
+    const chatMessages = document.getElementById('chatMessages');
+    if (!chatMessages) return document.createElement('p');
+
+    const messageDiv = document.createElement('div');
+    messageDiv.className = 'message bot-message';
+    messageDiv.innerHTML = `
+        <div class="message-content">
+            <p></p>
+        </div>
+    `;
+    chatMessages.appendChild(messageDiv);
+    return messageDiv.querySelector('p');
+}
+
 function isMovieRecommendation(text) {
     return /Movie Name:\s*/i.test(text) &&
-           /Runtime:\s*\d+/i.test(text) &&
+           /Runtime:\s*(\d+|unknown)/i.test(text) &&
            /Description:\s*/i.test(text);
 }
 
 function parseMovieRecommendation(text) {
     const nameMatch = text.match(/Movie Name:\s*(.+)/i);
-    const runtimeMatch = text.match(/Runtime:\s*([\d.]+)\s*minutes?/i);
+    const runtimeMatch = text.match(/Runtime:\s*(?:([\d.]+)\s*minutes?|unknown)/i);
     const descMatch = text.match(/Description:\s*([\s\S]*)/i);
 
     if (!nameMatch || !runtimeMatch || !descMatch) {
@@ -224,7 +468,8 @@ function parseMovieRecommendation(text) {
     }
 
     const name = nameMatch[1].trim();
-    const runtime = parseInt(runtimeMatch[1], 10);
+    // Vector-search fallback answers have no runtime
+    const runtime = runtimeMatch[1] ? parseInt(runtimeMatch[1], 10) : null;
     const description = descMatch[1].trim();
 
     return { name, runtime, description };
@@ -237,7 +482,18 @@ function addBotMovieRecommendationFromText(text, scroll = true) {
         return;
     }
 
-    const { name, runtime, description } = parsed;
+    addBotMovieRecommendation({
+        title: parsed.name,
+        runtime_minutes: parsed.runtime,
+        description: parsed.description
+    }, scroll);
+}
+
+// rec: the typed recommendation object returned by the chat API
+function addBotMovieRecommendation(rec, scroll = true) {
+    const name = rec.title;
+    const runtime = rec.runtime_minutes ?? null;
+    const description = rec.description || '';
 
     const chatMessages = document.getElementById('chatMessages');
     if (!chatMessages) return;
@@ -250,8 +506,8 @@ function addBotMovieRecommendationFromText(text, scroll = true) {
             <div class="recommendation-card">
                 <h4>🎬 ${escapeHtml(name)}</h4>
                 <p class="rec-description">${escapeHtml(description)}</p>
-                <p class="rec-runtime">⏱️ Runtime: ${runtime} minutes</p>
-                <a href="/confirm?movie_name=${encodeURIComponent(name)}&description=${encodeURIComponent(description)}&runtime=${runtime}" 
+                <p class="rec-runtime">⏱️ Runtime: ${runtime !== null ? `${runtime} minutes` : 'unknown'}</p>
+                <a href="/confirm?movie_name=${encodeURIComponent(name)}&description=${encodeURIComponent(description)}&runtime=${runtime !== null ? runtime : ''}" 
                    class="btn btn-primary btn-sm rec-btn">
                     ➕ Add to Watchlist
                 </a>
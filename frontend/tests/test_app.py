@@ -576,4 +576,36 @@ def test_sidebar_navigation_links(mock_get, logged_in_client):
         assert b'Chatbot' in response.data
         assert b'Not Watched' in response.data
         assert b'Watched' in response.data
-        assert b'Logout' in response.data
\ No newline at end of file
+        assert b'Logout' in response.data
+
+@patch('app.requests.post')
+def test_confirm_page_post_forwards_idempotency_key(mock_post, logged_in_client):
+    """Test that the form's idempotency key is sent to the backend"""
+    mock_post.return_value.status_code = 201
+    
+    form_page = logged_in_client.get('/confirm?movie_name=Titanic')
+    assert b'name="idempotency_key"' in form_page.data
+    
+    logged_in_client.post('/confirm',
+                          data={
+                              'movie_name': 'Test Movie',
+                              'movie_description': 'A test description',
+                              'runtime': '120',
+                              'idempotency_key': 'form-key-1'
+                          })
+    assert mock_post.call_args.kwargs['headers']['Idempotency-Key'] == 'form-key-1'
+
+
+@patch('app.requests.post')
+def test_login_forwards_client_ip(mock_post, client):
+    """Test that backend calls carry the browser's IP for rate limiting"""
+    mock_post.return_value.status_code = 401
+    
+    client.post('/login', data={'email': 'test@example.com', 'password': 'x'},
+                environ_base={'REMOTE_ADDR': '203.0.113.7'})
+    assert mock_post.call_args.kwargs['headers'] == {'X-Forwarded-For': '203.0.113.7'}
+    
+    client.post('/login', data={'email': 'test@example.com', 'password': 'x'},
+                headers={'X-Forwarded-For': '198.51.100.1'},
+                environ_base={'REMOTE_ADDR': '10.0.0.5'})
+    assert mock_post.call_args.kwargs['headers'] == {'X-Forwarded-For': '198.51.100.1, 10.0.0.5'}